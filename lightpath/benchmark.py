@@ -0,0 +1,286 @@
+"""
+Benchmarks of controller construction and path evaluation
+
+Each benchmark lays out a synthetic facility with :func:`.make_facility`,
+then times the main entry points of a fresh :class:`.LightController` on it:
+
+``controller_init``
+    Building the controller, and with it the facility graph
+``load_beamline``
+    Finding the paths to every endstation
+``get_paths``
+    Creating the devices and :class:`.BeamPath` objects of every endstation
+``active_path``
+    Ranking the paths of every endstation, on first request
+``active_path_cached``
+    Requesting the active path of every endstation again
+``blocking_devices``
+    Evaluating the blocking devices of every active path
+
+Each step is timed over several repeats.  The memory allocated by each step
+is measured in a separate run with :mod:`tracemalloc`, so that tracing does
+not slow the timed runs.  Results are plain dictionaries, and
+:func:`write_results` stores them as JSON to compare between versions::
+
+    results = run_benchmarks(sizes=[500, 2000], branching=3)
+    write_results(results, 'benchmark.json')
+
+The same is available from the command line with ``lightpath benchmark``.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Optional, TextIO, Union
+
+import happi
+
+from .controller import LightController
+from .synthetic import make_facility, write_facility
+
+logger = logging.getLogger(__name__)
+
+STEPS = ('controller_init', 'load_beamline', 'get_paths', 'active_path',
+         'active_path_cached', 'blocking_devices')
+
+
+@dataclass
+class BenchmarkResult:
+    """
+    Timing and memory use of one benchmark step
+
+    Attributes
+    ----------
+    name : str
+        name of the step, one of :data:`STEPS`
+
+    n_devices : int
+        number of devices in the facility
+
+    branching : int
+        number of output branches of each branching device
+
+    times : List[float]
+        duration of the step in seconds, for each repeat
+
+    peak_memory : int
+        peak memory in bytes allocated during the step
+
+    retained_memory : int
+        memory in bytes still allocated after the step
+    """
+    name: str
+    n_devices: int
+    branching: int
+    times: list[float] = field(default_factory=list)
+    peak_memory: int = 0
+    retained_memory: int = 0
+
+    def to_dict(self) -> dict[str, Any]:
+        """Result as a JSON-serializable dictionary, with summary times"""
+        result = asdict(self)
+        result.update(min=min(self.times),
+                      median=statistics.median(self.times),
+                      mean=statistics.mean(self.times))
+        return result
+
+
+def _run_steps(
+    client: happi.Client,
+    cfg: dict[str, Any],
+    measure: Callable[[str, Callable[[], Any]], Any],
+) -> None:
+    """Run each benchmark step on a new controller through ``measure``"""
+    # Devices cached by happi would skip instantiation in later repeats
+    happi.loader.cache.clear()
+    controller = measure('controller_init',
+                         lambda: LightController(client, cfg=cfg))
+    endstations = list(controller.beamlines)
+
+    def load_beamlines():
+        for endstation in endstations:
+            controller.load_beamline(endstation)
+
+    def get_paths():
+        return [path for endstation in endstations
+                for path in controller.get_paths(endstation)]
+
+    def active_paths():
+        return [controller.active_path(endstation)
+                for endstation in endstations
+                if controller.has_paths(endstation)]
+
+    measure('load_beamline', load_beamlines)
+    paths = measure('get_paths', get_paths)
+    try:
+        measure('active_path', active_paths)
+        active = measure('active_path_cached', active_paths)
+        measure('blocking_devices',
+                lambda: [path.blocking_devices for path in active])
+    finally:
+        controller.invalidate_paths()
+        for path in paths:
+            path.clear_device_subs()
+
+
+def benchmark_facility(
+    n_devices: int = 500,
+    branching: int = 2,
+    repeat: int = 3,
+    seed: Optional[int] = 0,
+    **layout,
+) -> list[BenchmarkResult]:
+    """
+    Benchmark each step on a synthetic facility
+
+    Parameters
+    ----------
+    n_devices : int, optional
+        number of devices in the facility
+
+    branching : int, optional
+        number of output branches of each branching device
+
+    repeat : int, optional
+        number of times each step is timed
+
+    seed : int, optional
+        seed for the layout of the facility
+
+    **layout
+        further arguments to :func:`.make_facility`, e.g. ``n_sources``
+
+    Returns
+    -------
+    List[BenchmarkResult]
+        result of each step, in the order of :data:`STEPS`
+    """
+    results = {name: BenchmarkResult(name, n_devices, branching)
+               for name in STEPS}
+    db, cfg = make_facility(n_devices=n_devices, branching=branching,
+                            seed=seed, **layout)
+    with tempfile.TemporaryDirectory() as tmp:
+        client = happi.Client(path=str(write_facility(Path(tmp) / 'db.json',
+                                                      db)))
+
+        def timed(name, func):
+            start = time.perf_counter()
+            value = func()
+            results[name].times.append(time.perf_counter() - start)
+            return value
+
+        def traced(name, func):
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            value = func()
+            current, peak = tracemalloc.get_traced_memory()
+            results[name].peak_memory = peak - before
+            results[name].retained_memory = current - before
+            return value
+
+        for idx in range(repeat):
+            logger.info('Benchmarking %d devices, run %d of %d',
+                        n_devices, idx + 1, repeat)
+            _run_steps(client, cfg, timed)
+
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        try:
+            _run_steps(client, cfg, traced)
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+
+    return list(results.values())
+
+
+def run_benchmarks(
+    sizes: Iterable[int] = (500,),
+    branching: int = 2,
+    repeat: int = 3,
+    seed: Optional[int] = 0,
+    **layout,
+) -> dict[str, Any]:
+    """
+    Benchmark facilities of several sizes
+
+    Parameters
+    ----------
+    sizes : Iterable[int], optional
+        number of devices in each facility
+
+    branching : int, optional
+        number of output branches of each branching device
+
+    repeat : int, optional
+        number of times each step is timed
+
+    seed : int, optional
+        seed for the layout of each facility
+
+    **layout
+        further arguments to :func:`.make_facility`, e.g. ``n_sources``
+
+    Returns
+    -------
+    Dict[str, Any]
+        JSON-serializable ``metadata`` describing the environment, and
+        ``results``, a list of the result of each step for each size
+    """
+    from . import __version__
+
+    results = []
+    for n_devices in sizes:
+        results.extend(
+            result.to_dict()
+            for result in benchmark_facility(n_devices=n_devices,
+                                             branching=branching,
+                                             repeat=repeat, seed=seed,
+                                             **layout)
+        )
+    return {
+        'metadata': {
+            'lightpath': str(__version__),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'time': time.time(),
+            'repeat': repeat,
+            'seed': seed,
+            'layout': layout,
+        },
+        'results': results,
+    }
+
+
+def write_results(
+    results: dict[str, Any],
+    output: Optional[Union[str, Path, TextIO]] = None,
+) -> None:
+    """
+    Write benchmark results as JSON
+
+    Parameters
+    ----------
+    results : Dict[str, Any]
+        results from :func:`run_benchmarks`
+
+    output : Union[str, Path, TextIO], optional
+        file or stream to write to, by default standard output
+    """
+    output = sys.stdout if output is None else output
+    if isinstance(output, (str, Path)):
+        with open(output, 'w') as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, output, indent=2)
+        output.write('\n')
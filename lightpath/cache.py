@@ -0,0 +1,181 @@
+"""
+Persistent cache of the facility graph and beamline paths
+
+Building the facility graph requires searching the entire happi database and
+composing a subgraph for each branch.  The results of this, along with the
+paths found to each endstation, can be stored on disk and reused as long as
+neither the happi database nor the beamline configuration has changed.
+
+The cache is a versioned JSON document, keyed on a hash of the database
+contents and the configuration used to build it.  Any mismatch in either the
+version or the key causes the cache to be ignored and rebuilt.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from happi import Client, SearchResult
+
+logger = logging.getLogger(__name__)
+
+#: Version of the cache format, bump when the layout changes
+CACHE_VERSION = 1
+
+
+class CachedResult(SearchResult):
+    """
+    A :class:`happi.SearchResult` restored from cached metadata
+
+    The happi item is only loaded from the database when it is needed, i.e.
+    when the device is instantiated.
+
+    Parameters
+    ----------
+    client : happi.Client
+        Client the metadata was originally found with
+
+    metadata : Dict[str, Any]
+        Cached metadata of the search result
+    """
+    def __init__(self, client: Client, metadata: dict[str, Any]):
+        self._item = None
+        self._instantiated = None
+        self.client = client
+        self.metadata = metadata
+
+    @property
+    def item(self):
+        if self._item is None:
+            self._item = self.client[self.metadata['_id']].item
+        return self._item
+
+
+def database_hash(client: Client) -> str:
+    """
+    Hash the contents of the database behind a happi client
+
+    File based backends are hashed by their contents on disk, other backends
+    by the documents they hold.
+
+    Parameters
+    ----------
+    client : happi.Client
+
+    Returns
+    -------
+    str
+        hex digest of the database contents
+    """
+    digest = hashlib.sha256()
+    path = getattr(client.backend, 'path', None)
+    if path is not None and os.path.isfile(path):
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    else:
+        docs = sorted(client.backend.find({}), key=lambda doc: doc['_id'])
+        digest.update(json.dumps(docs, sort_keys=True,
+                                 default=str).encode())
+    return digest.hexdigest()
+
+
+def cache_key(client: Client, config: dict[str, Any]) -> str:
+    """
+    Key identifying a facility built from ``client`` with ``config``
+
+    Parameters
+    ----------
+    client : happi.Client
+
+    config : Dict[str, Any]
+        Configuration used to build the facility, e.g. beamlines and sources
+
+    Returns
+    -------
+    str
+        hex digest of the database and configuration
+    """
+    digest = hashlib.sha256(database_hash(client).encode())
+    digest.update(json.dumps(config, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def read_cache(
+    path: Union[str, Path],
+    key: str
+) -> Optional[dict[str, Any]]:
+    """
+    Read the facility cache, if it is valid for ``key``
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        Path to cache file
+
+    key : str
+        Expected key, see :func:`cache_key`
+
+    Returns
+    -------
+    Optional[Dict[str, Any]]
+        Cached data, or None if the cache is missing, stale or unreadable
+    """
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except FileNotFoundError:
+        logger.debug('No facility cache found at %s', path)
+        return None
+    except Exception:
+        logger.warning('Unable to read facility cache at %s', path,
+                       exc_info=True)
+        return None
+
+    if cache.get('version') != CACHE_VERSION:
+        logger.info('Facility cache at %s has an outdated format', path)
+        return None
+    if cache.get('key') != key:
+        logger.info('Facility cache at %s is out of date', path)
+        return None
+    return cache['data']
+
+
+def write_cache(
+    path: Union[str, Path],
+    key: str,
+    data: dict[str, Any]
+) -> None:
+    """
+    Write the facility cache
+
+    The file is replaced atomically, so that concurrent readers only ever
+    see a complete cache.
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        Path to cache file
+
+    key : str
+        Key identifying the cached facility, see :func:`cache_key`
+
+    data : Dict[str, Any]
+        JSON-serializable data to cache
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': CACHE_VERSION, 'key': key, 'data': data},
+                      f, default=str)
+        os.replace(tmp_path, path)
+    except Exception:
+        logger.warning('Unable to write facility cache to %s', path,
+                       exc_info=True)
+        tmp_path.unlink(missing_ok=True)
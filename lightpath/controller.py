@@ -12,30 +12,37 @@ XPP's and XCS's beampath. In some cases there are multiple possible paths beam
 may take to reach a given endstation.  In the case of multiple possible paths,
 the :meth:`.LightController.active_path` will return the path with the latest
 impediment.  (equivalently, the path that lets the beam through farthest)
+Paths with the same impediment are ranked by the transmission they deliver.
+The ranking of each endstation is kept by a :class:`.PathRanking`, updated as
+the paths change.
 
 The :class:`.LightController` handles this logic as well as a basic overview of
 where the beam is
 """
 import logging
 import math
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Optional, Union
+from typing import Any, Iterable, Optional, Union
 
 import networkx as nx
 from happi import Client, SearchResult
-from networkx.exception import NodeNotFound
 from ophyd import Device
 
+from .cache import CachedResult, cache_key, read_cache, write_cache
 from .config import beamlines
 from .config import sources as default_sources
 from .errors import PathError
+from .graph import PathIndex
 from .mock_devices import Crystal, Valve
-from .path import BeamPath
+from .path import BeamPath, PathSnapshot, find_device_state
 
 logger = logging.getLogger(__name__)
 
 NodeName = str
-MaybeBeamPath = list[Union[list[NodeName], BeamPath]]
+MaybeBeamPath = Optional[list[Union[list[NodeName], BeamPath]]]
 
 
 @dataclass
@@ -44,6 +51,114 @@ class NodeMetadata:
     dev: Optional[Device] = None
 
 
+class PathRanking:
+    """
+    Ranking of the paths to an endstation, kept up to date from the change
+    events of each path
+
+    Paths are ranked by the z position of their impediment, a path without
+    an impediment ranking highest, and ties are broken by the transmission
+    delivered to the end of the path.  Remaining ties go to the later path.
+    The ranking is only re-evaluated when one of the paths reports a change
+    in impediment or transmission, so :attr:`.active` is a simple lookup.
+
+    Parameters
+    ----------
+    paths : List[BeamPath]
+        Candidate paths to the endstation
+    """
+    def __init__(self, paths: list[BeamPath]):
+        self.paths = list(paths)
+        self._keys = [(-math.inf, 0.0)] * len(self.paths)
+        self._active = 0
+        self._lock = threading.Lock()
+        self._subscribed = [False] * len(self.paths)
+        self.update()
+
+    @staticmethod
+    def rank_key(snapshot: PathSnapshot) -> tuple[float, float]:
+        """
+        Key paths are ranked by, the z position of the impediment and the
+        delivered transmission
+        """
+        imped = snapshot.impediment
+        z = math.inf if imped is None else imped.md.z
+        return z, snapshot.transmissions[-1]
+
+    @property
+    def active(self) -> BeamPath:
+        """The path letting beam through farthest"""
+        return self.paths[self._active]
+
+    def ranked(self) -> list[tuple[BeamPath, float, float]]:
+        """
+        Paths from highest to lowest rank
+
+        Returns
+        -------
+        List[Tuple[BeamPath, float, float]]
+            each path, with the z position of its impediment, or inf if it
+            has none, and the transmission delivered to its end
+        """
+        with self._lock:
+            order = sorted(range(len(self.paths)),
+                           key=lambda idx: (self._keys[idx], idx),
+                           reverse=True)
+            return [(self.paths[idx], *self._keys[idx]) for idx in order]
+
+    def update(self) -> None:
+        """
+        Subscribe to any path that is not subscribed to, e.g. after its
+        device subscriptions were cleared, and re-rank every path from a
+        fresh snapshot
+        """
+        for idx, path in enumerate(self.paths):
+            if not self._subscribed[idx] or path.last_snapshot is None:
+                path.clear_sub(self._path_changed)
+                path.subscribe(self._path_changed, run=False)
+                # Devices report no state until connected
+                path.connect_all()
+                self._subscribed[idx] = True
+        keys = [self.rank_key(path.snapshot()) for path in self.paths]
+        with self._lock:
+            self._keys = keys
+            self._rank()
+
+    @property
+    def subscribed(self) -> bool:
+        """Whether every path is still reporting changes"""
+        return all(path.last_snapshot is not None for path in self.paths)
+
+    def clear_subs(self) -> None:
+        """Remove the subscriptions made to each path"""
+        for idx, path in enumerate(self.paths):
+            if self._subscribed[idx]:
+                path.clear_sub(self._path_changed)
+                self._subscribed[idx] = False
+
+    def _rank(self) -> None:
+        best = 0
+        for idx, key in enumerate(self._keys):
+            if key >= self._keys[best]:
+                best = idx
+        self._active = best
+
+    def _path_changed(self, *args, obj=None, **kwargs) -> None:
+        # The latest snapshot of the path, rather than the one reported,
+        # as events from different threads may arrive out of order
+        for idx, path in enumerate(self.paths):
+            if path is obj:
+                break
+        else:
+            return
+        snapshot = path.last_snapshot
+        if snapshot is None:
+            return
+        with self._lock:
+            self._keys[idx] = self.rank_key(snapshot)
+            self._rank()
+
+
 class LightController:
     """
     Controller for the LCLS Lightpath
@@ -59,8 +174,14 @@ class LightController:
     endstations: List[str], optional
         List of experimental endstations to load BeamPath objects for. If left
         as None, all endstations will be loaded
+
+    cfg : Dict[str, Any], optional
+        Configuration overriding the defaults.  Includes ``beamlines``,
+        ``hutches``, ``sources``, ``min_trans`` and ``cache``, a path to a
+        file used to cache the facility graph between sessions
     """
     graph: nx.DiGraph
+    index: PathIndex
 
     def __init__(
         self,
@@ -73,7 +194,8 @@ class LightController:
             'beamlines': beamlines,
             'hutches': endstations,
             'sources': default_sources,
-            'min_trans': 0.1
+            'min_trans': 0.1,
+            'cache': None,
         }
         # update default config with provided cfg
         config.update(cfg)
@@ -81,19 +203,38 @@ class LightController:
         self.hutches = config['hutches']
         self.default_sources = config['sources']
         self.min_trans = config['min_trans']
+        self.cache_path = config['cache']
 
-        # a mapping of endstation name to either a path or initialized BeamPath
+        # a mapping of endstation name to either a path or initialized
+        # BeamPath.  None until the paths are first requested
         self.beamlines: dict[str, MaybeBeamPath] = dict()
         # sources found in facility
         self.sources: set[str] = set()
+        # paths found to each endstation, by node name
+        self._path_names: dict[str, list[list[NodeName]]] = dict()
+        # BeamPaths in use, by the names of their devices
+        self._beampaths: weakref.WeakValueDictionary[
+            tuple[NodeName, ...], BeamPath
+        ] = weakref.WeakValueDictionary()
+        # ranking of the paths to each endstation, by endstation
+        self._rankings: dict[str, PathRanking] = dict()
+        self._cache_key: Optional[str] = None
+        self._cache_stale = False
 
         # initialize graph -> self.graph
         self.load_facility()
 
         dests = (self.hutches or (self.beamline_config or {}).keys())
-        # Find the requisite beamlines to reach our endstation
+        # Register our endstations, their paths are found on request
         for beamline in dests:
-            self.load_beamline(beamline)
+            if beamline in self.beamline_config:
+                self.beamlines[beamline] = None
+            else:
+                logger.warning("Unable to find %s as a configured "
+                               "endstation, assuming this is an invalid "
+                               "path", beamline)
+
+        self.save_cache()
 
     def load_facility(self):
         """
@@ -104,8 +245,31 @@ class LightController:
         labeled with their branch.
 
         The facility graph is created by combining subgraphs that
-        each contain all the devices on a given branch.
+        each contain all the devices on a given branch.  A
+        :class:`.PathIndex` of the graph is then built for path lookups.
+
+        If a ``cache`` is configured and matches the current happi database
+        and beamline configuration, the graph is restored from it instead.
+
+        Paths found in a previously loaded graph are discarded, see
+        :meth:`.invalidate_paths`.
         """
+        self.invalidate_paths()
+        if self.cache_path:
+            self._cache_key = cache_key(
+                self.client,
+                {'beamlines': self.beamline_config,
+                 'sources': self.default_sources}
+            )
+            cached = read_cache(self.cache_path, self._cache_key)
+            if cached is not None:
+                logger.debug('Loading facility from cache: %s',
+                             self.cache_path)
+                self._load_cached_facility(cached)
+                self.index = PathIndex(self.graph)
+                return
+            self._cache_stale = True
+
         results = self.client.search_range(key='z', start=0.0, end=math.inf,
                                            active=True, lightpath=True)
         if len(results) < 1:
@@ -137,6 +301,98 @@ class LightController:
             subgraphs.append(subgraph)
 
         self.graph = nx.compose_all(subgraphs)
+        self.index = PathIndex(self.graph)
+
+    def invalidate_paths(self) -> None:
+        """
+        Discard the paths found so far and the :class:`.BeamPath` objects
+        created for them.  Must be called if the facility graph changes.
+
+        Paths to each endstation are found again on the next request.
+        """
+        for ranking in self._rankings.values():
+            ranking.clear_subs()
+        self._rankings.clear()
+        self._beampaths.clear()
+        self._path_names.clear()
+        for endstation in self.beamlines:
+            self.beamlines[endstation] = None
+
+    def _beampath(self, path: list[NodeName], name: str) -> BeamPath:
+        """
+        BeamPath through the devices along a path of nodes.  The BeamPath is
+        shared with any other request for the same devices, as long as it is
+        still in use.
+        """
+        names = tuple(self._device_nodes(path))
+        bp = self._beampaths.get(names)
+        if bp is None:
+            bp = BeamPath(
+                *(self.get_device(dev_name) for dev_name in names),
+                name=name,
+                minimum_transmission=self.min_trans
+            )
+            self._beampaths[names] = bp
+        return bp
+
+    def _device_nodes(self, path: list[NodeName]) -> list[NodeName]:
+        """Nodes along a path that have an associated device"""
+        return [node for node in path
+                if self.graph.nodes[node]['md'].res is not None]
+
+    def device_names(self, endstation: str) -> list[list[NodeName]]:
+        """
+        Names of the devices along each path to an endstation, in order from
+        the source.  The paths are found if needed, but no device is
+        instantiated
+
+        Parameters
+        ----------
+        endstation : str
+            name of endstation to return device names for
+
+        Returns
+        -------
+        List[List[NodeName]]
+            device names of each path, in the order of :meth:`.get_paths`
+        """
+        if self.beamlines.get(endstation) is None:
+            self.load_beamline(endstation)
+            self.save_cache()
+        return [self._device_nodes(path)
+                for path in self._path_names.get(endstation, [])]
+
+    def _load_cached_facility(self, cached: dict[str, Any]) -> None:
+        """Restore the facility graph and paths from cached data"""
+        graph = nx.DiGraph()
+        for name, metadata in cached['nodes']:
+            res = None
+            if metadata is not None:
+                res = CachedResult(self.client, metadata)
+            graph.add_node(name, md=NodeMetadata(res=res))
+        for start, end, branch in cached['edges']:
+            graph.add_edge(start, end, weight=0.0, branch=branch)
+
+        self.graph = graph
+        self.sources.update(n for n in graph if self.is_source_name(n))
+        self._path_names = {endstation: [list(path) for path in paths]
+                            for endstation, paths in cached['paths'].items()}
+
+    def save_cache(self) -> None:
+        """
+        Write the facility graph and the paths found so far to the
+        configured ``cache``, if they are not already stored there
+        """
+        if not self.cache_path or not self._cache_stale:
+            return
+        nodes = [(name, getattr(data['md'].res, 'metadata', None))
+                 for name, data in self.graph.nodes.data()]
+        edges = [(start, end, data['branch'])
+                 for start, end, data in self.graph.edges.data()]
+        write_cache(self.cache_path, self._cache_key,
+                    {'nodes': nodes, 'edges': edges,
+                     'paths': self._path_names})
+        self._cache_stale = False
 
     def load_beamline(self, endstation: str):
         """
@@ -161,21 +417,18 @@ class LightController:
                            "assuming this is an invalid path", endstation)
             return
 
+        if endstation in self._path_names:
+            self.beamlines[endstation] = [
+                list(path) for path in self._path_names[endstation]
+            ]
+            return
+
         paths = list()
         for branch in end_branches:
             # Find the paths from each source to the desired line
             for src in self.sources:
-                try:
-                    path_exists: bool = nx.has_path(self.graph, src, branch)
-                except NodeNotFound:
-                    logger.debug(f'Either source {src} or target {branch} '
-                                 'not found.')
-                    path_exists = False
-
-                if path_exists:
-                    found_paths = nx.all_simple_paths(self.graph,
-                                                      source=src,
-                                                      target=branch)
+                if self.index.has_path(src, branch):
+                    found_paths = self.index.paths(src, branch)
 
                     # Trim beamline based on z-positions
                     if isinstance(end_branches, dict):
@@ -205,12 +458,39 @@ class LightController:
                 else:
                     logger.debug(f'No path between {src} and {branch}')
 
-                self.beamlines[endstation] = paths
+        self.beamlines[endstation] = paths
+        self._path_names[endstation] = [list(path) for path in paths]
+        self._cache_stale = bool(self.cache_path)
+
+    def has_paths(self, endstation: str) -> bool:
+        """
+        Whether any source in the facility reaches the endstation.  Does not
+        enumerate the paths themselves
+
+        Parameters
+        ----------
+        endstation : str
+            name of endstation to check
+
+        Returns
+        -------
+        bool
+            if at least one path to the endstation exists
+        """
+        paths = self.beamlines.get(endstation)
+        if paths is not None:
+            return bool(paths)
+        if endstation in self._path_names:
+            return bool(self._path_names[endstation])
+
+        return any(self.index.has_path(src, branch)
+                   for branch in self.beamline_config.get(endstation, [])
+                   for src in self.sources)
 
     def get_paths(self, endstation: str) -> list[BeamPath]:
         """
         Returns the BeamPaths for a specified endstation.
-        Create and fill the BeamPaths if they have not been already
+        Find the paths and create the BeamPaths if they have not been already
 
         Parameters
         ----------
@@ -222,28 +502,21 @@ class LightController:
         List[BeamPath]
             a list of BeamPath's to the requested endstation
         """
-        # if path exists, return it
+        # find the paths on first request
         paths = self.beamlines[endstation]
+        if paths is None:
+            self.load_beamline(endstation)
+            self.save_cache()
+            paths = self.beamlines[endstation]
 
+        # if path exists, return it
         if all([isinstance(path, BeamPath) for path in paths]):
             return paths
 
-        # create the BeamPaths if they have not been already
-        # end_branches = self.beamline_config[endstation]
-        filled_paths = []
-        for path in paths:
-            subgraph = self.graph.subgraph(path)
-            devices = [self.get_device(dev_name)
-                       for dev_name, data in subgraph.nodes.data()
-                       if data['md'].res is not None]
-            bp = BeamPath(
-                *devices,
-                name=endstation,
-                minimum_transmission=self.min_trans
-            )
-
-            filled_paths.append(bp)
-
+        # create the BeamPaths if they have not been already, instantiating
+        # the devices of every path together
+        self.preload_devices({name for path in paths for name in path})
+        filled_paths = [self._beampath(path, endstation) for path in paths]
         self.beamlines[endstation] = filled_paths
         return filled_paths
 
@@ -262,13 +535,50 @@ class LightController:
         float
             z position of impediment
         """
-        return getattr(path.impediment, 'md.z', math.inf)
+        imped = path.impediment
+        return math.inf if imped is None else imped.md.z
+
+    def path_ranking(self, dest: str) -> PathRanking:
+        """
+        Return the ranking of the paths to the requested endstation.
+
+        The ranking is created on first request, subscribing to each path,
+        and is then kept up to date from their change events.
+
+        Parameters
+        ----------
+        dest : str
+            endstation to rank the paths towards
+
+        Returns
+        -------
+        PathRanking
+            ranking of the paths to the endstation
+
+        Raises
+        ------
+        PathError
+            If there are no paths to the endstation
+        """
+        paths = self.get_paths(dest)
+        if len(paths) == 0:
+            raise PathError('No paths in facility to the '
+                            f'desired endstation: {dest}')
+        ranking = self._rankings.get(dest)
+        if ranking is None:
+            ranking = self._rankings[dest] = PathRanking(paths)
+        elif not ranking.subscribed:
+            # device subscriptions of a shared path were cleared elsewhere
+            ranking.update()
+        return ranking
 
     def active_path(self, dest: str) -> BeamPath:
         """
         Return the most active path to the requested endstation
 
-        Looks for the path with the latest impediment (highest z)
+        Looks for the path with the latest impediment (highest z), and
+        between those the path delivering the most transmission.  The paths
+        are ranked as they change, see :meth:`.path_ranking`.
 
         Parameters
         ----------
@@ -281,15 +591,10 @@ class LightController:
             the active path
         """
         paths = self.get_paths(dest)
-        if len(paths) == 0:
-            raise PathError('No paths in facility to the '
-                            f'desired endstation: {dest}')
         if len(paths) == 1:
             return paths[0]
 
-        paths_by_length = sorted(paths, key=self.imped_z)
-
-        return paths_by_length[-1]
+        return self.path_ranking(dest).active
 
     @staticmethod
     def is_source_name(name: str) -> bool:
@@ -377,6 +682,35 @@ class LightController:
 
         return paths
 
+    def facility_snapshot(self) -> dict[str, list[PathSnapshot]]:
+        """
+        Read every device in the facility once, and evaluate the paths to
+        every endstation from those readings.
+
+        Devices are read in topological order of the facility graph.
+        Devices shared by many paths, e.g. those in the FEE, are read once
+        rather than once per path.
+
+        Returns
+        -------
+        Dict[str, List[PathSnapshot]]
+            mapping of endstation to a snapshot of each of its paths, in the
+            order of :meth:`.get_paths`
+        """
+        paths = {endstation: self.get_paths(endstation)
+                 for endstation in self.beamlines}
+        devices = {dev.name: dev for endstation_paths in paths.values()
+                   for path in endstation_paths for dev in path.devices}
+        readings = {}
+        for node in self.index.order:
+            dev = self.graph.nodes[node]['md'].dev
+            if dev is not None and devices.get(dev.name) is dev:
+                readings[dev.name] = find_device_state(dev)
+
+        return {endstation: [path.snapshot(readings=readings)
+                             for path in endstation_paths]
+                for endstation, endstation_paths in paths.items()}
+
     @property
     def destinations(self) -> list[Device]:
         """
@@ -387,19 +721,12 @@ class LightController:
         List[Device]
             a list of beam destinations
         """
-        def find_dest(path):
-            """ small closure to cache the impediment"""
-            imped = path.impediment
-            if imped is not None and imped not in path.branching_devices:
-                return imped
-
         dests = set()
-        for endstation in self.beamlines.keys():
-            paths = self.get_paths(endstation)
-            for path in paths:
-                dest = find_dest(path)
-                if dest is not None:
-                    dests.add(dest)
+        for endstation, snapshots in self.facility_snapshot().items():
+            for path, snapshot in zip(self.get_paths(endstation), snapshots):
+                imped = snapshot.impediment
+                if imped is not None and imped not in path.branching_devices:
+                    dests.add(imped)
 
         return list(dests)
 
@@ -426,11 +753,9 @@ class LightController:
             list of all incident devices in facility
         """
         devices = set()
-
-        for endstation in self.beamlines.keys():
-            paths = self.get_paths(endstation)
-            for path in paths:
-                devices.update(path.incident_devices)
+        for snapshots in self.facility_snapshot().values():
+            for snapshot in snapshots:
+                devices.update(snapshot.incident_devices)
 
         return list(devices)
 
@@ -438,6 +763,10 @@ class LightController:
         """
         Create all BeamPaths from the facility source to the requested device
 
+        A path through the same devices as one already in use, e.g. from
+        :meth:`.get_paths` or a previous call, is returned as the same
+        :class:`.BeamPath` object.
+
         Parameters
         ----------
         device : Device
@@ -455,35 +784,23 @@ class LightController:
         """
         paths = list()
         for src in self.sources:
-            if nx.has_path(self.graph, src, device.md.name):
-                found_paths = nx.all_simple_paths(self.graph, source=src,
-                                                  target=device.md.name)
-                paths.extend(found_paths)
+            if self.index.has_path(src, device.md.name):
+                paths.extend(self.index.paths(src, device.md.name))
             else:
                 logger.debug(f'No path between {src} and {device.md.name}')
 
         if not paths:
             raise PathError(f'No paths from sources to {device.md.name}')
 
-        subgraphs = [self.graph.subgraph(p) for p in paths]
-        beampaths = []
-        for subg in subgraphs:
-            devs = [data['md'].dev for _, data in subg.nodes.data()
-                    if data['md'].dev is not None]
-            beampaths.append(
-                BeamPath(
-                    *devs,
-                    name=f'{device.md.name}_path',
-                    minimum_transmission=self.min_trans
-                )
-            )
-
-        return beampaths
+        self.preload_devices({name for path in paths for name in path})
+        return [self._beampath(path, f'{device.md.name}_path')
+                for path in paths]
 
     def path_to(self, device: Device) -> BeamPath:
         """
         Returns the path with latest blocking device
-        (highest blocking z-position) to the requested device
+        (highest blocking z-position) to the requested device, breaking
+        ties by the transmission delivered
 
         To get all possible paths, see ``LightController.paths_to``
 
@@ -497,7 +814,10 @@ class LightController:
         BeamPath
             path to the specified device
         """
-        return sorted(self.paths_to(device), key=self.imped_z)[-1]
+        paths = self.paths_to(device)
+        ranked = [(PathRanking.rank_key(path.snapshot()), idx)
+                  for idx, path in enumerate(paths)]
+        return paths[max(ranked)[1]]
 
     @staticmethod
     def make_graph(
@@ -639,16 +959,60 @@ class LightController:
             return dev_data.dev
         elif dev_data.res is not None:
             # not instantiated yet, create and fill
+            dev_data.dev = load_device(dev_data.res)
+            return dev_data.dev
+
+    def preload_devices(
+        self,
+        device_names: Iterable[NodeName],
+        max_workers: Optional[int] = None
+    ) -> dict[NodeName, Device]:
+        """
+        Instantiate many devices in the facility concurrently.
+
+        Devices that fail to load are replaced with a mock device, as in
+        :meth:`.get_device`.  Names that are not in the facility or have no
+        associated device are ignored.
+
+        Parameters
+        ----------
+        device_names : Iterable[NodeName]
+            names of devices to instantiate
+
+        max_workers : int, optional
+            maximum number of threads to instantiate devices with.  Defaults
+            to the :class:`concurrent.futures.ThreadPoolExecutor` default
+
+        Returns
+        -------
+        Dict[NodeName, Device]
+            mapping of each requested device name to its device
+        """
+        devices = {}
+        pending = {}
+        for name in device_names:
             try:
-                dev = dev_data.res.get()
-                self.graph.nodes[device_name]['md'].dev = dev
-                return dev
-            except Exception:
-                logger.error(f'Device {device_name} failed to load, '
-                             'attempting to make a mock device')
-                dev = make_mock_device(dev_data.res)
-                self.graph.nodes[device_name]['md'].dev = dev
-                return dev
+                dev_data = self.graph.nodes[name]['md']
+            except KeyError:
+                logger.error(f'requested device ({name}) not in facility')
+                continue
+            if dev_data.dev is not None:
+                devices[name] = dev_data.dev
+            elif dev_data.res is not None:
+                pending[name] = dev_data
+
+        if len(pending) > 1:
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                loaded = executor.map(load_device,
+                                      [md.res for md in pending.values()])
+                # Store devices from this thread as they complete
+                for (name, dev_data), dev in zip(pending.items(), loaded):
+                    dev_data.dev = devices[name] = dev
+        else:
+            for name, dev_data in pending.items():
+                dev_data.dev = devices[name] = load_device(dev_data.res)
+
+        return devices
 
 
 def get_active_outputs(device: Device) -> list[str]:
@@ -672,6 +1036,29 @@ def get_active_outputs(device: Device) -> list[str]:
     return [br for br, trans in outputs.items() if trans > 0]
 
 
+def load_device(result: SearchResult) -> Device:
+    """
+    Instantiate the device for a happi result, falling back to a mock
+    device from :func:`make_mock_device` if it fails to load
+
+    Parameters
+    ----------
+    result : SearchResult
+        a happi.SearchResult for the device to load
+
+    Returns
+    -------
+    Device
+        the loaded device, or a mock version of the device
+    """
+    try:
+        return result.get()
+    except Exception:
+        logger.error(f'Device {result.metadata["name"]} failed to load, '
+                     'attempting to make a mock device')
+        return make_mock_device(result)
+
+
 def make_mock_device(result: SearchResult) -> Device:
     """
     Create a mock device that implements the Lightpath Interface using
@@ -0,0 +1,148 @@
+"""
+Reachability and path index over the facility graph
+
+The facility graph built by :meth:`.LightController.make_graph` is ordered by
+z and therefore acyclic.  Rather than searching the graph each time the paths
+to an endstation or device are needed, :class:`PathIndex` walks it once in
+topological order, storing the set of nodes that can reach each node.
+Reachability is then a set lookup, and path enumeration only ever steps onto
+nodes that lead to the target.  Enumerated paths are memoized per target, so
+paths sharing a tail are only walked once.
+
+Paths are returned in the same order as :func:`networkx.all_simple_paths`.
+"""
+from __future__ import annotations
+
+import logging
+from typing import Hashable
+
+import networkx as nx
+
+logger = logging.getLogger(__name__)
+
+NodeName = Hashable
+Path = tuple[NodeName, ...]
+
+
+class PathIndex:
+    """
+    Precomputed reachability and path lookups for a directed acyclic graph
+
+    The index describes the graph at the time it was built, and must be
+    rebuilt if the graph changes.  Graphs containing a cycle are searched
+    with :mod:`networkx` instead.
+
+    Parameters
+    ----------
+    graph : nx.DiGraph
+        Graph to index
+
+    Attributes
+    ----------
+    order : List[NodeName]
+        Nodes in topological order, or in graph order if there is a cycle
+    """
+    def __init__(self, graph: nx.DiGraph):
+        self.graph = graph
+        # nodes that can reach each node
+        self._ancestors: dict[NodeName, frozenset[NodeName]] = {}
+        # (node, target) -> paths from node to target
+        self._paths: dict[tuple[NodeName, NodeName], list[Path]] = {}
+        try:
+            self.order = list(nx.topological_sort(graph))
+        except nx.NetworkXUnfeasible:
+            logger.warning('Facility graph contains a cycle, paths will be '
+                           'found by searching the graph')
+            self.order = list(graph)
+            self.acyclic = False
+            return
+
+        self.acyclic = True
+        for node in self.order:
+            ancestors = set()
+            for pred in graph.predecessors(node):
+                ancestors.add(pred)
+                ancestors.update(self._ancestors[pred])
+            self._ancestors[node] = frozenset(ancestors)
+
+    def ancestors(self, node: NodeName) -> frozenset[NodeName]:
+        """
+        Nodes with a path to ``node``, empty if ``node`` is not in the graph
+        """
+        if not self.acyclic:
+            if node not in self.graph:
+                return frozenset()
+            return frozenset(nx.ancestors(self.graph, node))
+        return self._ancestors.get(node, frozenset())
+
+    def has_path(self, source: NodeName, target: NodeName) -> bool:
+        """
+        Whether ``target`` can be reached from ``source``
+
+        Parameters
+        ----------
+        source : NodeName
+            name of node to start from
+        target : NodeName
+            name of node to reach
+
+        Returns
+        -------
+        bool
+            if a path exists.  False if either node is not in the graph
+        """
+        if source not in self.graph or target not in self.graph:
+            return False
+        return source == target or source in self.ancestors(target)
+
+    def paths(self, source: NodeName, target: NodeName) -> list[list[NodeName]]:
+        """
+        All paths from ``source`` to ``target``
+
+        Parameters
+        ----------
+        source : NodeName
+            name of node to start from
+        target : NodeName
+            name of node to reach
+
+        Returns
+        -------
+        List[List[NodeName]]
+            paths as lists of node names, in the order
+            :func:`networkx.all_simple_paths` finds them
+        """
+        if not self.has_path(source, target) or source == target:
+            return []
+        if not self.acyclic:
+            return list(nx.all_simple_paths(self.graph, source=source,
+                                            target=target))
+        return [list(path) for path in self._find_paths(source, target)]
+
+    def _find_paths(self, source: NodeName, target: NodeName) -> list[Path]:
+        """Paths from ``source`` to ``target``, memoized by node"""
+        ancestors = self._ancestors[target]
+        # Walk depth first, only stepping onto nodes that reach the target.
+        # Paths from a node are complete once all of its successors are done
+        stack = [(source, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if (node, target) in self._paths:
+                continue
+            succs = [succ for succ in self.graph.successors(node)
+                     if succ == target or succ in ancestors]
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((succ, False) for succ in reversed(succs)
+                             if succ != target)
+                continue
+            paths = []
+            for succ in succs:
+                if succ == target:
+                    paths.append((node, target))
+                else:
+                    paths.extend((node,) + tail
+                                 for tail in self._paths[(succ, target)])
+            self._paths[(node, target)] = paths
+
+        return self._paths[(source, target)]
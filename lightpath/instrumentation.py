@@ -0,0 +1,201 @@
+"""
+Timing of the hot paths of lightpath
+
+Functions decorated with :func:`timed` record their call count and latency
+in :data:`timings` while it is enabled, and otherwise cost a single
+attribute check per call.  Timing is disabled by default, and is turned on
+with the ``LIGHTPATH_TIMINGS`` environment variable, ``lightpath
+--timings``, or for a block of code with :func:`instrumented`::
+
+    with instrumented() as timings:
+        controller.active_path('XCS').blocking_devices
+    print(timings.format_report())
+
+The GUI logs the same report with ``Ctrl+Shift+T``.
+"""
+from __future__ import annotations
+
+import contextlib
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from collections.abc import Generator
+from pathlib import Path
+from typing import Any, Callable, Optional, TextIO, TypeVar, Union
+
+import numpy as np
+
+ENV_VAR = 'LIGHTPATH_TIMINGS'
+# Latest samples of each timer used for percentiles
+MAX_SAMPLES = 10000
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+
+class TimerStats:
+    """Call count and latency of one timer, in seconds"""
+    def __init__(self, max_samples: int = MAX_SAMPLES):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: deque[float] = deque(maxlen=max_samples)
+
+    def add(self, duration: float) -> None:
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.samples.append(duration)
+
+    def summary(self) -> dict[str, Any]:
+        """
+        Call count, total and mean latency, and the median, 95th and 99th
+        percentile of the latest samples
+        """
+        p50, p95, p99 = np.percentile(np.asarray(self.samples), [50, 95, 99])
+        return {'count': self.count,
+                'total': self.total,
+                'mean': self.total / self.count,
+                'p50': float(p50),
+                'p95': float(p95),
+                'p99': float(p99),
+                'max': self.max}
+
+
+class Timings:
+    """
+    Registry of timers, keyed by name
+
+    Parameters
+    ----------
+    enabled : bool, optional
+        record timings from the start
+    """
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._stats: dict[str, TimerStats] = {}
+
+    def record(self, name: str, duration: float) -> None:
+        """Add a duration in seconds to the timer of ``name``"""
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = TimerStats()
+            stats.add(duration)
+
+    def clear(self) -> None:
+        """Forget all recorded timings"""
+        with self._lock:
+            self._stats.clear()
+
+    def report(self) -> dict[str, dict[str, Any]]:
+        """
+        Summary of each timer that has recorded a call
+
+        Returns
+        -------
+        Dict[str, Dict[str, Any]]
+            JSON-serializable :meth:`TimerStats.summary` of each timer, by
+            name
+        """
+        with self._lock:
+            return {name: stats.summary()
+                    for name, stats in sorted(self._stats.items())}
+
+    def format_report(self) -> str:
+        """Report as a table, with latencies in milliseconds"""
+        lines = [f"{'timer':<32} {'count':>8} {'total':>10} {'mean':>8} "
+                 f"{'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"]
+        for name, stats in self.report().items():
+            ms = {key: value * 1e3 for key, value in stats.items()
+                  if key != 'count'}
+            lines.append(f"{name:<32} {stats['count']:>8} "
+                         f"{ms['total']:>10.2f} {ms['mean']:>8.3f} "
+                         f"{ms['p50']:>8.3f} {ms['p95']:>8.3f} "
+                         f"{ms['p99']:>8.3f} {ms['max']:>8.3f}")
+        return '\n'.join(lines)
+
+    def dump(self, output: Optional[Union[str, Path, TextIO]] = None) -> None:
+        """
+        Write the report as JSON
+
+        Parameters
+        ----------
+        output : Union[str, Path, TextIO], optional
+            file or stream to write to, by default standard output
+        """
+        output = sys.stdout if output is None else output
+        if isinstance(output, (str, Path)):
+            with open(output, 'w') as f:
+                json.dump(self.report(), f, indent=2)
+        else:
+            json.dump(self.report(), output, indent=2)
+            output.write('\n')
+
+
+#: Timings recorded by :func:`timed` and :func:`timer`
+timings = Timings(enabled=os.environ.get(ENV_VAR, '') not in ('', '0'))
+
+
+def timed(name: Optional[str] = None) -> Callable[[F], F]:
+    """
+    Decorate a function to record its latency in :data:`timings`
+
+    Parameters
+    ----------
+    name : str, optional
+        name of the timer, by default the qualified name of the function
+    """
+    def decorator(func: F) -> F:
+        timer_name = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not timings.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.record(timer_name, time.perf_counter() - start)
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+@contextlib.contextmanager
+def timer(name: str) -> Generator[None, None, None]:
+    """Record the latency of a block of code in :data:`timings`"""
+    if not timings.enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.record(name, time.perf_counter() - start)
+
+
+@contextlib.contextmanager
+def instrumented(clear: bool = True) -> Generator[Timings, None, None]:
+    """
+    Enable :data:`timings` for a block of code
+
+    Parameters
+    ----------
+    clear : bool, optional
+        forget timings recorded before the block
+    """
+    if clear:
+        timings.clear()
+    enabled = timings.enabled
+    timings.enabled = True
+    try:
+        yield timings
+    finally:
+        timings.enabled = enabled
@@ -1,15 +1,19 @@
 import argparse
+import contextlib
+import json
 import logging
+import time
 from pathlib import Path
-from typing import Optional, Union, overload
+from typing import TYPE_CHECKING, Optional, Union, overload
 
 import coloredlogs
 import happi
 import yaml
-from qtpy.QtWidgets import QApplication
 
 import lightpath
-from lightpath.ui import LightApp
+
+if TYPE_CHECKING:
+    from lightpath.ui import LightApp
 
 logger = logging.getLogger('lightpath')
 qapp = None
@@ -17,6 +21,17 @@ qapp = None
 
 def create_arg_parser():
     parser = argparse.ArgumentParser(description='Launch the Lightpath UI')
+    parser.add_argument('command', nargs='?',
+                        choices=['serve', 'benchmark', 'synthetic', 'record',
+                                 'replay'],
+                        help=('Run headless instead of opening the UI. '
+                              '"serve" serves the beam status as JSON over '
+                              'HTTP, "benchmark" times the controller on '
+                              'synthetic facilities, "synthetic" writes '
+                              'a synthetic facility database and config, '
+                              '"record" logs device state updates until '
+                              'interrupted and "replay" feeds a log into '
+                              'the mock devices of the database'))
     parser.add_argument('--db', dest='db', type=str,
                         help=('Path to device configuration. '
                               'Takes local happi config by default'))
@@ -30,11 +45,48 @@ def create_arg_parser():
                         help='Show the DEBUG logging stream')
     parser.add_argument('--cfg', required=False, default=None,
                         help='Configuration yaml file')
+    parser.add_argument('--cache', dest='cache', default=None,
+                        help=('File to cache the facility graph in, reused '
+                              'while the happi database is unchanged'))
+    parser.add_argument('--host', dest='host', default='127.0.0.1',
+                        help='Address for lightpath serve to listen on')
+    parser.add_argument('--port', dest='port', type=int, default=8000,
+                        help='Port for lightpath serve to listen on')
+    parser.add_argument('--devices', dest='devices', type=int, nargs='+',
+                        default=[500],
+                        help=('Number of devices in each facility '
+                              'lightpath benchmark or synthetic lays out'))
+    parser.add_argument('--branching', dest='branching', type=int, default=2,
+                        help=('Output branches of each branching device in '
+                              'synthetic facilities'))
+    parser.add_argument('--sources', dest='sources', type=int, default=1,
+                        help='Source branches of synthetic facilities')
+    parser.add_argument('--depth', dest='depth', type=int, default=1,
+                        help=('Levels of branching below each source in '
+                              'synthetic facilities'))
+    parser.add_argument('--repeat', dest='repeat', type=int, default=3,
+                        help='Times lightpath benchmark runs each step')
+    parser.add_argument('--output', dest='output', default=None,
+                        help=('JSON file for lightpath benchmark results, '
+                              'standard output by default, or for the '
+                              'lightpath synthetic database.  The synthetic '
+                              'config is written next to it.  Log file of '
+                              'lightpath record and replay'))
+    parser.add_argument('--speed', dest='speed', type=float, default=1.0,
+                        help=('Factor lightpath replay speeds up the log '
+                              'by, "inf" for as fast as possible'))
+    parser.add_argument('--timings', dest='timings', nargs='?', const='-',
+                        default=None,
+                        help=('Record the latency of lightpath hot paths, '
+                              'and write it as JSON on exit to this file, '
+                              'or standard output if none is given'))
     return parser
 
 
 def get_qapp():
     """Returns the global QApplication, creating it if necessary."""
+    from qtpy.QtWidgets import QApplication
+
     global qapp
     if qapp is None:
         if QApplication.instance() is None:
@@ -46,21 +98,57 @@ def get_qapp():
     return qapp
 
 
+def load_controller(
+    db: Optional[Union[str, Path]],
+    hutches: Optional[list[str]],
+    cfg: Union[str, Path],
+    cache: Optional[Union[str, Path]] = None,
+) -> lightpath.LightController:
+    """
+    Create the LightController for a list of hutches or a configuration
+    file.  See :func:`main` for a description of the parameters.
+    """
+    if cfg:
+        logger.info(f'reading config from: {cfg}...')
+        with open(cfg) as f:
+            conf = yaml.safe_load(f)
+    else:
+        conf = {}
+
+    timeout = float(conf.get('timeout', 10))  # timeout (s)
+    from ophyd.signal import EpicsSignalBase
+    EpicsSignalBase.set_defaults(timeout=timeout,
+                                 connection_timeout=timeout)
+
+    db_path = db or conf.get('db')
+    if db_path:
+        client = happi.Client(path=db_path)
+    else:
+        client = happi.Client.from_config()
+
+    hutches = hutches or conf.get('hutches')
+    if cache:
+        conf['cache'] = str(cache)
+
+    return lightpath.LightController(client, endstations=hutches, cfg=conf)
+
+
 @overload
-def main(db: Union[str, Path], hutches: list[str]) -> LightApp:
+def main(db: Union[str, Path], hutches: list[str]) -> 'LightApp':
     ...
 
 
 @overload
-def main(cfg: Union[str, Path]) -> LightApp:
+def main(cfg: Union[str, Path]) -> 'LightApp':
     ...
 
 
 def main(
     db: Optional[Union[str, Path]],
     hutches: Optional[list[str]],
-    cfg: Union[str, Path]
-) -> LightApp:
+    cfg: Union[str, Path],
+    cache: Optional[Union[str, Path]] = None,
+) -> 'LightApp':
     """
     Open the lightpath user interface by specifying a list of hutches
     to load or a configuration file.
@@ -75,32 +163,17 @@ def main(
 
     cfg : Union[str, Path]
         Path to lightpath config file
-    """
-    if cfg:
-        logger.info(f'reading config from: {cfg}...')
-        with open(cfg) as f:
-            conf = yaml.safe_load(f)
-    else:
-        conf = {}
 
-    timeout = float(conf.get('timeout', 10))  # timeout (s)
-    from ophyd.signal import EpicsSignalBase
-    EpicsSignalBase.set_defaults(timeout=timeout,
-                                 connection_timeout=timeout)
-
-    db_path = db or conf.get('db')
-    if db_path:
-        client = happi.Client(path=db_path)
-    else:
-        client = happi.Client.from_config()
-
-    hutches = hutches or conf.get('hutches')
+    cache : Union[str, Path], optional
+        Path to facility cache file, overrides the config file
+    """
+    from lightpath.ui import LightApp
 
     logger.info("Launching LCLS Lightpath ...")
     # Create PyDM Application
     app = get_qapp()
     # Create Lightpath UI from provided database
-    lc = lightpath.LightController(client, endstations=hutches, cfg=conf)
+    lc = load_controller(db, hutches, cfg, cache=cache)
     lp = LightApp(lc)
     # Execute
     lp.show()
@@ -128,4 +201,64 @@ def entrypoint():
     level = 'DEBUG' if args.debug else 'INFO'
     coloredlogs.install(level=level, logger=logger,
                         fmt='[%(asctime)s] - %(levelname)s -  %(message)s')
-    return main(args.db, hutches, args.cfg)
+    if args.timings is None:
+        return run_command(args, hutches)
+
+    from lightpath.instrumentation import instrumented
+    with instrumented() as timings:
+        try:
+            return run_command(args, hutches)
+        finally:
+            timings.dump(None if args.timings == '-' else args.timings)
+
+
+def run_command(args: argparse.Namespace, hutches: Optional[list[str]]):
+    """Run the command requested on the command line, or open the UI"""
+    if args.command == 'benchmark':
+        from lightpath.benchmark import run_benchmarks, write_results
+        logger.info("Running LCLS Lightpath benchmarks ...")
+        results = run_benchmarks(sizes=args.devices, branching=args.branching,
+                                 repeat=args.repeat, n_sources=args.sources,
+                                 depth=args.depth)
+        return write_results(results, args.output)
+    if args.command == 'synthetic':
+        from lightpath.synthetic import make_facility, write_facility
+        db, cfg = make_facility(n_devices=args.devices[0],
+                                branching=args.branching,
+                                n_sources=args.sources, depth=args.depth,
+                                merge=0.1, dangling=0.05)
+        path = write_facility(args.output or 'facility.json', db, cfg=cfg)
+        logger.info("Wrote %d devices to %s", len(db), path)
+        return
+    if args.command == 'record':
+        from lightpath.recording import StateRecorder
+        lc = load_controller(args.db, hutches, args.cfg, cache=args.cache)
+        recorder = StateRecorder.from_controller(
+            lc, args.output or 'lightpath.lplog'
+        )
+        logger.info("Recording %d devices to %s, interrupt to stop ...",
+                    len(recorder.devices), recorder.path)
+        with recorder:
+            with contextlib.suppress(KeyboardInterrupt):
+                while True:
+                    time.sleep(1)
+                    recorder.flush()
+        logger.info("Recorded %d updates", recorder.records_written)
+        return
+    if args.command == 'replay':
+        from lightpath.recording import replay
+        lc = load_controller(args.db, hutches, args.cfg, cache=args.cache)
+        devices = lc.preload_devices(lc.graph.nodes).values()
+        paths = [path for endstation in lc.beamlines
+                 if lc.has_paths(endstation)
+                 for path in lc.get_paths(endstation)]
+        storm = replay(args.output or 'lightpath.lplog', devices,
+                       speed=args.speed, paths=paths)
+        print(json.dumps(storm.summary(), indent=2))
+        return
+    if args.command == 'serve':
+        from lightpath.server import serve
+        logger.info("Launching LCLS Lightpath server ...")
+        lc = load_controller(args.db, hutches, args.cfg, cache=args.cache)
+        return serve(lc, host=args.host, port=args.port)
+    return main(args.db, hutches, args.cfg, cache=args.cache)
@@ -354,6 +354,12 @@ class SummarySignal(AggregateSignal):
 
         return cid
 
+    def wait_for_connection(self, *args, **kwargs):
+        super().wait_for_connection(*args, **kwargs)
+        # As in subscribe, meta callbacks need to be run again
+        for sig in self._signals:
+            sig._run_metadata_callbacks()
+
 
 class Status:
     """
@@ -15,14 +15,22 @@ secretly affecting the beam.
 """
 from __future__ import annotations
 
+import asyncio
 import enum
+import functools
+import itertools
 import logging
 import math
+import threading
+import time
+import weakref
 from collections import OrderedDict
-from collections.abc import Iterable
-from dataclasses import dataclass
+from collections.abc import AsyncIterator, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from typing import Callable, TextIO
 
+import numpy as np
 from ophyd import Device, DeviceStatus
 from ophyd.ophydobj import OphydObject
 from ophyd.status import wait as status_wait
@@ -30,6 +38,7 @@ from ophyd.utils import DisconnectedError
 from prettytable import PrettyTable
 
 from .errors import CoordinateError, PathError
+from .instrumentation import timed
 
 logger = logging.getLogger(__name__)
 # non-string sentinel for beginning of path
@@ -95,12 +104,19 @@ class DeviceState(enum.IntEnum):
     Error = 5
 
 
+# States that can not be evaluated further, the device blocks the beam
+_SHORT_CIRCUIT = (DeviceState.Error, DeviceState.Unknown,
+                  DeviceState.Disconnected)
+
+
+@timed()
 def find_device_state(device: Device) -> tuple[DeviceState, LightpathState]:
     """
     Report the state of a device
 
     The device must implement ``get_lightpath_state``, which returns a
-    ``LightpathState`` object.
+    ``LightpathState`` object.  Readings are served from :data:`state_cache`
+    where it holds a valid entry for the device.
 
     Parameters
     ----------
@@ -113,6 +129,14 @@ def find_device_state(device: Device) -> tuple[DeviceState, LightpathState]:
         DeviceState enum
         LightpathState dataclass
     """
+    return state_cache.get(device)
+
+
+@timed()
+def _read_device_state(
+    device: Device
+) -> tuple[DeviceState, LightpathState | None]:
+    """Read the state of a device from the control system"""
     # Gather device information
     try:
         if not device.lightpath_summary.connected:
@@ -149,6 +173,412 @@ def find_device_state(device: Device) -> tuple[DeviceState, LightpathState]:
         return DeviceState.Unknown, state
 
 
+class DeviceStateCache:
+    """
+    Cache of the ``(DeviceState, LightpathState)`` of each device, as
+    reported by :func:`.find_device_state`
+
+    Entries for watched devices stay valid until the ``lightpath_summary``
+    of the device reports a new value or a change in connection.  Devices
+    are watched while a :class:`.BeamPath` containing them is subscribed to.
+    Entries for devices that are not watched are only kept for ``ttl``
+    seconds, and are not kept at all by default.
+
+    Parameters
+    ----------
+    ttl : float, optional
+        Seconds to keep the state of a device that is not watched
+    """
+    def __init__(self, ttl: float | None = None):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        # device -> (reading, time read)
+        self._entries: weakref.WeakKeyDictionary[
+            Device, tuple[tuple[DeviceState, LightpathState | None], float]
+        ] = weakref.WeakKeyDictionary()
+        # device -> number of invalidations, readings taken across one are
+        # not stored
+        self._generations: weakref.WeakKeyDictionary[Device, int] = (
+            weakref.WeakKeyDictionary()
+        )
+        # device -> (number of watchers, subscription ids)
+        self._watched: weakref.WeakKeyDictionary[
+            Device, tuple[int, list[int]]
+        ] = weakref.WeakKeyDictionary()
+
+    def get(self, device: Device) -> tuple[DeviceState, LightpathState | None]:
+        """
+        State of a device, read from the control system only if there is no
+        valid entry for it
+
+        Parameters
+        ----------
+        device : Device
+            ophyd Device implementing the Lightpath interface
+
+        Returns
+        -------
+        Tuple[DeviceState, LightpathState]
+            the state of the device, as in :func:`.find_device_state`
+        """
+        with self._lock:
+            watched = device in self._watched
+            entry = self._entries.get(device)
+            if entry is not None:
+                reading, read_at = entry
+                if watched or (self.ttl is not None
+                               and time.monotonic() - read_at < self.ttl):
+                    return reading
+            generation = self._generations.get(device, 0)
+
+        # Devices are read outside of the lock
+        read_at = time.monotonic()
+        reading = _read_device_state(device)
+        with self._lock:
+            if ((device in self._watched or self.ttl is not None)
+                    and self._generations.get(device, 0) == generation):
+                self._entries[device] = (reading, read_at)
+        return reading
+
+    def invalidate(self, device: Device) -> None:
+        """Drop the entry for a device, it is read again on the next request"""
+        with self._lock:
+            self._entries.pop(device, None)
+            self._generations[device] = self._generations.get(device, 0) + 1
+
+    def clear(self) -> None:
+        """Drop the entries for every device"""
+        with self._lock:
+            for device in list(self._entries):
+                self._generations[device] = (
+                    self._generations.get(device, 0) + 1
+                )
+            self._entries.clear()
+
+    def watch(self, device: Device) -> None:
+        """
+        Keep the entry for a device until its ``lightpath_summary`` changes.
+        Calls are counted, the device is watched until :meth:`.unwatch` is
+        called as many times.
+        """
+        with self._lock:
+            count, cids = self._watched.get(device, (0, []))
+            self._watched[device] = (count + 1, cids)
+            if count:
+                return
+        try:
+            summary = device.lightpath_summary
+            cids.extend([
+                summary.subscribe(self._summary_changed, run=False),
+                summary.subscribe(self._summary_changed,
+                                  event_type=summary.SUB_META, run=False),
+            ])
+        except Exception:
+            logger.error("State cache is unable to subscribe to device %s",
+                         device.name)
+            # Without callbacks, entries would never be refreshed
+            with self._lock:
+                self._watched.pop(device, None)
+            for cid in cids:
+                device.lightpath_summary.unsubscribe(cid)
+        # Entries taken before watching may be out of date
+        self.invalidate(device)
+
+    def unwatch(self, device: Device) -> None:
+        """Stop watching a device, undoing one call of :meth:`.watch`"""
+        with self._lock:
+            count, cids = self._watched.get(device, (0, []))
+            if count > 1:
+                self._watched[device] = (count - 1, cids)
+                return
+            self._watched.pop(device, None)
+        for cid in cids:
+            device.lightpath_summary.unsubscribe(cid)
+        self.invalidate(device)
+
+    def _summary_changed(self, *args, obj=None, **kwargs) -> None:
+        device = getattr(obj, 'parent', None)
+        if device is not None:
+            self.invalidate(device)
+
+
+#: Cache used by :func:`.find_device_state`
+state_cache = DeviceStateCache()
+
+
+def connect_devices(
+    devices: Iterable[Device],
+    timeout: float = 1.0
+) -> dict[str, bool]:
+    """
+    Connect the ``lightpath_summary`` signals of many devices at once, see
+    :meth:`.BeamPath.connect_all`
+
+    Returns
+    -------
+    Dict[str, bool]
+        mapping of each device name to whether it connected
+    """
+    devices = list(devices)
+    deadline = time.monotonic() + timeout
+
+    def connect(device: Device) -> bool:
+        try:
+            summary = device.lightpath_summary
+            # Starts the subscriptions to the constituent signals
+            summary.wait_for_connection(
+                timeout=max(deadline - time.monotonic(), 0)
+            )
+            # Connection completes as their callbacks arrive
+            while (not summary.connected
+                   and time.monotonic() < deadline):
+                time.sleep(0.01)
+            return summary.connected
+        except Exception as exc:
+            logger.debug('%s did not connect: %s', device.name, exc)
+            return False
+
+    if not devices:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(devices)) as executor:
+        connected = list(executor.map(connect, devices))
+    return {device.name: ok for device, ok in zip(devices, connected)}
+
+
+@dataclass
+class PathSnapshot:
+    """
+    A consistent reading of every device along a :class:`.BeamPath`
+
+    The state of each device is read exactly once when the snapshot is taken,
+    and the path-level quantities (blocking devices, impediment, incident
+    devices, transmission and beam indicators) are all derived from those
+    readings.  Use :meth:`.BeamPath.snapshot` to create one.
+
+    Attributes
+    ----------
+    devices : List[Device]
+        Devices along the path, ordered by z
+
+    states : List[DeviceState]
+        State of each device
+
+    lightpath_states : List[Optional[LightpathState]]
+        Lightpath state reported by each device, None if it could not be read
+
+    outputs : List[Tuple[str, float]]
+        Output branch along this path and transmission for each device
+
+    transmissions : List[float]
+        Beam transmission delivered past each device.  Devices that can not
+        report a state, or do not output onto this path, deliver none
+
+    blocking_devices : List[Device]
+        Devices that are inserted or in unknown positions, see
+        :attr:`.BeamPath.blocking_devices`
+    """
+    devices: list[Device]
+    states: list[DeviceState]
+    lightpath_states: list[LightpathState | None]
+    outputs: list[tuple[str, float]]
+    transmissions: list[float]
+    blocking_devices: list[Device]
+    # array views of the device positions and state codes, in path order
+    _z: np.ndarray = field(default=None, repr=False, compare=False)
+    _codes: np.ndarray = field(default=None, repr=False, compare=False)
+    _index: dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self._index = {dev.name: i for i, dev in enumerate(self.devices)}
+        if self._z is None:
+            self._z = np.array([dev.md.z for dev in self.devices],
+                               dtype=float)
+        if self._codes is None:
+            self._codes = np.array(self.states, dtype=np.int8)
+
+    @property
+    def readings(self) -> list[tuple[DeviceState, LightpathState | None]]:
+        """ List[Tuple[DeviceState, LightpathState]]: Raw device readings """
+        return list(zip(self.states, self.lightpath_states))
+
+    @property
+    def impediment(self) -> Device | None:
+        """ Device: First blocking device along the path """
+        if not self.blocking_devices:
+            return None
+        return self.blocking_devices[0]
+
+    @property
+    def cleared(self) -> bool:
+        """ bool: Whether the path is clear of impediments """
+        return not any(self.blocking_devices)
+
+    @property
+    def incident_devices(self) -> list[Device]:
+        """
+        List[Device]: Inserted devices at or upstream of the impediment
+        """
+        incident = self._codes == DeviceState.Inserted
+        impediment = self.impediment
+        if impediment is not None:
+            incident &= self._z <= impediment.md.z
+        return [self.devices[i] for i in np.flatnonzero(incident)]
+
+    @property
+    def lit(self) -> list[bool]:
+        """ List[bool]: Whether beam reaches each device """
+        impediment = self.impediment
+        if impediment is None:
+            return [True] * len(self.devices)
+        return (self._z <= impediment.md.z).tolist()
+
+    def __contains__(self, device: Device) -> bool:
+        idx = self._index.get(getattr(device, 'name', None))
+        return idx is not None and self.devices[idx] is device
+
+    def index(self, device: Device) -> int:
+        """Position of ``device`` within the snapshot"""
+        return self._index[device.name]
+
+    def state_of(self, device: Device) -> DeviceState:
+        """The :class:`.DeviceState` read for ``device``"""
+        return self.states[self.index(device)]
+
+    def beam_indicators(self, device: Device) -> tuple[bool, bool]:
+        """
+        Whether the beam reaches ``device``, and whether it continues past
+
+        Returns
+        -------
+        Tuple[bool, bool]
+            incoming and outgoing beam indicators
+        """
+        impediment = self.impediment
+        if impediment is None or device.md.z <= impediment.md.z:
+            return True, device is not impediment
+        return False, False
+
+
+@dataclass
+class PathEvent:
+    """
+    A change in the impediment or transmission along a :class:`.BeamPath`,
+    as yielded by :meth:`.BeamPath.watch`
+
+    Attributes
+    ----------
+    path : BeamPath
+        The path that changed
+
+    devices : Set[Device]
+        Devices whose movement caused the change
+
+    snapshot : PathSnapshot
+        State of the path after the change
+    """
+    path: BeamPath
+    devices: set[Device]
+    snapshot: PathSnapshot
+
+    @property
+    def impediment(self) -> Device | None:
+        """First blocking device along the path"""
+        return self.snapshot.impediment
+
+    @property
+    def transmission(self) -> float:
+        """Transmission delivered to the end of the path"""
+        return self.snapshot.transmissions[-1]
+
+
+class _CoalescedCallback:
+    """
+    Collect a burst of path change events into a single callback
+
+    The first event starts a timer of length ``window``.  Events arriving
+    before it expires are merged, and the callback is run once with the
+    keyword arguments of the latest event plus ``devices``, the set of
+    devices that moved during the window.
+    """
+    def __init__(self, cb: Callable, window: float):
+        self.cb = cb
+        self.window = window
+        self._lock = threading.Lock()
+        self._timer = None
+        self._devices = set()
+        self._kwargs = {}
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            device = kwargs.get('device')
+            if device is not None:
+                # path events report the lightpath_summary signal
+                parent = getattr(device, 'parent', None)
+                self._devices.add(device if parent is None else parent)
+            self._kwargs = kwargs
+            if self._timer is None:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Run the callback with the events collected so far"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            kwargs, devices = self._kwargs, self._devices
+            self._kwargs, self._devices = {}, set()
+        if not kwargs:
+            return
+        try:
+            self.cb(**kwargs, devices=devices)
+        except Exception:
+            logger.exception("Coalesced path callback %r failed", self.cb)
+
+    def cancel(self):
+        """Drop any pending events"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._kwargs, self._devices = {}, set()
+
+    def __eq__(self, other):
+        # Allow OphydObject.clear_sub to find us using the original callback
+        return other is self or other == self.cb
+
+    __hash__ = object.__hash__
+
+
+class _PathLayout:
+    """
+    Fixed properties of the devices along a path, stored as arrays
+
+    Each branch that is an input of some device on the path is given a bit,
+    so whether a device accepts the branch another device outputs onto is a
+    single bitwise and.  Branches no device accepts are given no bit.
+    """
+    def __init__(self, devices: list[Device]):
+        self.devices = devices
+        self.z = np.array([dev.md.z for dev in devices], dtype=float)
+        branches = sorted({br for dev in devices for br in dev.input_branches})
+        # Python integers hold masks for any number of branches
+        dtype = np.int64 if len(branches) < 63 else object
+        self.branch_bits = {br: 1 << i for i, br in enumerate(branches)}
+        self.input_masks = np.array(
+            [sum(self.branch_bits[br] for br in set(dev.input_branches))
+             for dev in devices],
+            dtype=dtype
+        )
+        self.positions = np.arange(len(devices))
+
+    def branch_masks(self, branches: list[str]) -> np.ndarray:
+        """Bitmask of each output branch, zero if no device accepts it"""
+        return np.array([self.branch_bits.get(br, 0) for br in branches],
+                        dtype=self.input_masks.dtype)
+
+
 class BeamPath(OphydObject):
     """
     Represents a straight line of devices along the beamline
@@ -197,6 +627,14 @@ class BeamPath(OphydObject):
             raise ValueError('BeamPath must have at least one device')
 
         self._has_subscribed = False
+        self._last_snapshot = None
+        self._snapshot_lock = threading.RLock()
+        # order in which devices are read, for keeping the latest readings
+        self._snapshot_reads = itertools.count(1)
+        # read the cached snapshot was taken with, and since applied to it
+        self._snapshot_read = 0
+        self._device_reads: dict[str, int] = {}
+        self._coalesced = []
         self.branch_list = set()
         logger.debug("Configuring path %s with %s devices",
                      name, len(self.devices))
@@ -206,6 +644,7 @@ class BeamPath(OphydObject):
         self._next_device = OrderedDict({NOT_A_DEVICE: sorted_devs[0]})
         self._next_device.update({sorted_devs[i].name: sorted_devs[i+1]
                                   for i in range(len(sorted_devs) - 1)})
+        self._path = list(self._next_device.values())
 
         # Sort by position downstream to upstream
         try:
@@ -227,6 +666,8 @@ class BeamPath(OphydObject):
             raise TypeError('One of the devices does not meet the '
                             'neccesary lightpath interface. Missing '
                             'attribute {}'.format(e))
+        # Positions and branches of the devices, for evaluating the path
+        self._path_layout = _PathLayout(self._path)
 
     @property
     def branching_devices(self) -> list[Device]:
@@ -242,9 +683,14 @@ class BeamPath(OphydObject):
     @property
     def path(self) -> list[Device]:
         """ List[Device]: List of devices ordered by coordinates """
-        return list(self._next_device.values())
+        return list(self._path)
 
-    def get_device_output(self, dev: Device) -> tuple[str, float]:
+    @timed()
+    def get_device_output(
+        self,
+        dev: Device,
+        state: LightpathState | None = None
+    ) -> tuple[str, float]:
         """
         Find relevant output item by attempting to match with the
         input branch of the next device in this path.
@@ -253,8 +699,14 @@ class BeamPath(OphydObject):
         ----------
         dev : Device
             device in this path to get output from
+
+        state : LightpathState, optional
+            previously read state of the device.  If not provided the
+            device will be asked for its current state
         """
-        output = dev.get_lightpath_state().output
+        if state is None:
+            state = dev.get_lightpath_state()
+        output = state.output
 
         # get next device input branch
         next_dev = self._next_device.get(dev.name, None)
@@ -278,7 +730,188 @@ class BeamPath(OphydObject):
 
         return output_keys[0], output[output_keys[0]]
 
+    def snapshot(
+        self,
+        readings: dict[str, tuple[DeviceState, LightpathState | None]]
+        | None = None,
+    ) -> PathSnapshot:
+        """
+        Read the state of every device along the path once, and evaluate
+        the path from those readings
+
+        Parameters
+        ----------
+        readings : Dict[str, Tuple[DeviceState, LightpathState]], optional
+            Readings already taken with :func:`.find_device_state`, keyed by
+            device name.  Only devices missing from it are read
+
+        Returns
+        -------
+        PathSnapshot
+            the current state of the path
+        """
+        devices = self.path
+        readings = readings or {}
+        return self._evaluate(devices, [
+            readings[device.name] if device.name in readings
+            else find_device_state(device)
+            for device in devices
+        ])
+
+    def _evaluate(
+        self,
+        devices: list[Device],
+        readings: list[tuple[DeviceState, LightpathState | None]],
+        start: int = 0,
+        previous: PathSnapshot | None = None,
+    ) -> PathSnapshot:
+        """
+        Evaluate the path from the provided device readings
+
+        The output of each device onto the path is found from its reading,
+        after which the path is evaluated as a whole over arrays: the
+        transmission delivered past each device is the cumulative product of
+        the transmissions of the inserted devices, and the blocking devices
+        are found from masks of the device states.
+
+        If a ``previous`` snapshot is provided, the outputs of the devices
+        upstream of ``start`` are reused.
+        """
+        layout = self._layout(devices)
+        n_dev = len(devices)
+        if previous is not None and start > 0:
+            outputs = previous.outputs[:start]
+        else:
+            start = 0
+            outputs = list()
+
+        for device, (curr_state, curr_status) in zip(devices[start:],
+                                                     readings[start:]):
+            if curr_state in _SHORT_CIRCUIT:
+                outputs.append(('', 0))
+            else:
+                outputs.append(self.get_device_output(device,
+                                                      state=curr_status))
+
+        states = [state for state, _ in readings]
+        codes = np.array(states, dtype=np.int8)
+        branches = [branch for branch, _ in outputs]
+        dev_trans = np.array([trans for _, trans in outputs], dtype=float)
+        idx = layout.positions
+
+        # devices that can not be evaluated block and deliver no beam
+        short = np.isin(codes, _SHORT_CIRCUIT)
+        on_path = ~short & np.array([br != '' for br in branches], dtype=bool)
+        # previous device that could be evaluated, -1 if there is none
+        prev = np.maximum.accumulate(np.where(short, -1, idx))
+        prev = np.concatenate(([-1], prev[:-1]))
+        has_prev = prev >= 0
+        # e.g. mirror not pointing to current device
+        prev_masks = layout.branch_masks(branches)[prev]
+        mismatch = (on_path & has_prev
+                    & ((prev_masks & layout.input_masks) == 0))
+        inserted = on_path & ~mismatch & (codes == DeviceState.Inserted)
+        for i in np.flatnonzero(inserted & (dev_trans > 1)):
+            logger.error(f'{devices[i].name} reports transmission > 1')
+
+        factors = np.where(inserted, np.minimum(dev_trans, 1), 1.0)
+        cumulative = np.cumprod(factors)
+        transmissions = np.where(on_path, cumulative, 0.0)
+
+        # Devices block the beam when it falls below the minimum, when they
+        # can not be evaluated or do not output onto the path, or when they
+        # are neither inserted nor removed.  Devices are ordered by when the
+        # walk down the path finds them blocking, the device before a
+        # mismatched branch is found when the mismatch is
+        blocks = (short
+                  | (~short & ~on_path)
+                  | (inserted & (cumulative < self.minimum_transmission))
+                  | (on_path & ~mismatch & ~inserted
+                     & (codes != DeviceState.Removed)))
+        found = np.where(blocks, 2 * idx + 1, 2 * n_dev + 1)
+        np.minimum.at(found, prev[mismatch], 2 * idx[mismatch])
+        order = np.argsort(found, kind='stable')
+        block = [devices[i] for i in order[:np.count_nonzero(
+            found <= 2 * n_dev)]]
+
+        return PathSnapshot(
+            devices=devices,
+            states=states,
+            lightpath_states=[status for _, status in readings],
+            outputs=outputs,
+            transmissions=transmissions.tolist(),
+            blocking_devices=block,
+            _z=layout.z,
+            _codes=codes,
+        )
+
+    def _layout(self, devices: list[Device]) -> _PathLayout:
+        """Array layout of ``devices``, cached for the devices of the path"""
+        if devices == self._path:
+            return self._path_layout
+        return _PathLayout(devices)
+
     @property
+    def last_snapshot(self) -> PathSnapshot | None:
+        """
+        The most recent :class:`.PathSnapshot`, kept up to date from device
+        callbacks while the path is subscribed to.  None if the path has no
+        subscriptions.
+        """
+        return self._last_snapshot
+
+    def _update_snapshot(self, device: Device) -> tuple[PathSnapshot,
+                                                        PathSnapshot]:
+        """
+        Re-read a single device and re-evaluate the path from that device
+        downstream, reusing the cached readings of every other device.
+
+        Returns
+        -------
+        Tuple[PathSnapshot, PathSnapshot]
+            the previous and updated snapshots
+        """
+        # Devices are read outside of the lock, reading a device may itself
+        # run callbacks that re-enter this method from another thread
+        read = next(self._snapshot_reads)
+        reading = find_device_state(device)
+        with self._snapshot_lock:
+            old = self._last_snapshot
+            if old is not None and device in old:
+                if read < self._device_reads.get(device.name,
+                                                 self._snapshot_read):
+                    # a later reading was already applied by another thread
+                    return old, old
+                self._device_reads[device.name] = read
+                idx = old.index(device)
+                readings = old.readings
+                readings[idx] = reading
+                new = self._evaluate(old.devices, readings,
+                                     start=idx, previous=old)
+                self._last_snapshot = new
+                return old, new
+
+        return old, self._take_snapshot()
+
+    def _take_snapshot(self) -> PathSnapshot:
+        """
+        Take a full snapshot to keep up to date from device callbacks.  If
+        the cached snapshot holds a reading taken after this one began, it
+        is kept instead.
+        """
+        read = next(self._snapshot_reads)
+        snapshot = self.snapshot()
+        with self._snapshot_lock:
+            # Full snapshots that began reading before a device was read
+            # again may hold an older reading of it
+            if read > max([self._snapshot_read, *self._device_reads.values()]):
+                self._last_snapshot = snapshot
+                self._snapshot_read = read
+                self._device_reads.clear()
+            return self._last_snapshot
+
+    @property
+    @timed()
     def blocking_devices(self) -> list[Device]:
         """
         A list of devices that are currently inserted or are in unknown
@@ -290,49 +923,7 @@ class BeamPath(OphydObject):
         List[Device]
             list of blocking devices
         """
-        # Cache important prior devices
-        prev_device = None
-        prev_dev_branch = None
-        block = list()
-        current_transmission = 1
-        for device in self.path:
-            curr_state, curr_status = find_device_state(device)
-            # short circuit if statuses are in error
-            if curr_state in (DeviceState.Error, DeviceState.Unknown,
-                              DeviceState.Disconnected):
-                block.append(device)
-                continue
-
-            dev_out = self.get_device_output(device)
-            curr_dev_branch, curr_dev_trans = dev_out
-            # device output not on path
-            if curr_dev_branch == '':
-                block.append(device)
-            # check to make sure input and output branches match
-            # e.g. mirror not pointing to current device
-            elif (prev_device is not None and prev_dev_branch is not None
-                  and prev_dev_branch not in device.input_branches):
-                if prev_device not in block:
-                    block.append(prev_device)
-            # check inserted
-            elif curr_state is DeviceState.Inserted:
-                if curr_dev_trans > 1:
-                    logger.error(f'{device.name} reports transmission > 1')
-                current_transmission *= min(curr_dev_trans, 1)
-                # Any device seeing current transmission below min would block
-                if current_transmission < self.minimum_transmission:
-                    block.append(device)
-            # Do not add device to blocking list, it is removed
-            elif curr_state is DeviceState.Removed:
-                pass
-            # Unknown and inconsistent devices block
-            else:
-                block.append(device)
-
-            # stash previous device
-            prev_device = device
-            prev_dev_branch = curr_dev_branch
-        return block
+        return self.snapshot().blocking_devices
 
     @property
     def incident_devices(self) -> list[Device]:
@@ -346,15 +937,7 @@ class BeamPath(OphydObject):
         List[Device]
             List of incident devices
         """
-        # Find device information
-        inserted = [d for d in self.path
-                    if find_device_state(d)[0] == DeviceState.Inserted]
-        impediment = self.impediment
-        # No blocking devices, all inserted devices incident
-        if not impediment:
-            return inserted
-        # Otherwise only return upstream of the impediment
-        return [d for d in inserted if d.md.z <= impediment.md.z]
+        return self.snapshot().incident_devices
 
     def show_devices(self, file: TextIO = None):
         """
@@ -375,22 +958,42 @@ class BeamPath(OphydObject):
         pt.align['Prefix'] = 'l'
         pt.float_format = '8.5'
         # Add info
-        for d in self.path:
+        snapshot = self.snapshot()
+        for d, state in zip(snapshot.devices, snapshot.states):
             pt.add_row([d.name, d.prefix, d.md.z, d.input_branches,
-                        d.output_branches, find_device_state(d)[0].name])
+                        d.output_branches, state.name])
         # Show table
         print(pt, file=file)
 
+    def connect_all(self, timeout: float = 1.0) -> dict[str, bool]:
+        """
+        Connect the ``lightpath_summary`` signals of every device at once
+
+        Each device's signal connections are started concurrently and waited
+        on as a group, so the whole path connects in roughly one ``timeout``
+        rather than one per device.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Seconds to wait for the devices to connect
+
+        Returns
+        -------
+        Dict[str, bool]
+            mapping of each device name to whether it connected
+        """
+        report = connect_devices(self.devices, timeout=timeout)
+        missing = [name for name, ok in report.items() if not ok]
+        if missing:
+            logger.warning('%d device(s) in %s did not connect: %s',
+                           len(missing), self.name, ', '.join(missing))
+        return report
+
     @property
     def impediment(self) -> Device:
         """ Device: First blocking device along the path """
-        # Find device information
-        blocks = self.blocking_devices
-        if not blocks:
-            return None
-
-        else:
-            return blocks[0]
+        return self.snapshot().impediment
 
     @property
     def cleared(self) -> bool:
@@ -403,7 +1006,7 @@ class BeamPath(OphydObject):
         bool
             whether beamline is clear of impediments
         """
-        return not any(self.blocking_devices)
+        return self.snapshot().cleared
 
     def clear(
         self,
@@ -441,10 +1044,11 @@ class BeamPath(OphydObject):
         target_devices, ignored = self._ignore(ignore, passive=passive)
         # Remove devices
         logger.info('Removing devices along the beampath ...')
+        snapshot = self.snapshot()
         status = [device.remove(timeout=timeout)
                   for device in target_devices
-                  if find_device_state(device)[0] in (DeviceState.Inserted,
-                                                      DeviceState.Unknown)
+                  if snapshot.state_of(device) in (DeviceState.Inserted,
+                                                   DeviceState.Unknown)
                   and hasattr(device, 'remove')]
         # Wait parameters
         if wait:
@@ -601,22 +1205,27 @@ class BeamPath(OphydObject):
     def _device_moved(self, *args, obj=None, **kwargs):
         """
         Run when a device changes state
+
+        Only the moved device is re-read, and subscribers are notified only
+        if the impediment or transmission profile of the path has changed.
         """
-        # Determine whether our path has been changed
-        block = self.impediment
-        if block:
-            block = block.md.z
-        else:
-            block = math.inf
-        # If device is upstream of impediment
-        if obj is not None and obj.parent.md.z <= block:
-            self._run_subs(sub_type=self.SUB_PTH_CHNG, device=obj)
+        if obj is None:
+            return
+        # This may run before the state cache hears of the change
+        state_cache.invalidate(obj.parent)
+        old, new = self._update_snapshot(obj.parent)
+        if (old is None
+                or new.impediment is not old.impediment
+                or new.transmissions != old.transmissions):
+            self._run_subs(sub_type=self.SUB_PTH_CHNG, device=obj,
+                           snapshot=new)
 
     def subscribe(
         self,
         cb: Callable,
         event_type: str | None = None,
-        run: bool = True
+        run: bool = True,
+        coalesce: float | None = None,
     ):
         """
         Subscribe to changes of the valve
@@ -631,10 +1240,22 @@ class BeamPath(OphydObject):
 
         run : bool, optional
             Run the callback immediatelly
+
+        coalesce : float, optional
+            Window in seconds, e.g. 0.05, over which bursts of events are
+            collapsed into a single callback.  The callback then receives
+            ``devices``, the set of devices that moved within the window.
+            By default the callback runs for every event
+
+        Returns
+        -------
+        cid : int
+            id of callback, can be passed to ``unsubscribe``
         """
         if not self._has_subscribed:
             # Subscribe to all child devices
             for dev in self.devices:
+                state_cache.watch(dev)
                 # Add callback here!
                 try:
                     dev.lightpath_summary.subscribe(self._device_moved,
@@ -643,7 +1264,95 @@ class BeamPath(OphydObject):
                     logger.error("BeamPath is unable to subscribe "
                                  "to device %s", dev.name)
             self._has_subscribed = True
-        super().subscribe(cb, event_type=event_type, run=run)
+            # Cache the readings that device callbacks will update.  Readings
+            # taken while the subscriptions were being made may be stale
+            self._take_snapshot()
+        if coalesce is not None:
+            cb = _CoalescedCallback(cb, coalesce)
+            self._coalesced.append(cb)
+        return super().subscribe(cb, event_type=event_type, run=run)
+
+    async def aget_snapshot(self) -> PathSnapshot:
+        """
+        Take a :class:`.PathSnapshot` without blocking the event loop
+
+        Returns
+        -------
+        PathSnapshot
+            the current state of the path
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.snapshot)
+
+    async def watch(
+        self,
+        coalesce: float | None = None
+    ) -> AsyncIterator[PathEvent]:
+        """
+        Yield a :class:`.PathEvent` each time the impediment or transmission
+        along the path changes
+
+        Events are delivered by the ``lightpath_summary`` subscriptions of
+        the devices, without polling.  The subscription is removed when
+        iteration stops.
+
+        Parameters
+        ----------
+        coalesce : float, optional
+            Window in seconds over which bursts of changes are collapsed into
+            a single event, see :meth:`.subscribe`
+
+        Yields
+        ------
+        PathEvent
+            the devices that moved and the resulting state of the path
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[PathEvent] = asyncio.Queue()
+
+        def path_changed(*args, device=None, devices=None, snapshot=None,
+                         **kwargs):
+            if devices is None:
+                # path events report the lightpath_summary signal
+                parent = getattr(device, 'parent', None)
+                devices = {device if parent is None else parent}
+            event = PathEvent(path=self, devices=set(devices),
+                              snapshot=snapshot)
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:
+                # event loop closed
+                pass
+
+        # Subscribing reads every device, keep it off the event loop
+        await loop.run_in_executor(
+            None,
+            functools.partial(self.subscribe, path_changed, run=False,
+                              coalesce=coalesce)
+        )
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self.clear_sub(path_changed)
+
+    def clear_sub(self, cb: Callable, event_type: str | None = None):
+        """
+        Remove a subscription, given the original callback function
+
+        Parameters
+        ----------
+        cb : callable
+            The callback
+
+        event_type : str, optional
+            The event to unsubscribe from (if None, removes it from all event
+            types)
+        """
+        for coalesced in [c for c in self._coalesced if c == cb]:
+            coalesced.cancel()
+            self._coalesced.remove(coalesced)
+        super().clear_sub(cb, event_type=event_type)
 
     def clear_device_subs(self) -> None:
         """
@@ -654,7 +1363,11 @@ class BeamPath(OphydObject):
         if self._has_subscribed:
             for dev in self.devices:
                 dev.lightpath_summary.clear_sub(self._device_moved)
+                state_cache.unwatch(dev)
             self._has_subscribed = False
+            with self._snapshot_lock:
+                self._last_snapshot = None
+                self._device_reads.clear()
 
     def _repr_info(self):
         yield 'range', self.range
@@ -0,0 +1,359 @@
+"""
+Recording and replay of device state streams
+
+:class:`StateRecorder` subscribes to the ``lightpath_summary`` of every
+device of a live facility, and appends each update and the
+:class:`.LightpathState` it results in to a compact binary log.  The log is
+read back with :func:`read_log`, and :func:`replay` feeds it into the mock
+devices of the same facility through a :class:`.SignalStorm`, at the
+original or an accelerated speed::
+
+    with StateRecorder.from_controller(controller, 'xcs.lplog'):
+        ...  # wait while production traffic is recorded
+
+    # Offline, on a database of mock devices with the same names
+    storm = replay('xcs.lplog', mock_controller.devices, speed=10,
+                   paths=mock_controller.get_paths('XCS'))
+    print(storm.summary())
+
+Log format
+----------
+The log is a sequence of records, each starting with a one byte tag.  All
+values are little-endian.  Recording sessions may be appended to the same
+file, each starting with a header that resets the name table.
+
+``H``
+    Session header: format version (``uint8``), then the time the session
+    started (``float64``)
+``N``
+    Name: id (``uint16``), length (``uint16``), then the UTF-8 name of a
+    device or branch.  Names are written once per session, before their
+    first use
+``S``
+    State update: time (``float64``), device name id (``uint16``),
+    :class:`.DeviceState` (``uint8``), flags (``uint8``, 1 if inserted and
+    2 if removed) and number of outputs (``uint8``), then for each output
+    the branch name id (``uint16``) and transmission (``float32``)
+"""
+from __future__ import annotations
+
+import logging
+import struct
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Optional, Union
+
+from ophyd import Device
+
+from .mock_devices import Status
+from .path import (BeamPath, DeviceState, connect_devices, find_device_state,
+                   state_cache)
+from .simulator import SignalStorm, StormEvent
+
+logger = logging.getLogger(__name__)
+
+VERSION = 1
+
+_HEADER = struct.Struct('<Bd')
+_NAME = struct.Struct('<HH')
+_STATE = struct.Struct('<dHBBB')
+_OUTPUT = struct.Struct('<Hf')
+
+# Mock device status reproducing each recorded state.  Mock devices can not
+# fail to read, so errors are replayed as a disconnection
+_STATUS = {
+    DeviceState.Inserted: Status.inserted,
+    DeviceState.Removed: Status.removed,
+    DeviceState.Unknown: Status.unknown,
+    DeviceState.Inconsistent: Status.inconsistent,
+    DeviceState.Disconnected: Status.disconnected,
+    DeviceState.Error: Status.disconnected,
+}
+
+
+@dataclass
+class StateRecord:
+    """
+    A recorded update of a device
+
+    Attributes
+    ----------
+    time : float
+        time of the update, in seconds since the epoch
+
+    device : str
+        name of the device
+
+    state : DeviceState
+        state the device was found in
+
+    inserted : bool
+
+    removed : bool
+
+    output : Dict[str, float]
+        mapping from output branch to transmission
+    """
+    time: float
+    device: str
+    state: DeviceState
+    inserted: bool = False
+    removed: bool = False
+    output: dict[str, float] = field(default_factory=dict)
+
+
+class StateRecorder:
+    """
+    Append the state updates of devices to a binary log
+
+    Every value update of a ``lightpath_summary`` is recorded.  Changes of
+    connection are recorded when they change the state of the device.
+
+    Parameters
+    ----------
+    devices : Iterable[Device]
+        devices implementing the Lightpath interface
+
+    path : Union[str, Path]
+        log file, appended to if it exists
+    """
+    def __init__(self, devices: Iterable[Device], path: Union[str, Path]):
+        self.devices = list(devices)
+        self.path = Path(path)
+        self.records_written = 0
+        self._lock = threading.Lock()
+        self._file: Optional[BinaryIO] = None
+        self._live = False
+        self._names: dict[str, int] = {}
+        # device name -> last state recorded
+        self._last: dict[str, tuple[Any, ...]] = {}
+        # device name -> subscription ids
+        self._cids: dict[str, list[int]] = {}
+
+    @classmethod
+    def from_controller(
+        cls,
+        controller: Any,
+        path: Union[str, Path],
+    ) -> StateRecorder:
+        """Recorder of every device in the facility of a LightController"""
+        devices = controller.preload_devices(controller.graph.nodes)
+        return cls(devices.values(), path)
+
+    @property
+    def recording(self) -> bool:
+        return self._file is not None
+
+    def start(self, timeout: float = 1.0) -> None:
+        """
+        Subscribe to each device, and record their current state once they
+        connect
+
+        Parameters
+        ----------
+        timeout : float, optional
+            Seconds to wait for the devices to connect
+        """
+        if self.recording:
+            return
+        self._file = open(self.path, 'ab')
+        self._names.clear()
+        self._last.clear()
+        self._file.write(b'H' + _HEADER.pack(VERSION, time.time()))
+        for device in self.devices:
+            summary = device.lightpath_summary
+            self._cids[device.name] = [
+                summary.subscribe(self._summary_changed, run=False),
+                summary.subscribe(self._connection_changed,
+                                  event_type=summary.SUB_META, run=False),
+            ]
+        # Updates as the subscriptions connect are not traffic
+        connect_devices(self.devices, timeout=timeout)
+        for device in self.devices:
+            self._record(device)
+        self._live = True
+
+    def stop(self) -> None:
+        """Unsubscribe from each device and close the log"""
+        if not self.recording:
+            return
+        self._live = False
+        for device in self.devices:
+            for cid in self._cids.pop(device.name, []):
+                device.lightpath_summary.unsubscribe(cid)
+        with self._lock:
+            self._file.close()
+            self._file = None
+
+    def flush(self) -> None:
+        """Write the records buffered so far to the log"""
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def __enter__(self) -> StateRecorder:
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def _summary_changed(self, *args, obj=None, **kwargs) -> None:
+        if self._live and obj is not None:
+            self._record(obj.parent)
+
+    def _connection_changed(self, *args, obj=None, **kwargs) -> None:
+        if self._live and obj is not None:
+            self._record(obj.parent, changes_only=True)
+
+    def _record(self, device: Device, changes_only: bool = False) -> None:
+        # This may run before the state cache hears of the change
+        state_cache.invalidate(device)
+        state, lightpath_state = find_device_state(device)
+        now = time.time()
+        output = lightpath_state.output if lightpath_state else {}
+        flags = 0
+        if lightpath_state is not None:
+            flags = lightpath_state.inserted | lightpath_state.removed << 1
+        with self._lock:
+            if self._file is None:
+                return
+            last = (state, flags, output)
+            if changes_only and self._last.get(device.name) == last:
+                return
+            self._last[device.name] = last
+            data = [b'S', _STATE.pack(now, self._name_id(device.name),
+                                      state, flags, len(output))]
+            data.extend(_OUTPUT.pack(self._name_id(branch), trans)
+                        for branch, trans in output.items())
+            self._file.write(b''.join(data))
+            self.records_written += 1
+
+    def _name_id(self, name: str) -> int:
+        """Id of a name, writing it to the log on first use"""
+        name_id = self._names.get(name)
+        if name_id is None:
+            name_id = self._names[name] = len(self._names)
+            encoded = name.encode()
+            self._file.write(b'N' + _NAME.pack(name_id, len(encoded))
+                             + encoded)
+        return name_id
+
+
+def read_log(path: Union[str, Path]) -> Iterator[StateRecord]:
+    """
+    Read the state updates of a log written by :class:`StateRecorder`
+
+    A record cut short, as by a recorder that did not stop cleanly, ends
+    the log.
+
+    Raises
+    ------
+    ValueError
+        If the file is not a log of a supported version
+    """
+    with open(path, 'rb') as f:
+        names: dict[int, str] = {}
+
+        def read(size: int) -> bytes:
+            data = f.read(size)
+            if len(data) < size:
+                raise EOFError
+            return data
+
+        try:
+            while True:
+                tag = f.read(1)
+                if not tag:
+                    return
+                if tag == b'H':
+                    version, _ = _HEADER.unpack(read(_HEADER.size))
+                    if version != VERSION:
+                        raise ValueError(f'Unsupported log version {version}')
+                    names.clear()
+                elif tag == b'N':
+                    name_id, length = _NAME.unpack(read(_NAME.size))
+                    names[name_id] = read(length).decode()
+                elif tag == b'S':
+                    stamp, device, state, flags, n_outputs = _STATE.unpack(
+                        read(_STATE.size)
+                    )
+                    output = {}
+                    for _ in range(n_outputs):
+                        branch, trans = _OUTPUT.unpack(read(_OUTPUT.size))
+                        output[names[branch]] = trans
+                    yield StateRecord(time=stamp, device=names[device],
+                                      state=DeviceState(state),
+                                      inserted=bool(flags & 1),
+                                      removed=bool(flags & 2),
+                                      output=output)
+                else:
+                    raise ValueError(f'Unknown record {tag!r} in {path}')
+        except EOFError:
+            logger.warning('Log %s ends with an incomplete record', path)
+
+
+def replay_events(records: Iterable[StateRecord]) -> Iterator[StormEvent]:
+    """
+    Changes of mock devices reproducing recorded updates
+
+    Event times are relative to the first record.  The destination and
+    transmission of inserted devices are taken from their output with the
+    highest transmission.
+    """
+    start = None
+    for record in records:
+        if start is None:
+            start = record.time
+        destination = transmission = None
+        if record.state is DeviceState.Inserted and record.output:
+            destination, transmission = max(record.output.items(),
+                                            key=lambda item: item[1])
+        yield StormEvent(time=record.time - start, device=record.device,
+                         state=_STATUS[record.state],
+                         transmission=transmission, destination=destination)
+
+
+def replay(
+    path: Union[str, Path],
+    devices: Iterable[Device],
+    speed: float = 1.0,
+    paths: Optional[Iterable[BeamPath]] = None,
+) -> SignalStorm:
+    """
+    Replay a log into mock devices, blocking until done
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        log written by :class:`StateRecorder`
+
+    devices : Iterable[Device]
+        mock devices, with the names of the recorded devices.  Updates of
+        other devices are skipped
+
+    speed : float, optional
+        factor to speed up the replay by, as fast as possible if ``inf``
+
+    paths : Iterable[BeamPath], optional
+        paths to measure the latency of, see :meth:`.SignalStorm.watch_paths`
+
+    Returns
+    -------
+    SignalStorm
+        the storm that replayed the log, holding its latency statistics
+    """
+    storm = SignalStorm(devices)
+    storm.watch_paths(paths or [])
+    # New subscriptions report devices as disconnected until they connect
+    connect_devices(storm.devices.values())
+    events = (event for event in replay_events(read_log(path))
+              if event.device in storm.devices)
+    try:
+        storm.run(events, speed=speed)
+    finally:
+        storm.clear()
+    return storm
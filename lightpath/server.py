@@ -0,0 +1,273 @@
+"""
+Headless monitoring of the facility over HTTP
+
+:class:`LightpathMonitor` subscribes once to every :class:`.BeamPath` of a
+:class:`.LightController`, so each path keeps its latest
+:class:`.PathSnapshot` current from device callbacks.  The status of each
+endstation is then assembled from those cached snapshots without reading
+any device.
+
+:func:`serve` publishes this status as JSON over HTTP, allowing many clients
+to follow the beam without each building the facility graph and connecting
+to every device.  The following endpoints are provided:
+
+``GET /status``
+    The beam destinations and the status of every endstation
+
+``GET /endstations``
+    The names of the monitored endstations
+
+``GET /endstations/<name>``
+    The status of a single endstation, including the state of each device
+    along its active path
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+from .controller import LightController, PathRanking
+from .path import BeamPath, PathSnapshot
+
+logger = logging.getLogger(__name__)
+
+
+class LightpathMonitor:
+    """
+    Cached beam status of every endstation in a :class:`.LightController`
+
+    Parameters
+    ----------
+    controller : LightController
+        Controller to monitor
+
+    endstations : List[str], optional
+        Endstations to monitor, by default every endstation with a path
+
+    coalesce : float, optional
+        Window in seconds over which bursts of path changes are collapsed,
+        see :meth:`.BeamPath.subscribe`
+    """
+    def __init__(
+        self,
+        controller: LightController,
+        endstations: Optional[list[str]] = None,
+        coalesce: Optional[float] = 0.05,
+    ):
+        self.controller = controller
+        self.endstations = [
+            name for name in (endstations or controller.beamlines)
+            if controller.has_paths(name)
+        ]
+        self.coalesce = coalesce
+        self.paths: dict[str, list[BeamPath]] = {}
+        self.last_update: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        """Subscribe to the paths of every endstation"""
+        for name in self.endstations:
+            paths = self.controller.get_paths(name)
+            for path in paths:
+                path.subscribe(self._path_changed, run=False,
+                               coalesce=self.coalesce)
+            self.paths[name] = paths
+        self.last_update = time.time()
+        logger.info('Monitoring %d endstation(s)', len(self.paths))
+
+    def stop(self) -> None:
+        """Remove the subscriptions made by :meth:`.start`"""
+        for paths in self.paths.values():
+            for path in paths:
+                path.clear_sub(self._path_changed)
+                path.clear_device_subs()
+        self.paths.clear()
+
+    def _path_changed(self, *args, **kwargs) -> None:
+        with self._lock:
+            self.last_update = time.time()
+
+    @staticmethod
+    def _snapshot(path: BeamPath) -> PathSnapshot:
+        """Latest snapshot of a path, taking a new one if not subscribed"""
+        return path.last_snapshot or path.snapshot()
+
+    def _active(self, name: str) -> tuple[BeamPath, PathSnapshot]:
+        """
+        The path letting beam through farthest to an endstation, as in
+        :meth:`.LightController.active_path`
+        """
+        ranked = []
+        for path in self.paths[name]:
+            snapshot = self._snapshot(path)
+            ranked.append((PathRanking.rank_key(snapshot), path, snapshot))
+        _, path, snapshot = sorted(ranked, key=lambda item: item[0])[-1]
+        return path, snapshot
+
+    def endstation_status(
+        self,
+        name: str,
+        devices: bool = True
+    ) -> dict[str, Any]:
+        """
+        Status of an endstation, built from the cached path snapshots
+
+        Parameters
+        ----------
+        name : str
+            name of the endstation
+
+        devices : bool, optional
+            include the state of each device along the active path
+
+        Returns
+        -------
+        Dict[str, Any]
+            JSON-serializable status of the endstation
+
+        Raises
+        ------
+        KeyError
+            If the endstation is not monitored
+        """
+        path, snapshot = self._active(name)
+        impediment = snapshot.impediment
+        status = {
+            'name': name,
+            'impediment': getattr(impediment, 'name', None),
+            'cleared': snapshot.cleared,
+            'transmission': snapshot.transmissions[-1],
+            'incident_devices': [dev.name
+                                 for dev in snapshot.incident_devices],
+        }
+        if devices:
+            status['devices'] = [
+                {'name': dev.name,
+                 'z': dev.md.z,
+                 'state': state.name,
+                 'transmission': trans}
+                for dev, state, trans in zip(snapshot.devices,
+                                             snapshot.states,
+                                             snapshot.transmissions)
+            ]
+        return status
+
+    def destinations(self) -> list[str]:
+        """
+        Names of the current beam destinations, as in
+        :attr:`.LightController.destinations`
+        """
+        dests = set()
+        for paths in self.paths.values():
+            for path in paths:
+                imped = self._snapshot(path).impediment
+                if imped is not None and imped not in path.branching_devices:
+                    dests.add(imped.name)
+        return sorted(dests)
+
+    def status(self) -> dict[str, Any]:
+        """
+        Status of the whole facility
+
+        Returns
+        -------
+        Dict[str, Any]
+            JSON-serializable destinations and status of each endstation
+        """
+        return {
+            'updated': self.last_update,
+            'destinations': self.destinations(),
+            'endstations': {name: self.endstation_status(name, devices=False)
+                            for name in self.paths},
+        }
+
+
+class StatusRequestHandler(BaseHTTPRequestHandler):
+    """Serve the status of the :class:`.LightpathMonitor` of our server"""
+    server: StatusServer
+
+    def do_GET(self):
+        monitor = self.server.monitor
+        parts = [part for part in self.path.split('?')[0].split('/') if part]
+        if parts == ['status']:
+            self._send(monitor.status())
+        elif parts == ['endstations']:
+            self._send(list(monitor.paths))
+        elif (len(parts) == 2 and parts[0] == 'endstations'
+                and parts[1] in monitor.paths):
+            self._send(monitor.endstation_status(parts[1]))
+        else:
+            self._send({'error': f'Not found: {self.path}'},
+                       code=HTTPStatus.NOT_FOUND)
+
+    def _send(self, data: Any, code: HTTPStatus = HTTPStatus.OK) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug('%s - %s', self.address_string(), format % args)
+
+
+class StatusServer(ThreadingHTTPServer):
+    """
+    HTTP server for the status of a :class:`.LightpathMonitor`
+
+    Parameters
+    ----------
+    monitor : LightpathMonitor
+        Monitor to serve the status of
+
+    address : Tuple[str, int]
+        Host and port to listen on.  Port 0 picks a free port
+    """
+    daemon_threads = True
+
+    def __init__(self, monitor: LightpathMonitor, address: tuple[str, int]):
+        self.monitor = monitor
+        super().__init__(address, StatusRequestHandler)
+
+
+def serve(
+    controller: LightController,
+    host: str = '127.0.0.1',
+    port: int = 8000,
+    endstations: Optional[list[str]] = None,
+) -> None:
+    """
+    Monitor the facility and serve its status until interrupted
+
+    Parameters
+    ----------
+    controller : LightController
+        Controller to monitor
+
+    host : str, optional
+        Address to listen on, by default only the local host
+
+    port : int, optional
+        Port to listen on
+
+    endstations : List[str], optional
+        Endstations to monitor, by default every endstation with a path
+    """
+    monitor = LightpathMonitor(controller, endstations=endstations)
+    monitor.start()
+    server = StatusServer(monitor, (host, port))
+    logger.info('Serving lightpath status on http://%s:%d/status',
+                *server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info('Stopping lightpath server ...')
+    finally:
+        server.server_close()
+        monitor.stop()
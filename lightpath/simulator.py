@@ -0,0 +1,354 @@
+"""
+Storms of state changes across many mock devices
+
+:class:`SignalStorm` drives the devices of :mod:`lightpath.mock_devices`
+through their ``current_state`` and ``current_transmission`` signals at a
+steady rate, replaying either randomized changes or a recorded sequence.
+While it runs it measures how long each change takes to reach:
+
+* subscribers of each watched :class:`.BeamPath`, as ``SUB_PTH_CHNG``
+  callbacks
+* each watched ``LightRow``, once its ``update_state`` has run in the Qt
+  thread
+
+The latency is measured from the ``put`` of a device signal to the first
+delivery that follows it.  Changes that leave a path unaffected do not
+produce a path callback, and so are only counted as events::
+
+    storm = SignalStorm(controller.devices, rate=500, seed=0)
+    storm.watch_paths(controller.get_paths('XCS'))
+    storm.run(storm.random_events(5000))
+    print(storm.summary())
+"""
+from __future__ import annotations
+
+import json
+import logging
+import random
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import numpy as np
+from ophyd import Device
+
+from .mock_devices import Status
+from .path import BeamPath
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StormEvent:
+    """
+    A single change of a mock device
+
+    Attributes
+    ----------
+    time : float
+        seconds after the start of the storm to apply the change
+
+    device : str
+        name of the device
+
+    state : int
+        new ``current_state``, a :class:`.Status` value
+
+    transmission : float, optional
+        new ``current_transmission``, left unchanged if None
+
+    destination : str, optional
+        output branch the device sends beam down when inserted, left
+        unchanged if None
+    """
+    time: float
+    device: str
+    state: int
+    transmission: Optional[float] = None
+    destination: Optional[str] = None
+
+
+def save_events(path: Union[str, Path], events: Iterable[StormEvent]) -> None:
+    """Write events as JSON lines, for replay with :func:`load_events`"""
+    with open(path, 'w') as f:
+        for event in events:
+            f.write(json.dumps(asdict(event)) + '\n')
+
+
+def load_events(path: Union[str, Path]) -> list[StormEvent]:
+    """Read events written by :func:`save_events`"""
+    with open(path) as f:
+        return [StormEvent(**json.loads(line)) for line in f if line.strip()]
+
+
+class LatencyStats:
+    """Latency samples of one kind of delivery, in seconds"""
+    def __init__(self):
+        self.samples: list[float] = []
+
+    def add(self, latency: float) -> None:
+        self.samples.append(latency)
+
+    def summary(self) -> dict[str, Any]:
+        """
+        Count, mean, median, 95th and 99th percentile and maximum latency.
+        Only the count is given without samples
+        """
+        if not self.samples:
+            return {'count': 0}
+        samples = np.asarray(self.samples)
+        p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+        return {'count': len(samples),
+                'mean': float(samples.mean()),
+                'p50': float(p50),
+                'p95': float(p95),
+                'p99': float(p99),
+                'max': float(samples.max())}
+
+
+class SignalStorm:
+    """
+    Drive state changes across mock devices and measure their delivery
+
+    Parameters
+    ----------
+    devices : Iterable[Device]
+        mock devices to change, each with ``current_state`` and
+        ``current_transmission`` signals
+
+    rate : float, optional
+        changes per second of :meth:`.random_events`
+
+    seed : int, optional
+        seed for :meth:`.random_events`
+    """
+    def __init__(
+        self,
+        devices: Iterable[Device],
+        rate: float = 100.0,
+        seed: Optional[int] = None,
+    ):
+        self.devices = {device.name: device for device in devices}
+        self.rate = rate
+        self._rng = random.Random(seed)
+        self.path_latency = LatencyStats()
+        self.row_latency = LatencyStats()
+        self.events_applied = 0
+        self.elapsed = 0.0
+        self._lock = threading.Lock()
+        # device name -> time of the latest put
+        self._put_times: dict[str, float] = {}
+        # (watcher id, device name) -> time of the latest put delivered
+        self._delivered: dict[tuple[int, str], float] = {}
+        self._paths: list[BeamPath] = []
+        self._rows: list[Any] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def random_events(
+        self,
+        count: int,
+        transmission: float = 0.0,
+    ) -> list[StormEvent]:
+        """
+        Random changes, spaced at the rate of the storm
+
+        Parameters
+        ----------
+        count : int
+            number of changes
+
+        transmission : float, optional
+            fraction of changes that also set a random transmission
+
+        Returns
+        -------
+        List[StormEvent]
+            changes to run with :meth:`.run`
+        """
+        names = list(self.devices)
+        states = [Status.inserted, Status.removed]
+        events = []
+        for idx in range(count):
+            trans = None
+            if self._rng.random() < transmission:
+                trans = round(self._rng.random(), 3)
+            events.append(StormEvent(time=idx / self.rate,
+                                     device=self._rng.choice(names),
+                                     state=self._rng.choice(states),
+                                     transmission=trans))
+        return events
+
+    def watch_paths(
+        self,
+        paths: Iterable[BeamPath],
+        coalesce: Optional[float] = None,
+    ) -> None:
+        """
+        Measure latency to the ``SUB_PTH_CHNG`` callbacks of paths
+
+        Parameters
+        ----------
+        paths : Iterable[BeamPath]
+            paths to subscribe to
+
+        coalesce : float, optional
+            window over which path events are collapsed, as in
+            :meth:`.BeamPath.subscribe`
+        """
+        for path in paths:
+            path.subscribe(self._path_changed, run=False, coalesce=coalesce)
+            self._paths.append(path)
+
+    def watch_rows(self, rows: Iterable[Any]) -> None:
+        """
+        Measure latency to ``LightRow.update_state`` in the Qt thread
+
+        Parameters
+        ----------
+        rows : Iterable[LightRow]
+            row widgets to time
+        """
+        from qtpy.QtCore import Qt
+
+        for row in rows:
+            # Queued slots run in connection order, after the row updated
+            # itself
+            row.device_updated.connect(
+                lambda row=row: self._delivered_to(row, [row.device]),
+                Qt.QueuedConnection
+            )
+            self._rows.append(row)
+
+    def watch_app(self, app: Any) -> None:
+        """
+        Measure latency to the rows currently shown by a ``LightApp``
+
+        Parameters
+        ----------
+        app : LightApp
+            application displaying the mock devices
+        """
+        self.watch_rows(app.rows)
+
+    def clear(self) -> None:
+        """Remove the path subscriptions made by :meth:`.watch_paths`"""
+        for path in self._paths:
+            path.clear_sub(self._path_changed)
+        self._paths.clear()
+
+    def _path_changed(self, *args, obj=None, device=None, devices=None,
+                      **kwargs) -> None:
+        if devices is None:
+            # path events report the lightpath_summary signal
+            parent = getattr(device, 'parent', None)
+            devices = [device if parent is None else parent]
+        self._delivered_to(obj, devices)
+
+    def _delivered_to(self, watcher: Any, devices: Iterable[Device]) -> None:
+        now = time.perf_counter()
+        with self._lock:
+            for device in devices:
+                name = getattr(device, 'name', None)
+                put_time = self._put_times.get(name)
+                key = (id(watcher), name)
+                if put_time is None or self._delivered.get(key) == put_time:
+                    continue
+                self._delivered[key] = put_time
+                stats = (self.path_latency if isinstance(watcher, BeamPath)
+                         else self.row_latency)
+                stats.add(now - put_time)
+
+    def apply(self, event: StormEvent) -> None:
+        """Apply a single change to its device"""
+        device = self.devices[event.device]
+        with self._lock:
+            self._put_times[device.name] = time.perf_counter()
+        if event.destination is not None:
+            self._set_destination(device, event.destination)
+        if event.transmission is not None:
+            device.current_transmission.put(event.transmission)
+        device.current_state.put(event.state)
+        self.events_applied += 1
+
+    @staticmethod
+    def _set_destination(device: Device, destination: str) -> None:
+        # Branching mock devices pick their destination on insertion
+        if (destination in device.output_branches
+                and hasattr(device, '_inserted_branch')):
+            device._inserted_branch.put(
+                device.output_branches.index(destination)
+            )
+        device.current_destination.put(destination)
+
+    def run(self, events: Iterable[StormEvent], speed: float = 1.0) -> None:
+        """
+        Apply changes at the time of each, blocking until done or stopped
+
+        Parameters
+        ----------
+        events : Iterable[StormEvent]
+            changes to apply, in order of time
+
+        speed : float, optional
+            factor to speed up the changes by.  Changes are applied as fast
+            as possible if ``inf``
+        """
+        self._stop.clear()
+        start = time.perf_counter()
+        for event in events:
+            if self._stop.is_set():
+                break
+            delay = start + event.time / speed - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            self.apply(event)
+        self.elapsed += time.perf_counter() - start
+
+    def start(
+        self,
+        events: Iterable[StormEvent],
+        speed: float = 1.0,
+    ) -> threading.Thread:
+        """
+        Apply changes from a background thread, see :meth:`.run`
+
+        Returns
+        -------
+        threading.Thread
+            the thread applying the changes
+        """
+        self._thread = threading.Thread(target=self.run, args=(events,),
+                                        kwargs={'speed': speed},
+                                        name='signal_storm', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self) -> None:
+        """Stop applying changes, and wait for the background thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def summary(self) -> dict[str, Any]:
+        """
+        Results of the storm so far
+
+        Returns
+        -------
+        Dict[str, Any]
+            JSON-serializable number of changes applied, achieved rate and
+            latency to path callbacks and row updates
+        """
+        return {
+            'events': self.events_applied,
+            'elapsed': self.elapsed,
+            'rate': (self.events_applied / self.elapsed
+                     if self.elapsed else None),
+            'path_latency': self.path_latency.summary(),
+            'row_latency': self.row_latency.summary(),
+        }
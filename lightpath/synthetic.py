@@ -0,0 +1,298 @@
+"""
+Synthetic facilities for benchmarking and stress testing
+
+:func:`make_facility` lays out a facility of any size from the mock devices
+in :mod:`lightpath.mock_devices`.  Branches of :class:`.Valve`,
+:class:`.IPIMB` and :class:`.Stopper` devices start at one or more sources,
+and :class:`.Crystal` and :class:`.LODCM` devices send beam from one branch
+down others, over as many levels as requested.  Every branch ends in an
+endstation of the same name.  To resemble production databases:
+
+* Some branches may also receive beam from a second branch, so there is more
+  than one path to their endstation
+* Some devices may have an extra input or output branch that no other device
+  uses, as with devices steering beam to a dump
+
+The facility is returned as the contents of a happi JSON database and a
+matching beamline configuration.  :func:`write_facility` stores both, ready
+for :class:`.LightController` or ``lightpath --cfg``::
+
+    db, cfg = make_facility(n_devices=5000, n_sources=2, depth=3,
+                            merge=0.1, dangling=0.05)
+    write_facility('facility.json', db, cfg=cfg)
+    client = happi.Client(path='facility.json')
+    controller = LightController(client, cfg=cfg)
+
+The same is available from the command line with ``lightpath synthetic``.
+"""
+from __future__ import annotations
+
+import json
+import math
+import random
+from pathlib import Path
+from typing import Any, Optional, Union
+
+import yaml
+
+# mock devices placed along each branch
+DEVICE_CLASSES = {
+    'vlv': 'lightpath.mock_devices.Valve',
+    'ipm': 'lightpath.mock_devices.IPIMB',
+    'stp': 'lightpath.mock_devices.Stopper',
+}
+# mock devices sending beam to other branches
+BRANCHING_CLASS = 'lightpath.mock_devices.Crystal'
+LODCM_CLASS = 'lightpath.mock_devices.LODCM'
+
+# distance between consecutive devices on a branch
+SPACING = 1.0
+
+
+def make_entry(
+    name: str,
+    device_class: str,
+    z: float,
+    input_branches: list[str],
+    output_branches: list[str],
+) -> dict[str, Any]:
+    """
+    Happi database entry for a mock lightpath device
+
+    Parameters
+    ----------
+    name : str
+        name of the device
+
+    device_class : str
+        full path to the class of the device
+
+    z : float
+        position of the device along the beamline
+
+    input_branches : List[str]
+        branches the device receives beam from
+
+    output_branches : List[str]
+        branches the device delivers beam to
+
+    Returns
+    -------
+    Dict[str, Any]
+        entry of a ``LightpathItem``, as stored in a happi JSON database
+    """
+    return {
+        '_id': name,
+        'name': name,
+        'type': 'lightpath.happi.containers.LightpathItem',
+        'device_class': device_class,
+        'args': ['{{prefix}}'],
+        'kwargs': {'name': '{{name}}',
+                   'z': '{{z}}',
+                   'input_branches': '{{input_branches}}',
+                   'output_branches': '{{output_branches}}'},
+        'prefix': name.upper(),
+        'z': z,
+        'input_branches': list(input_branches),
+        'output_branches': list(output_branches),
+        'active': True,
+        'lightpath': True,
+        'documentation': None,
+    }
+
+
+def make_facility(
+    n_devices: int = 500,
+    branching: int = 2,
+    branch_length: int = 20,
+    n_sources: int = 1,
+    depth: Optional[int] = 1,
+    merge: float = 0.0,
+    dangling: float = 0.0,
+    seed: Optional[int] = None,
+) -> tuple[dict[str, dict[str, Any]], dict[str, Any]]:
+    """
+    Lay out a synthetic facility
+
+    Parameters
+    ----------
+    n_devices : int, optional
+        total number of devices in the facility
+
+    branching : int, optional
+        maximum number of output branches of each branching device,
+        including the branch it sits on
+
+    branch_length : int, optional
+        average number of devices on each branch
+
+    n_sources : int, optional
+        number of source branches
+
+    depth : int, optional
+        maximum number of branching devices between a source and any
+        branch.  No limit if None
+
+    merge : float, optional
+        fraction of branches that also receive beam from a second branch,
+        giving more than one path to their endstation
+
+    dangling : float, optional
+        fraction of devices with an extra input or output branch that no
+        other device and no endstation uses
+
+    seed : int, optional
+        seed for the layout and the class of each device
+
+    Returns
+    -------
+    db : Dict[str, Dict[str, Any]]
+        happi JSON database, a mapping of device name to entry
+
+    cfg : Dict[str, Any]
+        configuration for :class:`.LightController`, with ``beamlines`` and
+        ``sources``
+
+    Raises
+    ------
+    ValueError
+        If the devices can not be laid out as requested
+    """
+    if branching < 2:
+        raise ValueError('Branching devices need at least two outputs')
+    if n_sources < 1:
+        raise ValueError('A facility needs at least one source')
+    rng = random.Random(seed)
+    n_branches = max(n_sources, math.ceil(n_devices / branch_length))
+    sources = [f'S{idx}' for idx in range(n_sources)]
+    branches = sources + [f'B{idx}' for idx in range(n_branches - n_sources)]
+
+    # Attach each branch to an earlier one, so parents are laid out first
+    levels = {source: 0 for source in sources}
+    children: dict[str, list[str]] = {branch: [] for branch in branches}
+    for branch in branches[n_sources:]:
+        parent = rng.choice([other for other in levels
+                             if depth is None or levels[other] < depth])
+        levels[branch] = levels[parent] + 1
+        children[parent].append(branch)
+
+    # Children leave each branch in groups, one branching device per group
+    groups = {branch: [branch_children[idx:idx + branching - 1]
+                       for idx in range(0, len(branch_children),
+                                        branching - 1)]
+              for branch, branch_children in children.items()}
+    lengths = {branch: len(groups[branch]) for branch in branches}
+    remaining = n_devices - sum(lengths.values())
+    if remaining < 0:
+        raise ValueError(f'{n_devices} devices are too few to branch into '
+                         f'{n_branches} branches')
+    for idx, branch in enumerate(branches):
+        share = remaining // (n_branches - idx)
+        lengths[branch] += share
+        remaining -= share
+
+    # Devices as [prefix, device_class, z, inputs, outputs]
+    devices: list[list[Any]] = []
+    plain: list[int] = []
+    starts = {source: 0.0 for source in sources}
+    for branch in branches:
+        slots = dict(zip(sorted(rng.sample(range(lengths[branch]),
+                                           len(groups[branch]))),
+                         groups[branch]))
+        for idx in range(lengths[branch]):
+            z = starts[branch] + (idx + 1) * SPACING
+            if idx in slots:
+                group = slots[idx]
+                if len(group) == 1 and rng.random() < 0.5:
+                    prefix, device_class = 'lod', LODCM_CLASS
+                else:
+                    prefix, device_class = 'xtl', BRANCHING_CLASS
+                devices.append([prefix, device_class, z, [branch],
+                                [branch, *group]])
+                starts.update((child, z) for child in group)
+            else:
+                prefix = rng.choice(list(DEVICE_CLASSES))
+                plain.append(len(devices))
+                devices.append([prefix, DEVICE_CLASSES[prefix], z, [branch],
+                                [branch]])
+
+    # Send beam to some branches from a second branch.  Only devices
+    # upstream of the start of the branch qualify, keeping the graph acyclic
+    converted = set()
+    for branch in branches[n_sources:]:
+        if rng.random() >= merge:
+            continue
+        candidates = [idx for idx in plain if idx not in converted
+                      and devices[idx][2] < starts[branch]
+                      and branch not in devices[idx][3]
+                      and not any(branch in children[other]
+                                  for other in devices[idx][3])]
+        if candidates:
+            idx = rng.choice(candidates)
+            converted.add(idx)
+            devices[idx][:2] = 'xtl', BRANCHING_CLASS
+            devices[idx][4] = devices[idx][4] + [branch]
+
+    # Branches that lead nowhere, or come from nowhere
+    for idx in plain:
+        if idx in converted or rng.random() >= dangling:
+            continue
+        device = devices[idx]
+        branch = device[3][0]
+        device[0] = 'dng'
+        if rng.random() < 0.5:
+            device[4] = device[4] + [f'{branch}_DUMP{idx}']
+        else:
+            device[3] = [f'{branch}_FEED{idx}', *device[3]]
+
+    db = {}
+    for idx, (prefix, device_class, z, inputs, outputs) in enumerate(devices):
+        name = f'{prefix}{idx:05d}'
+        db[name] = make_entry(name, device_class, z, inputs, outputs)
+
+    cfg = {
+        'beamlines': {branch: [branch] for branch in branches},
+        'sources': sources,
+    }
+    return db, cfg
+
+
+def write_facility(
+    path: Union[str, Path],
+    db: dict[str, dict[str, Any]],
+    cfg: Optional[dict[str, Any]] = None,
+    cfg_path: Optional[Union[str, Path]] = None,
+) -> Path:
+    """
+    Write a synthetic facility as a happi JSON database, and optionally its
+    beamline configuration
+
+    Parameters
+    ----------
+    path : Union[str, Path]
+        file to write the database to
+
+    db : Dict[str, Dict[str, Any]]
+        database from :func:`make_facility`
+
+    cfg : Dict[str, Any], optional
+        configuration from :func:`make_facility`.  Written as a YAML file
+        pointing at the database, for use with ``lightpath --cfg``
+
+    cfg_path : Union[str, Path], optional
+        file to write the configuration to, by default ``path`` with a
+        ``.yml`` suffix
+
+    Returns
+    -------
+    Path
+        the database file
+    """
+    path = Path(path)
+    with open(path, 'w') as f:
+        json.dump(db, f, indent=1)
+    if cfg is not None:
+        cfg_path = Path(cfg_path) if cfg_path else path.with_suffix('.yml')
+        with open(cfg_path, 'w') as f:
+            yaml.safe_dump({'db': str(path.resolve()), **cfg}, f)
+    return path
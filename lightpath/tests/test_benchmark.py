@@ -0,0 +1,37 @@
+import json
+from pathlib import Path
+
+from lightpath.benchmark import STEPS, benchmark_facility, run_benchmarks
+from lightpath.main import entrypoint
+
+from .conftest import cli_args
+
+
+def test_benchmark_facility():
+    results = benchmark_facility(n_devices=40, branching=3, repeat=2)
+    assert [result.name for result in results] == list(STEPS)
+    for result in results:
+        assert result.n_devices == 40
+        assert len(result.times) == 2
+        assert all(time >= 0 for time in result.times)
+    # Creating the devices allocates memory
+    by_name = {result.name: result for result in results}
+    assert by_name['get_paths'].peak_memory > 0
+
+
+def test_cli_benchmark(tmp_path: Path):
+    output = tmp_path / 'results.json'
+    with cli_args(['lightpath', 'benchmark', '--devices', '20', '30',
+                   '--repeat', '1', '--output', str(output)]):
+        entrypoint()
+
+    results = json.loads(output.read_text())
+    assert results['metadata']['repeat'] == 1
+    assert len(results['results']) == 2 * len(STEPS)
+    assert {result['n_devices'] for result in results['results']} == {20, 30}
+    for result in results['results']:
+        assert result['min'] <= result['median']
+
+
+def test_run_benchmarks_serializable():
+    json.dumps(run_benchmarks(sizes=[20], repeat=1))
@@ -1,12 +1,22 @@
+import gc
+import math
+import weakref
 from pathlib import Path
-from typing import Any
+from types import SimpleNamespace
+from typing import Any, Optional
+from unittest.mock import Mock
 
 import happi
 import pytest
 
-from lightpath import LightController
+import lightpath.controller
+import lightpath.path
+from lightpath import BeamPath, LightController
+from lightpath.cache import cache_key
 from lightpath.config import beamlines
+from lightpath.controller import PathRanking
 from lightpath.errors import PathError
+from lightpath.tests.conftest import wait_until
 
 
 def test_controller_paths(lcls_client: happi.Client):
@@ -96,6 +106,33 @@ def test_controller_device_summaries(lcls_ctrl: LightController):
     xcs_path.path[0].remove()
 
 
+def test_facility_snapshot(lcls_ctrl: LightController, monkeypatch):
+    lcls_ctrl.get_device('mr1l4').insert()
+    lcls_ctrl.get_device('sl1l4').insert()
+    read = Mock(wraps=lightpath.path.find_device_state)
+    monkeypatch.setattr(lightpath.path, 'find_device_state', read)
+    monkeypatch.setattr(lightpath.controller, 'find_device_state', read)
+
+    snapshots = lcls_ctrl.facility_snapshot()
+    # Each device in the facility is read once
+    devices = {dev.name for endstation in lcls_ctrl.beamlines
+               for path in lcls_ctrl.get_paths(endstation)
+               for dev in path.devices}
+    assert read.call_count == len(devices)
+    assert ({call.args[0].name for call in read.call_args_list}
+            == devices)
+    # Snapshots match evaluating each path on its own
+    assert set(snapshots) == set(lcls_ctrl.beamlines)
+    for endstation, endstation_snapshots in snapshots.items():
+        paths = lcls_ctrl.get_paths(endstation)
+        assert len(endstation_snapshots) == len(paths)
+        for path, snapshot in zip(paths, endstation_snapshots):
+            assert snapshot == path.snapshot()
+
+    lcls_ctrl.get_device('mr1l4').remove()
+    lcls_ctrl.get_device('sl1l4').remove()
+
+
 def test_path_to(lcls_ctrl: LightController):
     bp = lcls_ctrl.path_to(lcls_ctrl.active_path('MEC').path[-3])
     assert len(bp.path) == 12
@@ -103,6 +140,108 @@ def test_path_to(lcls_ctrl: LightController):
     mec_path == lcls_ctrl.active_path('MEC').path
 
 
+def test_path_reuse(lcls_ctrl: LightController):
+    device = lcls_ctrl.get_device('im1l3')
+    paths = lcls_ctrl.paths_to(device)
+    # Repeated requests share the BeamPaths still in use
+    assert all(new is old
+               for new, old in zip(lcls_ctrl.paths_to(device), paths))
+    assert any(lcls_ctrl.path_to(device) is path for path in paths)
+    # Paths through the same devices as an endstation path are shared
+    xcs_paths = lcls_ctrl.get_paths('XCS')
+    last = lcls_ctrl.active_path('XCS').path[-1]
+    for path in lcls_ctrl.paths_to(last):
+        assert any(path is xcs_path for xcs_path in xcs_paths)
+
+    # Unused paths are released
+    refs = [weakref.ref(path) for path in paths]
+    del path, paths
+    gc.collect()
+    assert all(ref() is None for ref in refs)
+
+    # Invalidation forgets all paths
+    lcls_ctrl.invalidate_paths()
+    assert lcls_ctrl.beamlines['XCS'] is None
+    new_xcs_paths = lcls_ctrl.get_paths('XCS')
+    assert len(new_xcs_paths) == len(xcs_paths)
+    assert all(new is not old
+               for new, old in zip(new_xcs_paths, xcs_paths))
+
+
+class RankedPath:
+    """Stand-in BeamPath reporting a settable snapshot"""
+    def __init__(self, z: Optional[float], transmission: float):
+        self.cbs = []
+        self.last_snapshot = None
+        self.set(z, transmission)
+
+    def set(self, z: Optional[float], transmission: float):
+        imped = None if z is None else SimpleNamespace(md=SimpleNamespace(z=z))
+        self.state = SimpleNamespace(impediment=imped,
+                                     transmissions=[1.0, transmission])
+        if self.last_snapshot is not None:
+            self.last_snapshot = self.state
+            for cb in self.cbs:
+                cb(obj=self, snapshot=self.state)
+
+    def snapshot(self):
+        return self.state
+
+    def subscribe(self, cb, run=True):
+        self.cbs.append(cb)
+        self.last_snapshot = self.state
+
+    def clear_sub(self, cb):
+        if cb in self.cbs:
+            self.cbs.remove(cb)
+
+    def connect_all(self):
+        return {}
+
+
+def test_path_ranking():
+    paths = [RankedPath(None, 0.5), RankedPath(None, 0.8),
+             RankedPath(10.0, 1.0)]
+    ranking = PathRanking(paths)
+    # Unblocked paths first, brighter path breaks the tie
+    assert ranking.active is paths[1]
+    assert ranking.ranked() == [(paths[1], math.inf, 0.8),
+                                (paths[0], math.inf, 0.5),
+                                (paths[2], 10.0, 1.0)]
+    # Ranking follows path events
+    paths[1].set(5.0, 0.0)
+    assert ranking.active is paths[0]
+    paths[0].set(20.0, 0.0)
+    paths[1].set(None, 0.1)
+    assert ranking.active is paths[1]
+    # Equal paths go to the later one
+    paths[0].set(None, 0.1)
+    assert ranking.active is paths[1]
+    ranking.clear_subs()
+    assert not any(path.cbs for path in paths)
+
+
+def test_active_path_cached(lcls_ctrl: LightController):
+    xcs = lcls_ctrl.active_path('XCS')
+    ranking = lcls_ctrl.path_ranking('XCS')
+    assert ranking.active is xcs
+    # Lookups do not read the devices
+    for path in ranking.paths:
+        path.snapshot = Mock(wraps=path.snapshot)
+    assert lcls_ctrl.active_path('XCS') is xcs
+    assert lcls_ctrl.path_ranking('XCS') is ranking
+    for path in ranking.paths:
+        path.snapshot.assert_not_called()
+
+    # Ranking is kept up to date as devices move
+    lcls_ctrl.get_device('mr1l3').insert()
+    wait_until(lambda: lcls_ctrl.active_path('XCS') is not xcs)
+    assert lcls_ctrl.active_path('XCS').path[-3].name == 'im1l3'
+    lcls_ctrl.get_device('mr1l3').remove()
+    wait_until(lambda: lcls_ctrl.active_path('XCS') is xcs)
+    assert lcls_ctrl.active_path('XCS') is xcs
+
+
 def test_multi_output(lcls_ctrl: LightController):
     xcs_lodcm = lcls_ctrl.get_device('xcs_lodcm')
     assert lcls_ctrl.active_path('XCS').blocking_devices == [xcs_lodcm]
@@ -154,6 +293,24 @@ def test_mock_device(lcls_ctrl: LightController):
     lcls_ctrl.get_device('sl1k2')
 
 
+def test_preload_devices(lcls_ctrl: LightController, monkeypatch):
+    # devices that fail to load are mocked
+    def broken_get(*args, **kwargs):
+        raise RuntimeError('failed to load')
+
+    monkeypatch.setattr(lcls_ctrl.graph.nodes['sl1k2']['md'].res, 'get',
+                        broken_get)
+    names = ['im1l0', 'im1k0', 'sl1k2', 'source_L0', 'not a device']
+    devices = lcls_ctrl.preload_devices(names, max_workers=4)
+    assert set(devices) == {'im1l0', 'im1k0', 'sl1k2'}
+    assert devices['im1l0'].name == 'im1l0'
+    assert devices['sl1k2'].name == 'MOCK_sl1k2'
+    for name, dev in devices.items():
+        assert lcls_ctrl.get_device(name) is dev
+    # Loaded devices are reused
+    assert lcls_ctrl.preload_devices(['im1l0']) == {'im1l0': devices['im1l0']}
+
+
 def test_cfg_loading(lcls_client: happi.Client, cfg: dict[str, Any]):
     # load lcls with config modifications
     lc = LightController(lcls_client, ['XCS'], cfg=cfg)
@@ -188,3 +345,62 @@ def test_sim_ctrl():
     assert len(lc.beamlines.keys()) == len(beamlines)
     assert len(lc.active_path('XCS').devices) == 13
     assert lc.get_device('sl2k0')
+
+
+def test_facility_cache(lcls_client: happi.Client, tmp_path: Path,
+                        monkeypatch):
+    cache = tmp_path / 'facility.json'
+    lc = LightController(lcls_client, cfg={'cache': cache})
+    assert cache.exists()
+
+    # Facility is restored without searching the database
+    def no_search(*args, **kwargs):
+        raise RuntimeError('database searched')
+
+    with monkeypatch.context() as m:
+        m.setattr(lcls_client, 'search_range', no_search)
+        cached_lc = LightController(lcls_client, cfg={'cache': cache})
+
+    assert list(cached_lc.graph.nodes) == list(lc.graph.nodes)
+    assert list(cached_lc.graph.edges) == list(lc.graph.edges)
+    assert cached_lc.sources == lc.sources
+    for line in lc.beamlines:
+        assert ([d.name for d in cached_lc.active_path(line).path]
+                == [d.name for d in lc.active_path(line).path])
+
+    # Changed configuration rebuilds the facility
+    with monkeypatch.context() as m:
+        m.setattr(lcls_client, 'search_range', no_search)
+        with pytest.raises(RuntimeError):
+            LightController(lcls_client,
+                            cfg={'cache': cache, 'sources': ['L0']})
+
+
+def test_cache_key(tmp_path: Path):
+    db = tmp_path / 'db.json'
+    db.write_text((Path(__file__).parent / 'path.json').read_text())
+    client = happi.Client(path=str(db))
+    key = cache_key(client, {'sources': ['L0']})
+    assert key == cache_key(client, {'sources': ['L0']})
+    assert key != cache_key(client, {'sources': ['K0']})
+    # Editing the database invalidates the key
+    item = client.find_item(name='im1l0')
+    item.z = 1.0
+    item.save()
+    assert key != cache_key(client, {'sources': ['L0']})
+
+
+def test_lazy_paths(lcls_client: happi.Client, monkeypatch):
+    lc = LightController(lcls_client, endstations=['XCS', 'MEC'])
+    # No paths are found until requested
+    assert lc.beamlines == {'XCS': None, 'MEC': None}
+    assert lc.has_paths('MEC')
+    assert lc.beamlines['MEC'] is None
+
+    paths = lc.get_paths('MEC')
+    assert all(isinstance(path, BeamPath) for path in paths)
+    assert lc.beamlines['XCS'] is None
+    # Paths are memoized
+    monkeypatch.setattr(lc, 'load_beamline', None)
+    assert lc.get_paths('MEC') is paths
+    assert lc.active_path('MEC') in paths
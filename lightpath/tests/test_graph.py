@@ -0,0 +1,36 @@
+import networkx as nx
+
+from lightpath import LightController
+from lightpath.graph import PathIndex
+
+
+def test_index_matches_search(lcls_ctrl: LightController):
+    graph = lcls_ctrl.graph
+    index = lcls_ctrl.index
+    assert index.acyclic
+    for src in lcls_ctrl.sources:
+        for node in graph:
+            assert index.has_path(src, node) == nx.has_path(graph, src, node)
+            assert (index.paths(src, node)
+                    == list(nx.all_simple_paths(graph, src, node)))
+    assert not index.has_path('source_L0', 'not a node')
+    assert index.paths('source_L0', 'not a node') == []
+
+
+def test_index_diamond():
+    graph = nx.DiGraph([('a', 'b'), ('a', 'c'), ('b', 'd'), ('c', 'd'),
+                        ('d', 'e'), ('c', 'f')])
+    index = PathIndex(graph)
+    assert index.ancestors('e') == {'a', 'b', 'c', 'd'}
+    assert index.paths('a', 'e') == [['a', 'b', 'd', 'e'],
+                                     ['a', 'c', 'd', 'e']]
+    assert index.paths('b', 'f') == []
+    assert not index.has_path('e', 'a')
+
+
+def test_index_cycle():
+    graph = nx.DiGraph([('a', 'b'), ('b', 'c'), ('c', 'b'), ('c', 'd')])
+    index = PathIndex(graph)
+    assert not index.acyclic
+    assert index.has_path('a', 'd')
+    assert index.paths('a', 'd') == [['a', 'b', 'c', 'd']]
@@ -1,29 +1,49 @@
+import logging
+import math
 from distutils.spawn import find_executable
 from unittest.mock import Mock
 
 import pytest
 from pytestqt.qtbot import QtBot
+from qtpy.QtCore import QPoint, Qt
 
 from lightpath.controller import LightController
+from lightpath.instrumentation import instrumented
 from lightpath.path import DeviceState
-from lightpath.ui import LightApp
+from lightpath.ui import LightApp, LightRow
+from lightpath.ui.widgets import BeamlineModel, beam_brushes, state_colors
 
 
 @pytest.fixture(scope='function')
 def lightapp(lcls_client, qtbot):
     lightapp = LightApp(LightController(lcls_client))
     qtbot.addWidget(lightapp)
+    wait_loaded(qtbot, lightapp)
     yield lightapp
 
 
-def test_app_buttons(lightapp: LightApp):
+def wait_loaded(qtbot: QtBot, lightapp: LightApp):
+    """Wait for the path being loaded in the background to be shown"""
+    qtbot.waitUntil(lambda: not lightapp.loading, timeout=10000)
+
+
+def fit_rows(lightapp: LightApp, count: int):
+    """Size the strip of rows to show a number of devices"""
+    strip = lightapp.strip
+    strip.resize(count * (strip.row_width + strip.spacing), strip.height())
+    strip.relayout()
+
+
+def test_app_buttons(qtbot: QtBot, lightapp: LightApp):
     # Create widgets
     assert len(lightapp.select_devices('MEC')) == 14
     # Setup new display
     mec_idx = lightapp.destination_combo.findText('MEC')
     lightapp.destination_combo.setCurrentIndex(mec_idx)
     lightapp.change_path_display()
-    assert len(lightapp.rows) == 14
+    wait_loaded(qtbot, lightapp)
+    assert len(lightapp.model.devices) == 14
+    assert 0 < len(lightapp.rows) <= 14
 
 
 def test_lightpath_launch_script():
@@ -31,89 +51,84 @@ def test_lightpath_launch_script():
     assert find_executable('lightpath')
 
 
-def test_focus_on_device(lightapp: LightApp, monkeypatch):
-    row = lightapp.rows[7][0]
-    monkeypatch.setattr(lightapp.scroll,
-                        'ensureWidgetVisible',
-                        Mock())
+def test_focus_on_device(qtbot: QtBot, lightapp: LightApp):
+    fit_rows(lightapp, 3)
+    devices = lightapp.model.devices
+    device = devices[7]
+    assert lightapp.strip.row_for(device) is None
     # Grab the focus
-    lightapp.focus_on_device(name=row.device.name)
-    lightapp.scroll.ensureWidgetVisible.assert_called_with(row)
+    lightapp.focus_on_device(name=device.name)
+    assert lightapp.strip.row_for(device) is not None
     # Go to impediment if no device is provided
-    first_row = lightapp.rows[1][0]
-    first_row.device.insert()
+    first_device = devices[1]
+    first_device.insert()
+    # path updates are coalesced and drawn on the Qt thread
+    qtbot.waitUntil(lambda: (lightapp.current_impediment.text()
+                             == first_device.name))
     lightapp.focus_on_device()
-    lightapp.scroll.ensureWidgetVisible.assert_called_with(first_row)
+    assert lightapp.strip.row_for(first_device) is not None
     # Smoke test a bad device string
     lightapp.focus_on_device('blah')
 
 
-def test_upstream_check(lightapp: LightApp, monkeypatch):
+def test_upstream_check(qtbot: QtBot, lightapp: LightApp):
     assert len(lightapp.select_devices('TMO')) == 12
 
     tmo_idx = lightapp.destination_combo.findText('TMO')
     lightapp.destination_combo.setCurrentIndex(tmo_idx)
     lightapp.change_path_display()
-    assert len(lightapp.rows) == 12
-
-    # Create mock functions
-    for row in lightapp.rows:
-        monkeypatch.setattr(row[0], 'setHidden', Mock())
+    wait_loaded(qtbot, lightapp)
+    assert len(lightapp.model.devices) == 12
 
     lightapp.upstream_device_combo.setCurrentIndex(5)
     lightapp.update_upstream()
     upstream_from_device = lightapp.light.active_path('TMO').path[5]
-    for row in lightapp.rows:
-        if (row[0].device.md.z < upstream_from_device.md.z):
-            row[0].setHidden.assert_called_with(True)
-        else:
-            row[0].setHidden.assert_called_with(False)
+    assert lightapp.filter_model.devices == [
+        device for device in lightapp.model.devices
+        if device.md.z >= upstream_from_device.md.z
+    ]
+    assert all(row.device.md.z >= upstream_from_device.md.z
+               for row in lightapp.rows)
 
 
-def test_filtering(qtbot: QtBot, lightapp: LightApp, monkeypatch):
+def test_filtering(qtbot: QtBot, lightapp: LightApp):
     lightapp.destination_combo.setCurrentIndex(4)  # set current to MEC
-    # Create mock functions
-    for row in lightapp.rows:
-        monkeypatch.setattr(row[0], 'setHidden', Mock())
+    wait_loaded(qtbot, lightapp)
+    devices = lightapp.model.devices
+    shown = lightapp.filter_model
     # Initialize properly with nothing hidden
     lightapp.filter()
-    for row in lightapp.rows:
-        qtbot.waitUntil(lambda: row[0].setHidden.assert_called_with(False))
+    assert shown.devices == devices
     # Insert at least one device then hide
-    device_row = lightapp.rows[2][0]
-    device_row.device.insert()
-    for row in lightapp.rows:
-        qtbot.waitUntil(lambda: row[0].last_state is not DeviceState.Disconnected)
+    inserted = devices[2]
+    inserted.insert()
+
+    def removed_hidden():
+        lightapp.filter()
+        assert shown.devices == [
+            device for device in devices
+            if not device.get_lightpath_state().removed
+        ]
 
     lightapp.remove_check.setChecked(False)
-    qtbot.waitUntil(lambda: not lightapp.remove_check.isChecked())
-    # Reset mock
-    for row in lightapp.rows:
-        row[0].setHidden.reset_mock()
-    lightapp.filter()
-    for row in lightapp.rows:
-        if row[0].device.get_lightpath_state().removed:
-            qtbot.waitUntil(lambda: row[0].setHidden.assert_called_with(True))
-        else:
-            qtbot.waitUntil(lambda: row[0].setHidden.assert_called_with(False))
-    # Hide upstream devices
-    lightapp.select_devices('MEC')
-    lightapp.remove_check.setChecked(True)
-    lightapp.filter()
-    for row in lightapp.rows:
-        if row[0].device not in lightapp.light.active_path('MEC').path:
-            qtbot.waitUntil(lambda: row[0].setHidden.assert_called_with(True))
-        else:
-            qtbot.waitUntil(lambda: row[0].setHidden.assert_called_with(False))
+    qtbot.waitUntil(removed_hidden)
+    assert inserted in shown.devices
+    assert len(shown.devices) < len(devices)
+    # Rows only show devices that are not filtered out
+    assert all(row.device in shown.devices for row in lightapp.rows)
     # Dual hidden categories will not fight
-    lightapp.remove_check.setChecked(False)
-    lightapp.filter()
-    for row in lightapp.rows:
-        if ((row[0].device not in lightapp.light.active_path('MEC').path)
-                or (row[0].device.get_lightpath_state().removed)):
-            qtbot.waitUntil(lambda: row[0].setHidden.assert_called_with(True))
-        else:
-            qtbot.waitUntil(lambda: row[0].setHidden.assert_called_with(False))
+    box, dtype = next(iter(lightapp.device_buttons.items()))
+    box.setChecked(False)
+    assert shown.devices == [
+        device for device in devices
+        if not (device.get_lightpath_state().removed
+                or device.__module__ == dtype)
+    ]
+    # Show everything again
+    box.setChecked(True)
+    lightapp.remove_check.setChecked(True)
+    assert shown.devices == devices
+    inserted.remove()
 
 
 def test_typhos_display(lightapp: LightApp):
@@ -121,10 +136,147 @@ def test_typhos_display(lightapp: LightApp):
     lightapp.hide_detailed()
     assert lightapp.detail_layout.count() == 2
     assert lightapp.device_detail.isHidden()
-    lightapp.show_detailed(lightapp.rows[0][0].device)
+    lightapp.show_detailed(lightapp.rows[0].device)
     assert lightapp.detail_layout.count() == 3
     assert not lightapp.device_detail.isHidden()
     # Smoke test the hide button without a detailed display
     lightapp.hide_detailed()
     assert lightapp.detail_layout.count() == 2
     assert lightapp.device_detail.isHidden()
+
+
+def test_path_update_snapshot(qtbot: QtBot, lightapp: LightApp, monkeypatch):
+    monkeypatch.setattr(lightapp, 'update_path', Mock())
+    device = lightapp.model.devices[1]
+    device.insert()
+
+    def updated():
+        assert lightapp.update_path.called
+        snapshot = lightapp.update_path.call_args.kwargs['snapshot']
+        assert snapshot.impediment is device
+
+    qtbot.waitUntil(updated)
+    device.remove()
+
+
+def test_dump_timings(lightapp: LightApp, caplog):
+    caplog.set_level(logging.INFO, logger='lightpath')
+    with instrumented():
+        lightapp.update_path()
+        lightapp.dump_timings()
+    assert 'LightApp.update_path' in caplog.text
+
+
+def test_row_recycling(qtbot: QtBot, lightapp: LightApp):
+    fit_rows(lightapp, 3)
+    strip = lightapp.strip
+    devices = lightapp.filter_model.devices
+    assert len(devices) > 3
+    # Rows are only created for the devices in view
+    rows = strip.rows
+    assert [row.device for row in rows] == devices[:3]
+    # Scrolling shows other devices with the same rows
+    strip.scrollbar.setValue(strip.scrollbar.maximum())
+    assert strip.rows == rows
+    assert [row.device for row in rows] == devices[-3:]
+    # Recycled rows follow their new device
+    device = rows[0].device
+    device.insert()
+    qtbot.waitUntil(lambda: rows[0].last_state is DeviceState.Inserted)
+    device.remove()
+    # and not their previous one
+    with qtbot.assertNotEmitted(rows[0].device_updated, wait=0):
+        devices[0].insert()
+    devices[0].remove()
+    # Switching destination does not create rows
+    combo = lightapp.destination_combo
+    combo.setCurrentIndex(combo.findText('MEC'))
+    wait_loaded(qtbot, lightapp)
+    assert strip.rows == rows
+    assert ([row.device for row in rows]
+            == lightapp.filter_model.devices[:3])
+
+
+def test_background_loading(qtbot: QtBot, lightapp: LightApp):
+    progress = []
+    lightapp.devices_loaded.connect(
+        lambda token, devices, done, total: progress.append((done, total))
+    )
+    combo = lightapp.destination_combo
+    combo.setCurrentIndex(combo.findText('MEC'))
+    # Only the latest request is displayed
+    combo.setCurrentIndex(combo.findText('TMO'))
+    assert lightapp.loading
+    assert not lightapp.load_progress.isHidden()
+    wait_loaded(qtbot, lightapp)
+    assert lightapp.load_progress.isHidden()
+    assert lightapp.model.devices == lightapp.light.active_path('TMO').path
+    assert progress and progress[-1][0] == progress[-1][1]
+
+
+def test_update_path_changed_rows(lightapp: LightApp, monkeypatch):
+    devices = lightapp.model.devices
+    fit_rows(lightapp, len(devices))
+    rows = lightapp.rows
+    assert len(rows) == len(devices)
+    lightapp.update_path(snapshot=lightapp.path.snapshot())
+    changed = []
+
+    def lights_changed(top, bottom, roles):
+        if BeamlineModel.LightRole in roles:
+            changed.extend(devices[top.row():bottom.row() + 1])
+
+    lightapp.model.dataChanged.connect(lights_changed)
+    for row in rows:
+        monkeypatch.setattr(row, 'update_light', Mock())
+    # Blocking the path only repaints the devices downstream of the blocker
+    for blocker in devices[3:]:
+        blocker.insert()
+        if lightapp.path.snapshot().impediment is blocker:
+            break
+        blocker.remove()
+    lightapp.update_path(snapshot=lightapp.path.snapshot())
+    assert changed[0] is blocker
+    assert all(device.md.z >= blocker.md.z for device in changed)
+    repainted = [row.device for row in rows if row.update_light.called]
+    assert repainted == changed
+    # Nothing changed, nothing is repainted
+    changed.clear()
+    for row in rows:
+        row.update_light.reset_mock()
+    lightapp.update_path(snapshot=lightapp.path.snapshot())
+    assert not changed
+    assert not any(row.update_light.called for row in rows)
+    blocker.remove()
+
+
+def test_shared_beam_brushes(lightapp: LightApp):
+    brushes = {id(row.beam_indicator.brush) for row in lightapp.rows}
+    assert brushes <= {id(brush) for brush in beam_brushes.values()}
+
+
+def test_overview(qtbot: QtBot, lightapp: LightApp, monkeypatch):
+    overview = lightapp.beamline_overview
+    model = lightapp.model
+    # A single widget draws every device
+    assert not lightapp.overview.findChildren(LightRow)
+    assert not overview.grab().isNull()
+    # Devices are colored as they move
+    device = model.devices[-1]
+    device.insert()
+    qtbot.waitUntil(lambda: model.index(len(model.devices) - 1, 0).data(
+        BeamlineModel.ColorRole
+    ) in (state_colors['blocking'], state_colors['half_removed']))
+    device.remove()
+    # Changes repaint only the cell of the device
+    monkeypatch.setattr(overview, 'update', Mock())
+    model.set_color(2, state_colors['unknown'])
+    rect = overview.update.call_args.args[0]
+    assert rect.left() <= 2 * overview.cell() < rect.right()
+    assert rect.width() <= math.ceil(overview.cell()) + 1
+    # Clicking a device brings it into view
+    fit_rows(lightapp, 2)
+    assert lightapp.strip.row_for(device) is None
+    x = round((len(model.devices) - 0.5) * overview.cell())
+    qtbot.mouseClick(overview, Qt.LeftButton, pos=QPoint(x, 2))
+    assert lightapp.strip.row_for(device) is not None
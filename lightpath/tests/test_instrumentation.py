@@ -0,0 +1,51 @@
+import json
+from pathlib import Path
+
+from lightpath.instrumentation import instrumented, timed, timer, timings
+from lightpath.main import entrypoint
+from lightpath.path import BeamPath
+
+from .conftest import cli_args
+
+
+def test_disabled_records_nothing(path: BeamPath):
+    timings.clear()
+    assert not timings.enabled
+    path.blocking_devices
+    assert timings.report() == {}
+
+
+def test_instrumented(path: BeamPath):
+    with instrumented() as recorded:
+        path.blocking_devices
+        with timer('block'):
+            pass
+    assert not timings.enabled
+    report = recorded.report()
+    assert report['BeamPath.blocking_devices']['count'] == 1
+    assert report['find_device_state']['count'] >= len(path.devices)
+    assert report['block']['count'] == 1
+    stats = report['find_device_state']
+    assert 0 <= stats['p50'] <= stats['p99'] <= stats['max']
+    assert 'BeamPath.blocking_devices' in recorded.format_report()
+
+
+def test_timed_name():
+    @timed('custom')
+    def func(value):
+        return value
+
+    with instrumented() as recorded:
+        assert func(2) == 2
+    assert list(recorded.report()) == ['custom']
+
+
+def test_cli_timings(tmp_path: Path):
+    output = tmp_path / 'timings.json'
+    with cli_args(['lightpath', 'benchmark', '--devices', '20',
+                   '--repeat', '1', '--output', str(tmp_path / 'bench.json'),
+                   '--timings', str(output)]):
+        entrypoint()
+    assert not timings.enabled
+    report = json.loads(output.read_text())
+    assert report['BeamPath.blocking_devices']['count'] > 0
@@ -1,10 +1,15 @@
+import asyncio
 import io
+import random
 import re
+import threading
 import time
 from unittest.mock import Mock
 
+import pytest
 from ophyd.device import Device
 
+import lightpath.path as path_module
 from lightpath import BeamPath
 from lightpath.mock_devices import Crystal, Status
 from lightpath.path import DeviceState, find_device_state
@@ -32,6 +37,51 @@ def test_find_device_state(device: Device):
     assert find_device_state(device)[0] == DeviceState.Error
 
 
+def test_state_cache_ttl(device: Device, monkeypatch):
+    cache = path_module.DeviceStateCache(ttl=60)
+    read = Mock(wraps=path_module._read_device_state)
+    monkeypatch.setattr(path_module, '_read_device_state', read)
+    device.insert()
+    assert cache.get(device)[0] == DeviceState.Inserted
+    assert cache.get(device)[0] == DeviceState.Inserted
+    assert read.call_count == 1
+    # Unwatched devices are not invalidated as they move
+    device.remove()
+    assert cache.get(device)[0] == DeviceState.Inserted
+    cache.invalidate(device)
+    assert cache.get(device)[0] == DeviceState.Removed
+    assert read.call_count == 2
+    # Without a ttl, unwatched devices are always read
+    cache.ttl = None
+    cache.clear()
+    cache.get(device)
+    cache.get(device)
+    assert read.call_count == 4
+
+
+def test_state_cache_watched(path: BeamPath, monkeypatch):
+    path.subscribe(Mock(), run=False)
+    wait_for_connection(path)
+    device = path.path[3]
+    read = Mock(wraps=path_module._read_device_state)
+    monkeypatch.setattr(path_module, '_read_device_state', read)
+    find_device_state(device)
+    read.reset_mock()
+    # Readings are served from the cache until the device changes
+    assert find_device_state(device)[0] == DeviceState.Removed
+    assert path.snapshot().state_of(device) == DeviceState.Removed
+    assert not read.called
+    device.insert()
+    assert find_device_state(device)[0] == DeviceState.Inserted
+    assert path.snapshot().state_of(device) == DeviceState.Inserted
+    # Devices are no longer watched once the path is unsubscribed
+    path.clear_device_subs()
+    read.reset_mock()
+    find_device_state(device)
+    find_device_state(device)
+    assert read.call_count == 2
+
+
 def test_range(path: BeamPath):
     assert path.range == (0., 30.)
 
@@ -234,6 +284,261 @@ def test_attenuation(path: BeamPath):
     assert path.impediment is None
 
 
+def test_snapshot(path: BeamPath, monkeypatch):
+    path.path[1].insert()
+    path.path[5].insert()
+    # Each device is read once per snapshot
+    calls = Mock(wraps=path_module.find_device_state)
+    monkeypatch.setattr(path_module, 'find_device_state', calls)
+    snapshot = path.snapshot()
+    assert calls.call_count == len(path.path)
+
+    assert snapshot.impediment == path.path[1]
+    assert snapshot.blocking_devices == [path.path[1], path.path[5]]
+    assert snapshot.incident_devices == [path.path[1]]
+    assert not snapshot.cleared
+    assert snapshot.state_of(path.path[5]) == DeviceState.Inserted
+    assert snapshot.transmissions[0] == 1
+    assert snapshot.transmissions[-1] == 0
+    # Beam reaches the impediment, but does not pass
+    assert snapshot.beam_indicators(path.path[0]) == (True, True)
+    assert snapshot.beam_indicators(path.path[1]) == (True, False)
+    assert snapshot.beam_indicators(path.path[2]) == (False, False)
+    assert snapshot.lit == [True, True] + [False] * 9
+    monkeypatch.undo()
+
+    # Devices that can not report a state block and deliver no beam
+    path.path[1].remove()
+    path.path[5].remove()
+    path.path[3].current_state.put(Status.unknown)
+    path.path[7].current_state.put(Status.disconnected)
+    snapshot = path.snapshot()
+    assert snapshot.state_of(path.path[3]) == DeviceState.Unknown
+    assert snapshot.state_of(path.path[7]) == DeviceState.Disconnected
+    assert snapshot.impediment == path.path[3]
+    assert snapshot.blocking_devices == [path.path[3], path.path[7]]
+    assert snapshot.transmissions[2] == 1
+    assert snapshot.transmissions[3] == 0
+    assert snapshot.transmissions[7] == 0
+    assert snapshot.beam_indicators(path.path[3]) == (True, False)
+
+
+def assert_same_snapshot(first, second):
+    assert first.devices == second.devices
+    assert first.states == second.states
+    assert first.outputs == second.outputs
+    assert first.transmissions == second.transmissions
+    assert first.blocking_devices == second.blocking_devices
+
+
+def wait_for_connection(path: BeamPath):
+    # Summary signals report their values once subscriptions are dispatched
+    wait_until(lambda: DeviceState.Disconnected
+               not in path.last_snapshot.states)
+
+
+def test_incremental_snapshot(path: BeamPath, monkeypatch):
+    path.subscribe(Mock(), run=False)
+    wait_for_connection(path)
+    assert_same_snapshot(path.last_snapshot, path.snapshot())
+    # Only the moved device is read again
+    calls = Mock(wraps=path_module.find_device_state)
+    monkeypatch.setattr(path_module, 'find_device_state', calls)
+    path.path[6].insert()
+    assert calls.called
+    assert all(call.args[0] is path.path[6]
+               for call in calls.call_args_list)
+    monkeypatch.undo()
+    # Cached snapshot follows the devices as they move
+    for idx in (5, 7, 8, 2, 8, 5):
+        if path.path[idx].current_state.get() == Status.inserted:
+            path.path[idx].remove()
+        else:
+            path.path[idx].insert()
+        assert_same_snapshot(path.last_snapshot, path.snapshot())
+
+    path.clear_device_subs()
+    assert path.last_snapshot is None
+
+
+def walk_path(path: BeamPath, devices, readings):
+    """Evaluate the path one device at a time, for comparison"""
+    block, transmissions = [], []
+    prev_device, prev_branch, current = None, None, 1
+    for device, (state, status) in zip(devices, readings):
+        if state in (DeviceState.Error, DeviceState.Unknown,
+                     DeviceState.Disconnected):
+            block.append(device)
+            transmissions.append(0)
+            continue
+        branch, trans = path.get_device_output(device, state=status)
+        if branch == '':
+            block.append(device)
+        elif (prev_device is not None
+              and prev_branch not in device.input_branches):
+            if prev_device not in block:
+                block.append(prev_device)
+        elif state is DeviceState.Inserted:
+            current *= min(trans, 1)
+            if current < path.minimum_transmission:
+                block.append(device)
+        elif state is not DeviceState.Removed:
+            block.append(device)
+        transmissions.append(current if branch != '' else 0)
+        prev_device, prev_branch = device, branch
+    return block, transmissions
+
+
+def test_evaluate_matches_walk(path: BeamPath, branch: BeamPath):
+    rng = random.Random(0)
+    for beampath in (path, branch):
+        devices = beampath.path
+        for _ in range(50):
+            for device in devices:
+                if rng.random() < 0.3:
+                    device.insert()
+                else:
+                    device.remove()
+            readings = [find_device_state(device) for device in devices]
+            for idx in rng.sample(range(len(devices)), 2):
+                state = rng.choice([DeviceState.Disconnected,
+                                    DeviceState.Inconsistent,
+                                    readings[idx][0]])
+                readings[idx] = (state, readings[idx][1])
+            snapshot = beampath._evaluate(devices, readings)
+            block, transmissions = walk_path(beampath, devices, readings)
+            assert snapshot.blocking_devices == block
+            assert snapshot.transmissions == pytest.approx(transmissions)
+
+
+def test_stale_reading_dropped(path: BeamPath, monkeypatch):
+    path.subscribe(Mock(), run=False)
+    wait_for_connection(path)
+    device = path.path[4]
+    stale = find_device_state(device)
+    release = threading.Event()
+
+    def slow_read(dev):
+        if threading.current_thread() is reader:
+            release.wait(2)
+            return stale
+        return find_device_state(dev)
+
+    monkeypatch.setattr(path_module, 'find_device_state', slow_read)
+    # Read begins before the device moves, but is applied after
+    reader = threading.Thread(target=path._update_snapshot, args=(device,))
+    reader.start()
+    device.insert()
+    wait_until(lambda: (path.last_snapshot.state_of(device)
+                        == DeviceState.Inserted))
+    release.set()
+    reader.join()
+    assert path.last_snapshot.state_of(device) == DeviceState.Inserted
+
+
+def test_evaluate_from_index(path: BeamPath):
+    previous = path.snapshot()
+    path.path[3].insert()
+    path.path[7].insert()
+    readings = previous.readings
+    for idx in (3, 7):
+        readings[idx] = find_device_state(path.path[idx])
+    resumed = path._evaluate(previous.devices, readings,
+                             start=3, previous=previous)
+    assert_same_snapshot(resumed, path.snapshot())
+
+
+def test_callback_suppressed(path: BeamPath):
+    path.path[1].insert()
+    cb = Mock()
+    path.subscribe(cb, run=False)
+    wait_for_connection(path)
+    cb.reset_mock()
+    # Downstream of the impediment, nothing changes
+    path.path[3].insert()
+    assert not cb.called
+    # Impediment moves
+    path.path[1].remove()
+    assert cb.called
+    assert cb.call_args.kwargs['snapshot'].impediment == path.path[3]
+
+
+def test_coalesced_callback(path: BeamPath):
+    cb = Mock()
+    path.subscribe(cb, run=False, coalesce=0.2)
+    wait_for_connection(path)
+    wait_until(lambda: cb.called, timeout=0.5)
+    cb.reset_mock()
+    # A burst of movement is delivered once
+    for idx in (1, 0):
+        path.path[idx].insert()
+    path.path[0].remove()
+    assert not cb.called
+    wait_until(lambda: cb.called)
+    assert cb.call_count == 1
+    assert cb.call_args.kwargs['devices'] == {path.path[0], path.path[1]}
+    assert cb.call_args.kwargs['snapshot'].impediment == path.path[1]
+    # Pending events are dropped with the subscription
+    path.path[1].remove()
+    path.clear_sub(cb)
+    time.sleep(0.3)
+    assert cb.call_count == 1
+    assert not path._coalesced
+
+
+def test_connect_all(path: BeamPath, monkeypatch):
+    report = path.connect_all(timeout=2)
+    assert report == {device.name: True for device in path.devices}
+    assert all(device.lightpath_summary.connected for device in path.devices)
+    # Devices are waited on together
+    delay = Mock(side_effect=lambda timeout: time.sleep(0.2))
+    for device in path.devices:
+        monkeypatch.setattr(device.lightpath_summary, 'wait_for_connection',
+                            delay)
+    start = time.monotonic()
+    path.connect_all(timeout=2)
+    assert time.monotonic() - start < 0.2 * len(path.devices) / 2
+    # Failures are reported per device
+    broken = path.path[2].lightpath_summary
+    monkeypatch.setattr(broken, 'wait_for_connection',
+                        Mock(side_effect=TimeoutError))
+    report = path.connect_all(timeout=0.1)
+    assert not report[path.path[2].name]
+    assert sum(report.values()) == len(path.devices) - 1
+
+
+def test_async_snapshot(path: BeamPath):
+    path.path[3].insert()
+    snapshot = asyncio.run(path.aget_snapshot())
+    assert_same_snapshot(snapshot, path.snapshot())
+
+
+def test_watch(path: BeamPath):
+    path.subscribe(Mock(), run=False)
+    wait_for_connection(path)
+
+    async def watch_for_insertion():
+        events = path.watch()
+        # Start watching before moving the device
+        next_event = asyncio.ensure_future(events.__anext__())
+        while len(path._callbacks[path.SUB_PTH_CHNG]) < 2:
+            await asyncio.sleep(0.01)
+        path.path[3].insert()
+        event = await asyncio.wait_for(next_event, timeout=2)
+        while event.impediment is not path.path[3]:
+            event = await asyncio.wait_for(events.__anext__(), timeout=2)
+        await events.aclose()
+        return event
+
+    event = asyncio.run(watch_for_insertion())
+    assert event.path is path
+    assert path.path[3] in event.devices
+    assert event.transmission == 0
+    assert_same_snapshot(event.snapshot, path.snapshot())
+    # Subscription is removed once iteration stops
+    assert len(path._callbacks[path.SUB_PTH_CHNG]) == 1
+
+
 def test_summary_signal(device: Device):
     cb = Mock()
 
@@ -0,0 +1,76 @@
+import json
+import math
+from pathlib import Path
+
+import pytest
+
+from lightpath.path import BeamPath, DeviceState, find_device_state
+from lightpath.main import entrypoint
+from lightpath.recording import StateRecorder, read_log, replay
+
+from .conftest import cli_args, simulated_path
+
+
+def test_record_and_read(path: BeamPath, tmp_path: Path):
+    log = tmp_path / 'states.lplog'
+    with StateRecorder(path.devices, log) as recorder:
+        path.devices[0].insert()
+        path.devices[0].remove()
+    # One record of the initial state of each device, then the moves
+    records = list(read_log(log))
+    assert len(records) == recorder.records_written
+    assert len(records) >= len(path.devices) + 2
+    assert [record.time for record in records] == sorted(
+        record.time for record in records)
+    moves = [record for record in records[len(path.devices):]
+             if record.device == path.devices[0].name]
+    assert moves[0].state is DeviceState.Inserted
+    assert moves[0].inserted and not moves[0].removed
+    assert moves[-1].state is DeviceState.Removed
+    assert moves[-1].output == {'TST': 1.0}
+    # Sessions are appended
+    with StateRecorder(path.devices[:1], log):
+        pass
+    assert len(list(read_log(log))) == len(records) + 1
+
+
+def test_read_truncated(path: BeamPath, tmp_path: Path, caplog):
+    log = tmp_path / 'states.lplog'
+    with StateRecorder(path.devices, log):
+        pass
+    log.write_bytes(log.read_bytes()[:-3])
+    assert len(list(read_log(log))) == len(path.devices) - 1
+    assert 'incomplete' in caplog.text
+    log.write_bytes(b'X')
+    with pytest.raises(ValueError):
+        list(read_log(log))
+
+
+def test_replay(path: BeamPath, tmp_path: Path):
+    log = tmp_path / 'states.lplog'
+    with StateRecorder(path.devices, log):
+        for device in path.devices[::2]:
+            device.insert()
+    expected = {device.name: find_device_state(device)[0]
+                for device in path.devices}
+
+    replayed = simulated_path()
+    storm = replay(log, replayed.devices, speed=math.inf, paths=[replayed])
+    assert storm.events_applied == len(list(read_log(log)))
+    assert storm.summary()['path_latency']['count'] > 0
+    assert {device.name: find_device_state(device)[0]
+            for device in replayed.devices} == expected
+    assert replayed.impediment.name == path.impediment.name
+
+
+def test_cli_replay(lcls_client, lcls_ctrl, tmp_path: Path, capsys):
+    log = tmp_path / 'lcls.lplog'
+    with StateRecorder.from_controller(lcls_ctrl, log) as recorder:
+        lcls_ctrl.get_device('xcs_lodcm').insert()
+    assert recorder.records_written > len(recorder.devices)
+
+    with cli_args(['lightpath', 'replay', '--sim', '--output', str(log),
+                   '--speed', 'inf']):
+        entrypoint()
+    summary = json.loads(capsys.readouterr().out)
+    assert summary['events'] == recorder.records_written
@@ -0,0 +1,111 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import happi
+import pytest
+
+from lightpath import LightController
+from lightpath.main import entrypoint
+from lightpath.path import DeviceState
+from lightpath.server import LightpathMonitor, StatusServer, serve
+
+from .conftest import cli_args, wait_until
+
+
+@pytest.fixture(scope='function')
+def monitor(lcls_client: happi.Client):
+    lc = LightController(lcls_client, endstations=['XCS', 'MEC', 'TMO'])
+    monitor = LightpathMonitor(lc, coalesce=None)
+    monitor.start()
+    # Wait for the subscribed devices to connect
+    wait_until(lambda: all(
+        DeviceState.Disconnected not in path.last_snapshot.states
+        for paths in monitor.paths.values() for path in paths
+    ), timeout=5)
+    yield monitor
+    monitor.stop()
+
+
+@pytest.fixture(scope='function')
+def server(monitor: LightpathMonitor):
+    server = StatusServer(monitor, ('127.0.0.1', 0))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def get(server: StatusServer, route: str):
+    host, port = server.server_address[:2]
+    with urllib.request.urlopen(f'http://{host}:{port}{route}',
+                                timeout=5) as resp:
+        return json.load(resp)
+
+
+def test_monitor_status(monitor: LightpathMonitor):
+    lc = monitor.controller
+    assert set(monitor.paths) == {'XCS', 'MEC', 'TMO'}
+    # Status follows the controller
+    xcs = lc.active_path('XCS')
+    wait_until(lambda: (monitor.endstation_status('XCS')['impediment']
+                        == getattr(xcs.impediment, 'name', None)), timeout=2)
+    status = monitor.endstation_status('XCS')
+    assert [dev['name'] for dev in status['devices']] == [
+        dev.name for dev in xcs.path
+    ]
+    assert (sorted(monitor.destinations())
+            == sorted(dev.name for dev in lc.destinations))
+
+
+def test_server_routes(server: StatusServer, monitor: LightpathMonitor):
+    status = get(server, '/status')
+    assert set(status['endstations']) == {'XCS', 'MEC', 'TMO'}
+    assert 'devices' not in status['endstations']['XCS']
+    assert set(get(server, '/endstations')) == {'XCS', 'MEC', 'TMO'}
+    xcs = get(server, '/endstations/XCS')
+    assert xcs['name'] == 'XCS'
+    assert len(xcs['devices']) == 13
+    with pytest.raises(urllib.error.HTTPError) as exc:
+        get(server, '/endstations/CXI')
+    assert exc.value.code == 404
+
+    # Movement is reflected in the cached status
+    device = monitor.controller.get_device('im1l0')
+    updated = status['updated']
+    device.insert()
+    try:
+        wait_until(lambda: (get(server, '/endstations/XCS')['impediment']
+                            == 'im1l0'), timeout=2)
+        assert get(server, '/status')['updated'] > updated
+    finally:
+        device.remove()
+
+
+def test_cli_serve(monkeypatch):
+    served = {}
+
+    def no_serve(controller, host, port):
+        served.update(controller=controller, host=host, port=port)
+
+    monkeypatch.setattr('lightpath.server.serve', no_serve)
+    with cli_args(['lightpath', 'serve', '--sim', '--hutches', 'XCS',
+                   '--port', '9000']):
+        entrypoint()
+
+    assert isinstance(served['controller'], LightController)
+    assert served['port'] == 9000
+    assert list(served['controller'].beamlines) == ['XCS']
+
+
+def test_serve_interrupt(lcls_client: happi.Client, monkeypatch):
+    def interrupt(self):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(StatusServer, 'serve_forever', interrupt)
+    lc = LightController(lcls_client, endstations=['XCS'])
+    serve(lc, port=0)
+    # Subscriptions are removed on exit
+    assert all(not path._has_subscribed for path in lc.get_paths('XCS'))
@@ -0,0 +1,61 @@
+import json
+from pathlib import Path
+
+from pytestqt.qtbot import QtBot
+
+from lightpath import LightController
+from lightpath.mock_devices import Status
+from lightpath.path import BeamPath
+from lightpath.simulator import (SignalStorm, StormEvent, load_events,
+                                 save_events)
+from lightpath.ui import LightApp
+
+
+def test_random_events(path: BeamPath):
+    storm = SignalStorm(path.devices, rate=50, seed=1)
+    events = storm.random_events(20, transmission=0.5)
+    assert events == SignalStorm(path.devices, rate=50,
+                                 seed=1).random_events(20, transmission=0.5)
+    assert [event.time for event in events] == [idx / 50 for idx in range(20)]
+    assert {event.device for event in events} <= set(storm.devices)
+    assert any(event.transmission is not None for event in events)
+
+
+def test_save_load_events(tmp_path: Path):
+    events = [StormEvent(0.0, 'zero', Status.inserted),
+              StormEvent(0.1, 'one', Status.removed, transmission=0.5)]
+    save_events(tmp_path / 'events.jsonl', events)
+    assert load_events(tmp_path / 'events.jsonl') == events
+
+
+def test_path_latency(path: BeamPath):
+    storm = SignalStorm(path.devices)
+    storm.watch_paths([path])
+    try:
+        # Each toggles the impediment of the path
+        storm.run([StormEvent(0.0, 'zero', Status.inserted),
+                   StormEvent(0.01, 'zero', Status.removed),
+                   StormEvent(0.02, 'zero', Status.inserted)])
+    finally:
+        storm.clear()
+    summary = storm.summary()
+    assert summary['events'] == 3
+    assert summary['path_latency']['count'] == 3
+    assert 0 <= summary['path_latency']['p50'] <= summary['path_latency']['max']
+    assert summary['row_latency'] == {'count': 0}
+    json.dumps(summary)
+
+
+def test_row_latency(qtbot: QtBot, lcls_client):
+    lightapp = LightApp(LightController(lcls_client))
+    qtbot.addWidget(lightapp)
+    qtbot.waitUntil(lambda: not lightapp.loading, timeout=10000)
+    storm = SignalStorm(lightapp.path.devices, rate=100, seed=0)
+    storm.watch_app(lightapp)
+    storm.start(storm.random_events(20))
+    try:
+        qtbot.waitUntil(lambda: storm.row_latency.summary()['count'] > 0,
+                        timeout=5000)
+    finally:
+        storm.stop()
+    assert storm.events_applied > 0
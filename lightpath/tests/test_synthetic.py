@@ -0,0 +1,91 @@
+import json
+from pathlib import Path
+
+import happi
+import pytest
+import yaml
+
+from lightpath import LightController
+from lightpath.main import entrypoint, load_controller
+from lightpath.synthetic import make_facility, write_facility
+
+from .conftest import cli_args
+
+
+@pytest.mark.parametrize('n_devices,branching', [(45, 2), (120, 4)])
+def test_make_facility(tmp_path: Path, n_devices: int, branching: int):
+    db, cfg = make_facility(n_devices=n_devices, branching=branching,
+                            branch_length=10, seed=1)
+    assert len(db) == n_devices
+    assert db == make_facility(n_devices=n_devices, branching=branching,
+                               branch_length=10, seed=1)[0]
+    client = happi.Client(path=str(write_facility(tmp_path / 'db.json', db)))
+    assert len(client.search()) == n_devices
+
+    lc = LightController(client, cfg=cfg)
+    assert set(lc.beamlines) == set(cfg['beamlines'])
+    # Every device lies on the path to some endstation
+    devices = set()
+    for endstation in lc.beamlines:
+        path = lc.active_path(endstation)
+        devices.update(dev.name for dev in path.devices)
+    assert devices == set(db)
+    # With every device removed, beam stays on the source branch
+    source = cfg['sources'][0]
+    assert not lc.active_path(source).blocking_devices
+    for endstation in set(lc.beamlines) - {source}:
+        imped = lc.active_path(endstation).impediment
+        assert imped.name.startswith(('xtl', 'lod'))
+
+
+def test_realistic_facility(tmp_path: Path):
+    db, cfg = make_facility(n_devices=300, branching=3, branch_length=10,
+                            n_sources=3, depth=3, merge=0.5, dangling=0.2,
+                            seed=2)
+    assert len(db) == 300
+    assert cfg['sources'] == ['S0', 'S1', 'S2']
+    # Devices with branches no other device uses
+    branches = set(cfg['beamlines'])
+    assert any(not set(entry['input_branches']) <= branches
+               for entry in db.values())
+    assert any(not set(entry['output_branches']) <= branches
+               for entry in db.values())
+    assert any(entry['device_class'] == 'lightpath.mock_devices.LODCM'
+               for entry in db.values())
+
+    write_facility(tmp_path / 'db.json', db, cfg=cfg)
+    lc = load_controller(None, None, tmp_path / 'db.yml')
+    assert lc.index.acyclic
+    assert lc.sources == {'source_S0', 'source_S1', 'source_S2'}
+    # Every endstation is reachable, some from more than one branch
+    n_paths = [len(lc.get_paths(endstation)) for endstation in lc.beamlines]
+    assert min(n_paths) == 1
+    assert max(n_paths) > 1
+    # Branches several levels below a source
+    longest = max((lc.active_path(endstation) for endstation in lc.beamlines),
+                  key=lambda path: sum(len(dev.output_branches) > 1
+                                       for dev in path.devices))
+    assert sum(len(dev.output_branches) > 1 for dev in longest.devices) > 1
+
+
+def test_cli_synthetic(tmp_path: Path):
+    output = tmp_path / 'facility.json'
+    with cli_args(['lightpath', 'synthetic', '--devices', '80',
+                   '--sources', '2', '--depth', '2', '--output',
+                   str(output)]):
+        entrypoint()
+
+    assert len(json.loads(output.read_text())) == 80
+    with open(tmp_path / 'facility.yml') as f:
+        cfg = yaml.safe_load(f)
+    assert cfg['sources'] == ['S0', 'S1']
+    assert Path(cfg['db']) == output.resolve()
+
+
+def test_make_facility_invalid():
+    with pytest.raises(ValueError):
+        make_facility(branching=1)
+    with pytest.raises(ValueError):
+        make_facility(n_sources=0)
+    with pytest.raises(ValueError):
+        make_facility(n_devices=10, branch_length=0.5)
@@ -3,11 +3,13 @@ from unittest.mock import Mock
 import pytest
 from ophyd import Device
 from pytestqt.qtbot import QtBot
+from qtpy.QtGui import QColor
 
 from lightpath import BeamPath
+from lightpath.path import DeviceState
 from lightpath.ui import LightRow
-from lightpath.ui.widgets import (state_colors, symbol_for_device,
-                                  to_stylesheet_color)
+from lightpath.ui.widgets import (PixmapCache, pixmap_cache, state_colors,
+                                  symbol_for_device, to_stylesheet_color)
 
 
 @pytest.fixture(scope='function')
@@ -17,15 +19,18 @@ def lightrow(path: BeamPath, qtbot: QtBot):
     qtbot.addWidget(w)
     # Replace Update functions with mocks
     setattr(w.state_label, 'setText', Mock())
-    return w
+    yield w
+    w.clear_sub()
 
 
 def test_widget_updates(lightrow: LightRow, path: BeamPath, qtbot: QtBot):
     # inserted device may still permit beam
     ipimb = path.path[5]
     ipimb_row = LightRow(ipimb, path)
+    qtbot.addWidget(ipimb_row)
     # Insert valve downstream of ipimb
     valve10_row = LightRow(path.path[10], path)
+    qtbot.addWidget(valve10_row)
     valve10_row.device.insert()
     # Toggle device to trigger callbacks
     ipimb.insert()
@@ -66,9 +71,11 @@ def test_widget_updates(lightrow: LightRow, path: BeamPath, qtbot: QtBot):
 
     # Check that callbacks have been called
     assert lightrow.state_label.setText.called
+    ipimb_row.clear_sub()
+    valve10_row.clear_sub()
 
 
-def test_widget_icon(lightrow: LightRow):
+def test_widget_icon(lightrow: LightRow, qtbot: QtBot):
     assert symbol_for_device(lightrow.device) == lightrow.device._icon
     # Smoke test a device without an icon
     device = Device(name='test')
@@ -76,4 +83,52 @@ def test_widget_icon(lightrow: LightRow):
     # Smoke test a device with a malformed icon
     device._icon = 'definetly not an icon'
     lr = LightRow(device, lightrow.path)
+    qtbot.addWidget(lr)
     lr.update_state()
+
+
+def test_pixmap_cache(qtbot: QtBot):
+    cache = PixmapCache(maxsize=2)
+    color = state_colors['removed']
+    first = cache.get('fa5s.adjust', color, 20, 20)
+    assert cache.get('fa5s.adjust', QColor(color), 20, 20) is first
+    assert (cache.hits, cache.misses) == (1, 1)
+    # Any of symbol, color or size is a new image
+    cache.get('fa5s.adjust', state_colors['blocking'], 20, 20)
+    cache.get('fa5s.adjust', color, 15, 15)
+    assert cache.misses == 3
+    # Least recently used is dropped
+    assert len(cache) == 2
+    assert cache.get('fa5s.adjust', color, 20, 20) is not first
+
+
+def test_rows_share_pixmaps(path: BeamPath, qtbot: QtBot):
+    rows = [LightRow(device, path) for device in path.path[:3]]
+    for row in rows:
+        qtbot.addWidget(row)
+    pixmap_cache.clear()
+    misses = pixmap_cache.misses
+    for _ in range(2):
+        for row in rows:
+            row.device_drawing.setColor(state_colors['removed'])
+    # One rendering per symbol and size
+    symbols = {row.device_drawing.symbol for row in rows}
+    assert pixmap_cache.misses - misses == len(symbols)
+    for row in rows:
+        row.clear_sub()
+
+
+def test_set_device(lightrow: LightRow, path: BeamPath, qtbot: QtBot):
+    old = lightrow.device
+    device = path.path[5]
+    lightrow.set_device(device, path)
+    assert lightrow.device is device
+    assert lightrow.device_drawing.symbol == symbol_for_device(device)
+    # The row follows its new device, and not the previous one
+    with qtbot.waitSignal(lightrow.device_updated):
+        device.insert()
+    with qtbot.assertNotEmitted(lightrow.device_updated, wait=0):
+        old.insert()
+    lightrow.update_state()
+    assert lightrow.last_state is DeviceState.Inserted
+    device.remove()
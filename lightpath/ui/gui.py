@@ -1,29 +1,33 @@
 """
 Full Application for Lightpath
 """
-import contextlib
+import bisect
 import logging
+import math
 import os.path
 import threading
-from functools import partial
 
 import numpy as np
-import qtawesome as qta
 import typhos
 from pydm import Display
-from qtpy.QtCore import Qt
+from qtpy.QtCore import Qt, Signal
 from qtpy.QtCore import Slot as pyqtSlot
-from qtpy.QtGui import QColor
-from qtpy.QtWidgets import (QApplication, QCheckBox, QDialog, QGridLayout,
-                            QHBoxLayout, QLabel, QVBoxLayout)
+from qtpy.QtGui import QKeySequence
+from qtpy.QtWidgets import (QCheckBox, QGridLayout, QHBoxLayout, QProgressBar,
+                            QShortcut)
 from typhos import TyphosDeviceDisplay
 
+from lightpath.instrumentation import timed, timings
 from lightpath.path import DeviceState
 
-from .widgets import LightRow
+from .widgets import (BeamlineModel, BeamlineOverview, BeamlineStrip,
+                      DeviceFilterModel, read_state, state_color)
 
 logger = logging.getLogger(__name__)
 
+# Marks rows that have not been drawn for the current path
+_UNPAINTED = object()
+
 
 class LightApp(Display):
     """
@@ -46,38 +50,79 @@ class LightApp(Display):
 
     parent : optional
     """
+    path_updated = Signal(object, object)
+    # Device whose state changed, from the thread of the update
+    device_changed = Signal(object)
+    # (load token, devices, devices loaded, devices to load)
+    devices_loaded = Signal(int, object, int, int)
+    # (load token, path or None on failure)
+    path_loaded = Signal(int, object)
+    # Window (s) over which bursts of path changes are drawn once
+    path_update_window = 0.05
+    # Devices instantiated between progress updates while loading a path
+    load_chunk_size = 8
+
     def __init__(self, controller, beamline=None,
                  parent=None, dark=True):
         super().__init__(parent=parent)
         # Store Lightpath information
-        self.loading_splash = LoadingSplash(parent=self)
         self.light = controller
         self.path = None
         self.detail_screen = None
         self.device_buttons = dict()
-        self._lock = threading.Lock()
-        self._prev_block = None
-        # Create empty layout
+        self._lock = threading.RLock()
+        # Paths are loaded in the background, the latest request is shown
+        self._load_lock = threading.Lock()
+        self._load_token = 0
+        self._shown_token = 0
+        self.load_progress = QProgressBar()
+        self.load_progress.setFormat('Loading %v/%m devices')
+        self.load_progress.hide()
+        self.header_layout.addWidget(self.load_progress)
+        # Impediment last drawn
+        self._prev_block = _UNPAINTED
+        self._row_z = []
+        # Devices followed for the overview
+        self._watched = []
+        # Devices of the path, all drawn by the overview.  Those not
+        # filtered out are shown by a strip of rows created only for the
+        # devices in view
+        self.model = BeamlineModel(self)
+        self.filter_model = DeviceFilterModel(self.model, self)
+        self.strip = BeamlineStrip(self.filter_model)
+        self.beamline_overview = BeamlineOverview(self.model)
+        # Create layout
         self.lightLayout = QHBoxLayout()
         self.lightLayout.setSpacing(1)
+        self.lightLayout.setContentsMargins(0, 0, 0, 0)
+        self.lightLayout.addWidget(self.strip)
         self.widget_rows.setLayout(self.lightLayout)
+        # The strip scrolls itself
+        self.scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
         self.device_types.setLayout(QGridLayout())
         self.device_types.layout().setVerticalSpacing(2)
         self.overview.setLayout(QHBoxLayout())
-        self.overview.layout().setSpacing(4)
         self.overview.layout().setContentsMargins(2, 2, 2, 2)
+        self.overview.layout().addWidget(self.beamline_overview)
         # Setup the fancy overview slider
-        slide_scroll = self.scroll.horizontalScrollBar()
+        slide_scroll = self.strip.scrollbar
         self.slide.setRange(slide_scroll.minimum(),
                             slide_scroll.maximum())
         self.slide.sliderMoved.connect(slide_scroll.setSliderPosition)
         slide_scroll.rangeChanged.connect(self.slide.setRange)
+        slide_scroll.rangeChanged.connect(self.resizeSlider)
         slide_scroll.valueChanged.connect(self.slide.setSliderPosition)
         # Add destinations
         for line in self.destinations():
             self.destination_combo.addItem(line)
 
         # Connect signals to slots
+        self.path_updated.connect(self._update_from_path)
+        self.devices_loaded.connect(self._show_devices)
+        self.path_loaded.connect(self._show_path)
+        self.device_changed.connect(self._update_device, Qt.QueuedConnection)
+        self.strip.device_clicked.connect(self.show_detailed)
+        self.beamline_overview.device_clicked.connect(self.focus_on_device)
         self.destination_combo.currentIndexChanged.connect(self.change_path_display)
         self.device_combo.activated[str].connect(self.focus_on_device)
         self.impediment_button.pressed.connect(self.focus_on_device)
@@ -85,9 +130,9 @@ class LightApp(Display):
         self.remove_check.toggled.connect(self.filter)
         self.detail_hide.clicked.connect(self.hide_detailed)
         self.refresh_button.clicked.connect(self.change_path_display)
+        self.timings_shortcut = QShortcut(QKeySequence('Ctrl+Shift+T'), self)
+        self.timings_shortcut.activated.connect(self.dump_timings)
 
-        # Store LightRow objects to manage subscriptions
-        self.rows = list()
         # store device type filter widgets
         self._device_checkboxes = list()
         # Select the beamline to begin with
@@ -111,18 +156,12 @@ class LightApp(Display):
         All possible beamline destinations that have an associated path
         """
         return [line for line in self.light.beamlines.keys()
-                if self.light.beamlines[line]]
+                if self.light.has_paths(line)]
 
-    def load_device_row(self, device):
-        """
-        Create LightRow for device
-        """
-        # Create two widgets
-        widgets = (LightRow(device, self.path),
-                   LightRow(device, self.path))
-        # Condense the second
-        widgets[1].condense()
-        return widgets
+    @property
+    def rows(self):
+        """LightRow widgets showing the devices in view"""
+        return self.strip.rows
 
     def select_devices(self, beamline):
         """
@@ -136,13 +175,21 @@ class LightApp(Display):
         upstream : bool, optional
             Include upstream devices in the display
         """
-        # Clear any remaining subscriptions
-        if self.path:
-            self.clear_subs()
-        # Find pool of devices and create subscriptions
-        self.path = self.light.active_path(beamline)
-        # Defer running updates until UI is created
-        self.path.subscribe(self.update_path, run=False)
+        return self._select_path(self.light.active_path(beamline))
+
+    def _select_path(self, path):
+        """Subscribe to a path and make it the displayed one"""
+        if path is not self.path:
+            # Subscribe before clearing the previous path, so devices shared
+            # by both stay connected
+            old_path, self.path = self.path, path
+            # Defer running updates until UI is created
+            self.path.subscribe(self._path_changed, run=False,
+                                coalesce=self.path_update_window)
+            # Clear any remaining subscriptions
+            if old_path:
+                old_path.clear_sub(self._path_changed)
+                old_path.clear_device_subs()
         logger.debug("Selected %s devices ...", len(self.path.path))
         return self.path.path
 
@@ -202,83 +249,146 @@ class LightApp(Display):
     def change_path_display(self, value=None):
         """
         Change the display devices based on the state of the control buttons
+
+        The path is resolved and its devices instantiated in a background
+        thread.  Rows for devices on every path to the beamline are shown as
+        the devices become ready, the rest once the active path is known.
+
+        Returns
+        -------
+        threading.Thread
+            the thread loading the path
         """
-        with self._lock, self.open_splash(f'{self.selected_beamline()} path'):
+        beamline = self.selected_beamline()
+        with self._lock:
             logger.debug("Resorting beampath display ...")
+            self._load_token += 1
+            token = self._load_token
             # Remove old detailed screen
             self.hide_detailed()
+            self._clear_rows()
+            # Busy until the number of devices is known
+            self.load_progress.setRange(0, 0)
+            self.load_progress.show()
+        thread = threading.Thread(target=self._load_path,
+                                  args=(token, beamline),
+                                  name='lightpath_load', daemon=True)
+        thread.start()
+        return thread
 
-            # Clear layout if previously loaded rows exist
-            if self.rows:
-                # Clear our subscribtions
-                logger.debug('clear existing subscriptions')
-                for row in self.rows:
-                    # Remove from layout
-                    self.lightLayout.removeWidget(row[0])
-                    self.overview.layout().removeWidget(row[1])
-                    # Disconnect
-                    for widget in row:
-                        widget.clear_sub()
-                        widget.deleteLater()
-                # Clear subscribed row cache
-                self.rows.clear()
-                self.device_combo.clear()
-                self.upstream_device_combo.clear()
-
-            # Grab all the light rows (self.path set here)
-            rows = [self.load_device_row(d)
-                    for d in self.select_devices(self.selected_beamline())]
-            # Add all the widgets to the display
-            logger.debug('Add widgets to display')
-            for i, row in enumerate(rows):
-                # Cache row to later clear subscriptions
-                self.rows.append(row)
-                # Add widget to layout
-                self.lightLayout.addWidget(row[0])
-                self.overview.layout().addWidget(row[1])
-                # Connect condensed widget to focus_on_device
-                row[1].device_drawing.clicked.connect(
-                    partial(self.focus_on_device, name=row[1].device.name)
-                )
-                # Connect large widget to show Typhos screen
-                row[0].device_drawing.clicked.connect(
-                    partial(self.show_detailed, row[0].device)
-                )
-                # Add device to combo
-                self.device_combo.addItem(row[0].device.name)
-                self.upstream_device_combo.addItem(row[0].device.name)
-        # Initialize interface
+    @property
+    def loading(self):
+        """Whether a path is being loaded in the background"""
+        return self._shown_token != self._load_token
+
+    def _load_path(self, token, beamline):
+        """
+        Instantiate the devices of a beamline and find its active path, run
+        in a background thread.  Gives up as soon as a newer load starts
+        """
+        # One load at a time, controller state is not shared across threads
+        with self._load_lock:
+            path = None
+            try:
+                names = self.light.device_names(beamline)
+                # Devices on every path are shown whichever path is active
+                common = set(names[0]).intersection(*names[1:]) if names \
+                    else set()
+                ordered = list(dict.fromkeys(name for path_names in names
+                                             for name in path_names))
+                for start in range(0, len(ordered), self.load_chunk_size):
+                    if token != self._load_token:
+                        return
+                    chunk = ordered[start:start + self.load_chunk_size]
+                    loaded = self.light.preload_devices(chunk)
+                    self.devices_loaded.emit(
+                        token,
+                        [loaded[name] for name in chunk
+                         if name in common and name in loaded],
+                        start + len(chunk), len(ordered)
+                    )
+                if token != self._load_token:
+                    return
+                path = self.light.active_path(beamline)
+            except Exception:
+                logger.exception("Unable to load the path to %s", beamline)
+            self.path_loaded.emit(token, path)
+
+    def _clear_rows(self):
+        """Empty the display, rows are kept by the strip for reuse"""
+        self.strip.path = None
+        self.model.set_devices([])
+        self._prev_block = _UNPAINTED
+        self.device_combo.clear()
+        self.upstream_device_combo.clear()
+
+    def _show_devices(self, token, devices, done, total):
+        """Show rows for devices as they are instantiated"""
+        if token != self._load_token:
+            return
+        with self._lock:
+            self.load_progress.setRange(0, total)
+            self.load_progress.setValue(done)
+            self.model.append_devices(devices)
+
+    def _show_path(self, token, path):
+        """Display a path once it has been loaded"""
+        if token != self._load_token:
+            return
+        self._shown_token = token
+        self.load_progress.hide()
+        if path is None:
+            return
+        with self._lock:
+            self._clear_rows()
+            # self.path set here
+            devices = self._select_path(path)
+            self._watch_devices(devices)
+            # The strip creates rows for the devices in view
+            logger.debug('Add devices to display')
+            self.strip.path = self.path
+            self.model.set_devices(devices)
+            names = [device.name for device in devices]
+            self.device_combo.addItems(names)
+            self.upstream_device_combo.addItems(names)
+        # Initialize interface from the reading taken when subscribing
+        snapshot = self.path.last_snapshot or self.path.snapshot()
+        for row, device in enumerate(devices):
+            self.model.set_color(row, state_color(device, snapshot))
         for row in self.rows:
-            for widget in row:
-                widget.update_state()
+            row.update_state(snapshot=snapshot)
         # Update the state of the path
-        self.update_path()
+        self.update_path(snapshot=snapshot)
         # Update device type checkboxes
         self.update_device_types()
         # re-filter based on present settings
         self.filter()
         self.setWindowTitle(f'Lightpath - {self.selected_beamline()}')
 
-    @contextlib.contextmanager
-    def open_splash(self, msg: str):
-        """
-        Context manager for opening the loading splash screen, and
-        closing it always
+    def _watch_devices(self, devices):
+        """Follow the state of each device, to color the overview"""
+        for device in self._watched:
+            device.lightpath_summary.clear_sub(self._device_moved)
+        self._watched = list(devices)
+        for device in self._watched:
+            try:
+                device.lightpath_summary.subscribe(self._device_moved,
+                                                   run=False)
+            except Exception:
+                logger.error("Unable to subscribe to device %s",
+                             device.name)
 
-        Parameters
-        ----------
-        msg : str
-            message to show in the loading screen
-        """
-        try:
-            self.loading_splash.move(self.geometry().center()
-                                     - self.loading_splash.rect().center())
-            self.loading_splash.show()
-            self.loading_splash.update_status(msg)
-            yield
+    def _device_moved(self, *args, obj=None, **kwargs):
+        if obj is not None:
+            self.device_changed.emit(obj.parent)
 
-        finally:
-            self.loading_splash.hide()
+    def _update_device(self, device):
+        """Recolor a device in the overview"""
+        row = self.model.row_of(device)
+        if row is None or self.path is None or self.loading:
+            return
+        snapshot = self.path.last_snapshot or self.path.snapshot()
+        self.model.set_color(row, state_color(device, snapshot))
 
     def ui_filename(self):
         """
@@ -293,12 +403,33 @@ class LightApp(Display):
         return os.path.join(os.path.dirname(os.path.abspath(__file__)),
                             self.ui_filename())
 
-    def update_path(self, *args, **kwargs):
+    def _path_changed(self, *args, obj=None, snapshot=None, **kwargs):
+        """
+        BeamPath callback, run from the thread delivering the device update.
+        Defers the display update to the Qt thread
+        """
+        self.path_updated.emit(obj, snapshot)
+
+    def _update_from_path(self, path, snapshot):
+        # Ignore updates queued for a path we are no longer displaying
+        if path is self.path and not self.loading:
+            self.update_path(snapshot=snapshot)
+
+    @timed()
+    def update_path(self, *args, snapshot=None, **kwargs):
         """
         Update the PyDMRectangles to show devices as in the beam or not
+
+        Parameters
+        ----------
+        snapshot : PathSnapshot, optional
+            Snapshot delivered with the path change event.  The path is read
+            again if not provided
         """
         with self._lock:
-            block = self.path.impediment
+            if snapshot is None:
+                snapshot = self.path.snapshot()
+            block = snapshot.impediment
             # Set the current impediment label
             if block:
                 self.current_impediment.setText(block.name)
@@ -306,32 +437,59 @@ class LightApp(Display):
             else:
                 self.current_impediment.setText('None')
                 self.impediment_button.setEnabled(False)
-            for row in self.rows:
-                device = row[0].device
-                # If our device is before or at the impediment, it is lit
-                if not block or (device.md.z <= block.md.z):
-                    _in = True
-                    # Check whether this device is passing beam
-                    _out = block != device
-                # Otherwise, it is off
-                else:
-                    _in, _out = (False, False)
-                # Update widget display
-                for widget in row:
-                    widget.update_light(_in, _out)
-                    # Reconsider blocking device state
-                    if (device is self._prev_block or device is block):
-                        widget.update_state()
+            devices = self.model.devices
+            if self._prev_block is _UNPAINTED:
+                # Devices changed, draw them all
+                self._row_z = [device.md.z for device in devices]
+                changed = range(len(devices))
+            else:
+                changed = self._rows_between(self._prev_block, block)
+            for row in changed:
+                # Lit if our device is before or at the impediment, passing
+                # beam if it is not the impediment itself
+                self.model.set_light(
+                    row, *snapshot.beam_indicators(devices[row])
+                )
+            # Reconsider blocking device state
+            for device in {self._prev_block, block}:
+                row = self.model.row_of(device)
+                if row is None:
+                    continue
+                self.model.set_color(row, state_color(device, snapshot))
+                widget = self.strip.row_for(device)
+                if widget is not None:
+                    widget.update_state(snapshot=snapshot)
 
             self._prev_block = block
 
+    def _rows_between(self, old_block, new_block):
+        """
+        Rows of the model whose beam indicators may differ between two
+        impediments, those from the upstream to the downstream one.  Rows
+        are ordered by z
+        """
+        if old_block is new_block:
+            return range(0)
+        old_z, new_z = (math.inf if block is None else block.md.z
+                        for block in (old_block, new_block))
+        start = bisect.bisect_left(self._row_z, min(old_z, new_z))
+        end = bisect.bisect_right(self._row_z, max(old_z, new_z))
+        return range(start, end)
+
+    def dump_timings(self):
+        """Log the timings recorded by :mod:`lightpath.instrumentation`"""
+        if not timings.enabled:
+            logger.info("Timings are disabled, launch with --timings to "
+                        "record them")
+            return
+        logger.info("Lightpath timings (ms):\n%s", timings.format_report())
+
     def _destroy_lightpath_summary_signals(self, *args, **kwargs):
         """ Update all widgets in rows """
         # destroy all signals
         logger.debug('destroying all lightpath_summary signals')
-        for row in self.rows:
-            row[0].device.lightpath_summary.destroy()
-            row[1].device.lightpath_summary.destroy()
+        for device in self.model.devices:
+            device.lightpath_summary.destroy()
 
     @pyqtSlot()
     @pyqtSlot(str)
@@ -340,7 +498,8 @@ class LightApp(Display):
         # If not provided a name, use the impediment
         name = name or self.current_impediment.text()
         # Map of names
-        names = [row[0].device.name for row in self.rows]
+        devices = self.model.devices
+        names = [device.name for device in devices]
         # Find index
         try:
             idx = names.index(name)
@@ -348,9 +507,11 @@ class LightApp(Display):
             logger.error("Can not set focus on device %r",
                          name)
             return
-        # Grab widget
-        self.rows[idx][0].setHidden(False)
-        self.scroll.ensureWidgetVisible(self.rows[idx][0])
+        # Show the device, even if filtered out
+        self.filter_model.set_hidden(self.filter_model.hidden
+                                     - {devices[idx]})
+        row = self.filter_model.mapFromSource(self.model.index(idx, 0))
+        self.strip.ensure_visible(row.row())
 
     @pyqtSlot(str)
     def update_upstream(self, name=None):
@@ -359,26 +520,30 @@ class LightApp(Display):
     @pyqtSlot(bool)
     def filter(self, *args):
         """Hide devices along the beamline for a more succinct view"""
+        if self.loading:
+            return
         # grab device z from upstream combo
         upstream_device = self.selected_upstream_from()
         upstream_device_z = self.light.get_device(upstream_device).md.z
-        for row in self.rows:
-            device = row[0].device
+        snapshot = self.path.last_snapshot or self.path.snapshot()
+        hidden = set()
+        for device in self.model.devices:
             # Hide if a hidden instance of a device type
             hidden_device_type = any([device.__module__ == dtype
                                       for dtype in self.hidden_devices])
             # Hide if removed (checked if showing removed devices)
             hidden_removed = (not self.remove_check.isChecked()
-                              and row[0].last_state == DeviceState.Removed)
+                              and read_state(device, snapshot)
+                              == DeviceState.Removed)
             # Hide if upstream
             # TODO: This now looks at the whole active path, which includes
             # upstream devices.  Need to figure out how best to define
             # "upstream" devices now.  Possibly by branch name?
             hidden_upstream = (device.md.z < upstream_device_z)
             # Hide device if any of the criteria are met
-            row[0].setHidden(hidden_device_type
-                             or hidden_removed
-                             or hidden_upstream)
+            if hidden_device_type or hidden_removed or hidden_upstream:
+                hidden.add(device)
+        self.filter_model.set_hidden(hidden)
         # Change the slider size to match changing view
         self.resizeSlider()
 
@@ -386,8 +551,9 @@ class LightApp(Display):
         """
         Clear BeamPath-related subscription events
         """
-        self.path.clear_sub(self.update_path)
+        self.path.clear_sub(self._path_changed)
         self.path.clear_device_subs()
+        self._watch_devices([])
 
     @pyqtSlot()
     def show_detailed(self, device):
@@ -418,9 +584,10 @@ class LightApp(Display):
             self.detail_screen.deleteLater()
             self.detail_screen = None
 
-    def resizeSlider(self):
+    def resizeSlider(self, *args):
         # Visible area of beamline
-        visible = self.scroll.width() / self.scroll.widget().width()
+        count = self.filter_model.rowCount()
+        visible = len(self.rows) / count if count else 1
         # Take same fraction of bar up in handle width
         slider_size = round(self.slide.width() * visible)
         # Set Stylesheet
@@ -440,32 +607,12 @@ class LightApp(Display):
         self.resizeSlider()
 
     def closeEvent(self, a0) -> None:
+        # Abandon any path being loaded
+        self._load_token += 1
+        # Drop path and row subscriptions, including pending coalesced
+        # updates, so no callbacks reach widgets that are being destroyed
+        if self.path:
+            self.clear_subs()
+        self.strip.clear_subs()
         self._destroy_lightpath_summary_signals()
         return super().closeEvent(a0)
-
-
-class LoadingSplash(QDialog):
-    """ simple loading splash screen """
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.setWindowFlags(Qt.Window | Qt.FramelessWindowHint)
-
-        self.setStyleSheet("QDialog { border: 2px solid; "
-                           "border-color:#00ffff }")
-        layout = QVBoxLayout()
-        self.setLayout(layout)
-
-        self.status_display = QLabel()
-        loading = QLabel()
-        loading_icon = qta.icon('ri.loader-2-fill', color=QColor(0, 176, 255))
-        loading.setPixmap(loading_icon.pixmap(self.height(), self.height()))
-
-        status_layout = QHBoxLayout()
-        status_layout.addWidget(self.status_display)
-        status_layout.addWidget(loading)
-
-        layout.addLayout(status_layout)
-
-    def update_status(self, msg):
-        self.status_display.setText(f"Loading: {msg}")
-        QApplication.instance().processEvents()
@@ -2,16 +2,23 @@
 Definitions for Lightpath Widgets
 """
 import logging
+import math
 import os.path
+from collections import OrderedDict
+from typing import Optional
 
 import qtawesome as qta
 from pydm import Display
-from qtpy.QtCore import Signal
-from qtpy.QtGui import QBrush, QColor
-from qtpy.QtWidgets import QLabel
+from qtpy.QtCore import (QAbstractListModel, QCoreApplication, QModelIndex,
+                         QPointF, QRect, QRectF, QSize,
+                         QSortFilterProxyModel, Qt, Signal)
+from qtpy.QtGui import QBrush, QColor, QPainter, QPixmap
+from qtpy.QtWidgets import (QHBoxLayout, QLabel, QScrollBar, QSizePolicy,
+                            QVBoxLayout, QWidget)
 from typhos.utils import clean_name
 
-from lightpath.path import DeviceState, find_device_state
+from lightpath.instrumentation import timed
+from lightpath.path import DeviceState, PathSnapshot, find_device_state
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +34,79 @@ state_colors = {
 }
 
 
+# Brushes of the beam indicators, shared by every row
+beam_brushes = {
+    True: QBrush(QColor('#00ffff')),  # lit (cyan)
+    False: QBrush(QColor('#a0a0a4')),  # unlit (grey)
+}
+
+
+class PixmapCache:
+    """
+    Bounded cache of rendered icons, keyed by symbol, color and size
+
+    Only a handful of distinct icons are drawn, one per device symbol and
+    state color, so rows share the pixmaps rather than rendering the icon
+    font on every update.  The least recently used pixmap is dropped once
+    ``maxsize`` are held.  Only used from the Qt thread.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        maximum number of pixmaps to keep
+    """
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._pixmaps: OrderedDict[tuple, QPixmap] = OrderedDict()
+
+    def __len__(self):
+        return len(self._pixmaps)
+
+    def get(self, symbol: str, color, width: int, height: int) -> QPixmap:
+        """
+        Pixmap of a ``qtawesome`` icon, rendered on first request
+
+        Parameters
+        ----------
+        symbol : str
+            name of the icon
+
+        color : QColor
+            color of the icon
+
+        width : int
+
+        height : int
+
+        Returns
+        -------
+        QPixmap
+            the rendered icon
+        """
+        key = (symbol, QColor(color).rgba(), width, height)
+        pixmap = self._pixmaps.get(key)
+        if pixmap is not None:
+            self.hits += 1
+            self._pixmaps.move_to_end(key)
+            return pixmap
+        self.misses += 1
+        pixmap = qta.icon(symbol, color=color).pixmap(width, height)
+        self._pixmaps[key] = pixmap
+        if len(self._pixmaps) > self.maxsize:
+            self._pixmaps.popitem(last=False)
+        return pixmap
+
+    def clear(self) -> None:
+        """Drop every pixmap"""
+        self._pixmaps.clear()
+
+
+#: Pixmaps shared by every :class:`DeviceWidget`
+pixmap_cache = PixmapCache()
+
+
 def to_stylesheet_color(color):
     """Utility to convert QColor to stylesheet specification"""
     return 'rgb({!r}, {!r}, {!r})'.format(color.red(),
@@ -49,6 +129,35 @@ def symbol_for_device(device):
     return symbol
 
 
+def read_state(device, snapshot: PathSnapshot) -> DeviceState:
+    """State of a device, read from the snapshot where possible"""
+    if device in snapshot:
+        return snapshot.state_of(device)
+    return find_device_state(device)[0]
+
+
+def state_color(device, snapshot: PathSnapshot) -> QColor:
+    """
+    Color of the icon of a device, given its state and the path status.
+    See :meth:`LightRow.get_state_color`
+    """
+    device_state = read_state(device, snapshot)
+
+    if device_state is DeviceState.Disconnected:
+        return state_colors['disconnected']
+    if device_state is DeviceState.Error:
+        return state_colors['error']
+    if device_state is DeviceState.Inserted:
+        if device not in snapshot.blocking_devices:
+            return state_colors['half_removed']
+        else:
+            return state_colors['blocking']
+    if device_state is DeviceState.Removed:
+        return state_colors['removed']
+
+    return state_colors['unknown']
+
+
 class InactiveRow(Display):
     """
     Inactive row for happi container
@@ -57,16 +166,20 @@ class InactiveRow(Display):
         super().__init__(parent=parent)
         self.device = device
         self.path = path
+        self.device_drawing = DeviceWidget(device)
+        self.horizontalWidget.layout().insertWidget(1, self.device_drawing)
+        self._show_device()
+
+    def _show_device(self):
+        """Label the row with our device, marked as Disconnected"""
         # Initialize prior state variable
         self.last_state = DeviceState.Disconnected
         # Create labels
-        self.name_label.setText(clean_name(device, strip_parent=False))
-        self.prefix_label.setText(f'({device.prefix})')
+        self.name_label.setText(clean_name(self.device, strip_parent=False))
+        self.prefix_label.setText(f'({self.device.prefix})')
         # By default we mark the device as Disconnected
         self.state_label.setText('Disconnected')
         self.state_label.setStyleSheet("QLabel {color : rgb(255,0,255)}")
-        self.device_drawing = DeviceWidget(device)
-        self.horizontalWidget.layout().insertWidget(1, self.device_drawing)
 
     def ui_filename(self):
         """
@@ -124,9 +237,18 @@ class LightRow(InactiveRow):
 
     def __init__(self, device, path, parent=None):
         super().__init__(device, path, parent=parent)
-        self.device_updated.connect(self.update_state)
-
-        # Subscribe device to state changes
+        # Beam indicators last drawn, unknown until the first update
+        self._lit = None
+        # State and color last drawn
+        self._drawn = None
+        # Queued, so the path has seen the update by the time we read it.
+        # Rows reused across paths subscribe before the path does
+        self.device_updated.connect(self.update_state, Qt.QueuedConnection)
+        self._subscribed = False
+        self._subscribe()
+
+    def _subscribe(self):
+        """Subscribe to state changes of our device"""
         try:
             # Wait for later to update widget
             logger.debug(f"Subscribing widget to device {self.device.name}")
@@ -134,14 +256,46 @@ class LightRow(InactiveRow):
                 self._update_from_device,
                 run=False
             )
+            self._subscribed = True
         except Exception:
             logger.error("Widget is unable to subscribe to device %s",
-                         device.name)
+                         self.device.name)
+
+    def set_device(self, device, path):
+        """
+        Show another device, as when the row is recycled by a
+        :class:`BeamlineStrip`.  The row subscribes to the new device, and
+        is redrawn by the next :meth:`.update_state` and
+        :meth:`.update_light`
+
+        Parameters
+        ----------
+        device : obj
+
+        path : BeamPath
+        """
+        self.path = path
+        if device is self.device and self._subscribed:
+            return
+        self.clear_sub()
+        self.device = device
+        self.device_drawing.symbol = symbol_for_device(device)
+        self._lit = None
+        self._drawn = None
+        self._show_device()
+        self._subscribe()
 
     def _update_from_device(self, *args, **kwargs):
         self.device_updated.emit()
 
-    def get_state_color(self) -> QColor:
+    def _read_state(self, snapshot: PathSnapshot) -> DeviceState:
+        """State of our device, read from the snapshot where possible"""
+        return read_state(self.device, snapshot)
+
+    def get_state_color(
+        self,
+        snapshot: Optional[PathSnapshot] = None
+    ) -> QColor:
         """
         Determine the icon color given the device state and path status
         If device is an impediment: state_color['blocking']
@@ -154,59 +308,77 @@ class LightRow(InactiveRow):
 
         Could take a color map in the future?  Colorblind support?
 
+        Parameters
+        ----------
+        snapshot : PathSnapshot, optional
+            Snapshot of the path to determine the color from.  A new one is
+            taken if not provided
+
         Returns
         -------
         QColor
             the color to apply to the icon
         """
-        device_state, _ = find_device_state(self.device)
-        blocking_devices = self.path.blocking_devices
-
-        if device_state is DeviceState.Disconnected:
-            return state_colors['disconnected']
-        if device_state is DeviceState.Error:
-            return state_colors['error']
-        if device_state is DeviceState.Inserted:
-            if self.device not in blocking_devices:
-                return state_colors['half_removed']
-            else:
-                return state_colors['blocking']
-        if device_state is DeviceState.Removed:
-            return state_colors['removed']
-
-        return state_colors['unknown']
-
-    def update_state(self, *args, **kwargs):
+        if snapshot is None:
+            snapshot = self.path.snapshot()
+        return state_color(self.device, snapshot)
+
+    @timed()
+    def update_state(
+        self,
+        *args,
+        snapshot: Optional[PathSnapshot] = None,
+        **kwargs
+    ):
         """
         Update the state label
 
         Icon color is determined by ``LightRow.get_state_color()``.
+
+        Parameters
+        ----------
+        snapshot : PathSnapshot, optional
+            Snapshot of the path to read the device state from.  Defaults to
+            the snapshot the path maintains while subscribed, or a new one
         """
+        if snapshot is None:
+            if self.path is None:
+                # Shown while the path is loading, updated once it is known
+                return
+            snapshot = self.path.last_snapshot or self.path.snapshot()
         # Interpret state
-        self.last_state = find_device_state(self.device)[0]
+        self.last_state = self._read_state(snapshot)
+        color = self.get_state_color(snapshot=snapshot)
+        # Only repaint if the state or color changed
+        drawn = (self.last_state, color.rgba())
+        if drawn == self._drawn:
+            return
+        self._drawn = drawn
         # Set label to state description
         self.state_label.setText(self.last_state.name)
-        color = self.get_state_color()
         style_color = to_stylesheet_color(color)
         style_sheet = "QLabel {color: %s}" % style_color
         self.state_label.setStyleSheet(style_sheet)
         self.device_drawing.setColor(color)
 
     def update_light(self, _in, _out):
-        """Update the light beams striking and emitting from the device"""
+        """
+        Update the light beams striking and emitting from the device.
+        Indicators are only repainted if they change
+        """
+        if (_in, _out) == self._lit:
+            return
+        self._lit = (_in, _out)
         for (widget, state) in zip((self.beam_indicator, self.out_indicator),
                                    (_in, _out)):
-            # Set color
-            if state:
-                widget.brush = QBrush(QColor('#00ffff'))
-            else:
-                widget.brush = QBrush(QColor('#a0a0a4'))
+            widget.brush = beam_brushes[bool(state)]
 
     def clear_sub(self):
         """
         Clear the subscription event
         """
         self.device.lightpath_summary.clear_sub(self._update_from_device)
+        self._subscribed = False
 
 
 class DeviceWidget(QLabel):
@@ -236,18 +408,20 @@ class DeviceWidget(QLabel):
         self.setMaximumSize(50, 50)
         self.setStyleSheet('padding : 0px')
 
+    @timed()
     def setColor(self, color):
         """
         Set the color of the QIcon contained in the widget
         """
         try:
-            icon = qta.icon(self.symbol, color=color)
+            pixmap = pixmap_cache.get(self.symbol, color,
+                                      self.width(), self.height())
         # Capture any errors loading icons
         except Exception:
             logger.exception("Unable to load icon %r", self.symbol)
             return
         # Set the proper pixmap
-        self.setPixmap(icon.pixmap(self.width(), self.height()))
+        self.setPixmap(pixmap)
 
     def mousePressEvent(self, evt):
         """Catch mousePressEvent to emit "`clicked`" Signal"""
@@ -255,3 +429,368 @@ class DeviceWidget(QLabel):
         super().mousePressEvent(evt)
         # Emit click
         self.clicked.emit()
+
+
+class BeamlineModel(QAbstractListModel):
+    """
+    Devices along a beamline, with the state color and beam indicators each
+    is drawn with
+
+    Views hear of changes to single devices through ``dataChanged``, so only
+    the devices that changed are redrawn.  Only used from the Qt thread.
+    """
+    #: The ``ophyd.Device`` of a row
+    DeviceRole = Qt.UserRole
+    #: The ``QColor`` of the state of the device, None until it is known
+    ColorRole = Qt.UserRole + 1
+    #: The incoming and outgoing beam indicators of the device
+    LightRole = Qt.UserRole + 2
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._devices = []
+        self._colors = []
+        self._lights = []
+        # device -> row
+        self._rows = {}
+
+    @property
+    def devices(self):
+        """Devices of the model, in order"""
+        return list(self._devices)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._devices)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or index.row() >= len(self._devices):
+            return None
+        row = index.row()
+        if role == Qt.DisplayRole:
+            return self._devices[row].name
+        if role == self.DeviceRole:
+            return self._devices[row]
+        if role == self.ColorRole:
+            return self._colors[row]
+        if role == self.LightRole:
+            return self._lights[row]
+        return None
+
+    def set_devices(self, devices):
+        """Replace the devices of the model"""
+        self.beginResetModel()
+        self._devices = list(devices)
+        self._colors = [None] * len(self._devices)
+        self._lights = [(False, False)] * len(self._devices)
+        self._rows = {device: row for row, device in enumerate(self._devices)}
+        self.endResetModel()
+
+    def append_devices(self, devices):
+        """Add devices to the end of the model"""
+        devices = list(devices)
+        if not devices:
+            return
+        start = len(self._devices)
+        self.beginInsertRows(QModelIndex(), start, start + len(devices) - 1)
+        self._devices.extend(devices)
+        self._colors.extend([None] * len(devices))
+        self._lights.extend([(False, False)] * len(devices))
+        for row, device in enumerate(devices, start):
+            self._rows[device] = row
+        self.endInsertRows()
+
+    def row_of(self, device) -> Optional[int]:
+        """Row of a device, None if it is not in the model"""
+        return self._rows.get(device)
+
+    def set_color(self, row: int, color: QColor):
+        """Set the state color of a row, notifying views if it changed"""
+        if self._colors[row] is not None and self._colors[row] == color:
+            return
+        self._colors[row] = QColor(color)
+        self._changed(row, self.ColorRole)
+
+    def set_light(self, row: int, _in: bool, _out: bool):
+        """Set the beam indicators of a row, notifying views if they changed"""
+        light = (bool(_in), bool(_out))
+        if self._lights[row] == light:
+            return
+        self._lights[row] = light
+        self._changed(row, self.LightRole)
+
+    def _changed(self, row, role):
+        index = self.index(row, 0)
+        self.dataChanged.emit(index, index, [role])
+
+
+class DeviceFilterModel(QSortFilterProxyModel):
+    """
+    Devices of a :class:`BeamlineModel` that are not hidden
+
+    Parameters
+    ----------
+    model : BeamlineModel
+
+    parent : QObject, optional
+    """
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self._hidden = frozenset()
+        self.setSourceModel(model)
+
+    @property
+    def hidden(self):
+        """Devices filtered out of the model"""
+        return self._hidden
+
+    @property
+    def devices(self):
+        """Devices shown, in order"""
+        return [self.index(row, 0).data(BeamlineModel.DeviceRole)
+                for row in range(self.rowCount())]
+
+    def set_hidden(self, devices):
+        """Hide a set of devices, showing all others"""
+        hidden = frozenset(devices)
+        if hidden != self._hidden:
+            self._hidden = hidden
+            self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        index = self.sourceModel().index(source_row, 0, source_parent)
+        return index.data(BeamlineModel.DeviceRole) not in self._hidden
+
+
+class BeamlineStrip(QWidget):
+    """
+    Virtualized strip of :class:`LightRow` widgets for the devices of a model
+
+    Rows are only created for the devices that fit in the width of the
+    strip.  As the strip scrolls these are recycled, each showing the device
+    that takes its place, so the number of rows does not grow with the
+    length of the path.  Rows have a fixed width, :attr:`row_width`.
+
+    Parameters
+    ----------
+    model : QAbstractItemModel
+        model with the ``DeviceRole`` and ``LightRole`` of
+        :class:`BeamlineModel`
+
+    parent : QWidget, optional
+    """
+    device_clicked = Signal(object)
+    row_width = 170
+    spacing = 1
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent=parent)
+        self.model = model
+        self.path = None
+        # Every row created, the first _shown are bound to a device
+        self._rows = []
+        self._shown = 0
+        self.setMinimumWidth(self.row_width)
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
+        self.row_layout = QHBoxLayout()
+        self.row_layout.setSpacing(self.spacing)
+        self.row_layout.setContentsMargins(0, 0, 0, 0)
+        self.row_layout.addStretch()
+        self.scrollbar = QScrollBar(Qt.Horizontal)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addLayout(self.row_layout, 1)
+        layout.addWidget(self.scrollbar)
+        self.scrollbar.valueChanged.connect(self._bind_rows)
+        for signal in (model.modelReset, model.rowsInserted,
+                       model.rowsRemoved, model.layoutChanged):
+            signal.connect(self.relayout)
+        model.dataChanged.connect(self._data_changed)
+
+    @property
+    def rows(self):
+        """Rows currently showing a device, in order"""
+        return self._rows[:self._shown]
+
+    @property
+    def first(self) -> int:
+        """Row of the model shown first"""
+        return self.scrollbar.value()
+
+    def visible_count(self) -> int:
+        """Number of rows that fit in the width of the strip"""
+        pitch = self.row_width + self.spacing
+        return max(1, (self.width() + self.spacing) // pitch)
+
+    def row_for(self, device) -> Optional[LightRow]:
+        """Row showing a device, None if it is out of view"""
+        for row in self.rows:
+            if row.device is device:
+                return row
+        return None
+
+    def ensure_visible(self, row: int):
+        """Scroll the least needed to show a row of the model"""
+        first = self.first
+        if row < first:
+            self.scrollbar.setValue(row)
+        elif row >= first + self._shown:
+            self.scrollbar.setValue(row - self._shown + 1)
+
+    def relayout(self, *args):
+        """Fit rows to the width of the strip and the size of the model"""
+        count = self.model.rowCount()
+        self._shown = min(count, self.visible_count())
+        self.scrollbar.setPageStep(max(self._shown, 1))
+        self.scrollbar.setRange(0, count - self._shown)
+        self._bind_rows()
+
+    def _bind_rows(self, *args):
+        first = self.first
+        for idx in range(self._shown):
+            index = self.model.index(first + idx, 0)
+            device = index.data(BeamlineModel.DeviceRole)
+            if idx < len(self._rows):
+                row = self._rows[idx]
+                row.set_device(device, self.path)
+            else:
+                row = self._create_row(device)
+            row.update_light(*index.data(BeamlineModel.LightRole))
+            row.update_state()
+            row.show()
+        # Rows out of view are kept for reuse, without subscriptions
+        for row in self._rows[self._shown:]:
+            if not row.isHidden():
+                row.clear_sub()
+                row.hide()
+
+    def _create_row(self, device):
+        row = LightRow(device, self.path)
+        row.setFixedWidth(self.row_width)
+        row.device_drawing.clicked.connect(
+            lambda row=row: self.device_clicked.emit(row.device)
+        )
+        self.row_layout.insertWidget(len(self._rows), row)
+        self._rows.append(row)
+        return row
+
+    def _data_changed(self, top, bottom, roles=()):
+        if roles and BeamlineModel.LightRole not in roles:
+            return
+        first = self.first
+        for idx in range(max(top.row(), first),
+                         min(bottom.row() + 1, first + self._shown)):
+            index = self.model.index(idx, 0)
+            self._rows[idx - first].update_light(
+                *index.data(BeamlineModel.LightRole)
+            )
+
+    def clear_subs(self):
+        """Clear the subscriptions of every row"""
+        for row in self._rows:
+            row.clear_sub()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.visible_count() != self._shown:
+            self.relayout()
+
+    def wheelEvent(self, event):
+        QCoreApplication.sendEvent(self.scrollbar, event)
+
+
+class BeamlineOverview(QWidget):
+    """
+    Condensed view of every device of a :class:`BeamlineModel`, painted as a
+    single widget
+
+    Each device is drawn as its icon in its state color, above its incoming
+    beam indicator.  Cells shrink to fit every device in the width of the
+    widget, and past :attr:`min_icon_size` are drawn as plain colored marks.
+    Changes to the model repaint only the cells of the devices that changed.
+
+    Parameters
+    ----------
+    model : BeamlineModel
+
+    parent : QWidget, optional
+    """
+    device_clicked = Signal(str)
+    cell_width = 19
+    icon_size = 15
+    min_icon_size = 8
+    beam_height = 4
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent=parent)
+        self.model = model
+        self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.setFixedHeight(self.icon_size + self.beam_height + 2)
+        for signal in (model.modelReset, model.rowsInserted,
+                       model.rowsRemoved, model.layoutChanged):
+            signal.connect(self._reset)
+        model.dataChanged.connect(self._data_changed)
+
+    def sizeHint(self):
+        return QSize(self.model.rowCount() * self.cell_width, self.height())
+
+    def minimumSizeHint(self):
+        return QSize(0, self.height())
+
+    def cell(self) -> float:
+        """Width of the cell of each device"""
+        count = self.model.rowCount()
+        if not count:
+            return self.cell_width
+        return min(self.cell_width, self.width() / count)
+
+    def row_at(self, x: float) -> Optional[int]:
+        """Row of the model drawn at a position, None if there is none"""
+        row = int(x // self.cell())
+        if 0 <= row < self.model.rowCount():
+            return row
+        return None
+
+    def paintEvent(self, event):
+        count = self.model.rowCount()
+        if not count:
+            return
+        cell = self.cell()
+        first = max(0, int(event.rect().left() // cell))
+        last = min(count - 1, int(event.rect().right() // cell))
+        icon = min(self.icon_size, int(cell) - 2)
+        painter = QPainter(self)
+        for row in range(first, last + 1):
+            index = self.model.index(row, 0)
+            color = index.data(BeamlineModel.ColorRole)
+            if color is None:
+                color = state_colors['disconnected']
+            _in, _out = index.data(BeamlineModel.LightRole)
+            x = row * cell
+            painter.fillRect(QRectF(x, self.icon_size + 2,
+                                    cell, self.beam_height),
+                             beam_brushes[_in])
+            if icon >= self.min_icon_size:
+                device = index.data(BeamlineModel.DeviceRole)
+                pixmap = pixmap_cache.get(symbol_for_device(device), color,
+                                          icon, icon)
+                painter.drawPixmap(QPointF(x + (cell - icon) / 2, 0), pixmap)
+            else:
+                painter.fillRect(QRectF(x, 0, max(cell - 1, 1),
+                                        self.icon_size), color)
+
+    def _reset(self, *args):
+        self.updateGeometry()
+        self.update()
+
+    def _data_changed(self, top, bottom, roles=()):
+        cell = self.cell()
+        left = math.floor(top.row() * cell)
+        right = math.ceil((bottom.row() + 1) * cell)
+        self.update(QRect(left, 0, right - left, self.height()))
+
+    def mousePressEvent(self, event):
+        super().mousePressEvent(event)
+        row = self.row_at(event.pos().x())
+        if row is not None:
+            device = self.model.index(row, 0).data(BeamlineModel.DeviceRole)
+            self.device_clicked.emit(device.name)